@@ -3,6 +3,7 @@
 """
 import time
 from typing import Tuple, Optional
+from utils.timer import precise_sleep
 
 class CombatActions:
     """战斗动作控制器"""
@@ -28,7 +29,7 @@ class CombatActions:
         
         print(f"  👆 点击怪物:  ({center_x}, {center_y})")
         self.input.click_input(center_x, center_y, restore_cursor=True)
-        time.sleep(0.2)
+        precise_sleep(0.2)
     
     def use_skill(self, skill_index=None):
         """
@@ -43,7 +44,7 @@ class CombatActions:
         
         print(f"  ⚡ 释放技能: {skill_name}")
         self.input.send_key(skill_vk)
-        time.sleep(self.skill_cooldown)
+        precise_sleep(self.skill_cooldown)
     
     def attack_monster(self, monster_pos):
         """
@@ -60,4 +61,4 @@ class CombatActions:
         
         while time.time() - start_time < duration: 
             self.attack_monster(monster_pos)
-            time.sleep(self.attack_interval)
\ No newline at end of file
+            precise_sleep(self.attack_interval)
\ No newline at end of file
@@ -1,8 +1,8 @@
 """
 拾取动作 - 拾取物品
 """
-import time
 from typing import Tuple
+from utils.timer import precise_sleep
 
 class LootingActions:
     """拾取动作控制器"""
@@ -21,11 +21,11 @@ class LootingActions:
         
         print(f"  💰 点击尸体: ({center_x}, {center_y})")
         self.input.click_input(center_x, center_y, restore_cursor=True)
-        time.sleep(0.3)
+        precise_sleep(0.3)
         
         print(f"  💰 按F键拾取...")
         self.input.send_key(self.loot_key)
-        time.sleep(0.5)
+        precise_sleep(0.5)
     
     def auto_loot_nearby(self, positions):
         """
@@ -33,4 +33,4 @@ class LootingActions:
         """
         for pos in positions:
             self. loot_corpse(pos)
-            time.sleep(0.2)
\ No newline at end of file
+            precise_sleep(0.2)
\ No newline at end of file
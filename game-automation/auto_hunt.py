@@ -1,12 +1,41 @@
 """
 自动打怪主程序 - 智能等待版
 """
+import os
 import time
 from core.window_manager import WindowManager
 from core.screen_capture_advanced import ScreenCaptureAdvanced
 from core.input_controller import InputController
+from core.action_scheduler import InputProgram
+from core.frame_grabber import FrameGrabber
+from core.frame_recorder import FrameRecorder
+from core.hover_calibrator import HoverCalibrator, profile_key
 from detection.monster_detector import MonsterDetector
+from detection.hp_bar_tracker import HpBarTracker
+from detection.liveness_probe import LivenessProbe
+from detection.kill_predictor import KillPredictor
+from detection.item_detector import ItemDetector
+from detection.inventory_detector import InventoryDetector
+from strategy.target_selector import TargetSelector
 from actions.looting import LootingActions
+from utils.config_loader import load_config
+from utils.timer import precise_sleep
+
+def grab_region(grabber, region, restore_region, timeout=2.0):
+    """临时切换后台截图区域截一帧，然后切回原区域；超时返回 None"""
+    grabber.set_region(region)
+    deadline = time.monotonic() + timeout
+    seq = grabber.seq
+    try:
+        while True:
+            frame = grabber.wait_newer_than(seq, timeout=max(0.0, deadline - time.monotonic()))
+            # 切换前已开始的那一帧还是旧区域，跳过
+            if frame is None or frame.origin == grabber.origin:
+                return frame
+            seq = frame.seq
+    finally:
+        grabber.set_region(restore_region)
+
 
 def main():
     print("=" * 60)
@@ -28,18 +57,75 @@ def main():
     
     # 初始化
     print("\n⚙️ 初始化模块...")
+    config = load_config()
     capturer = ScreenCaptureAdvanced(hwnd)
-    input_ctrl = InputController(hwnd)
+    # postmessage 方式向窗口投递消息点击，不占用鼠标，可以同时控制多个客户端
+    input_method = (config.get('game') or {}).get('input_method', 'mouse_event')
+    input_ctrl = InputController(hwnd, method=input_method)
+    print(f"✅ 输入方式: {input_method}")
     monster_detector = MonsterDetector()
+    monster_detector.set_client_size(capturer.client_width, capturer.client_height)
+    # 分块多线程检测默认关闭（粗扫+细扫下实测比单线程慢），需要时在配置里打开
+    tile_workers = int((config.get('detection') or {}).get('tile_workers', 1))
+    if tile_workers > 1:
+        monster_detector.enable_tiling(tile_workers)
+        print(f"✅ 分块检测: {monster_detector.tile_workers} 线程")
+    # calibrate_detector.py 标定过的参数（没有则用默认值）
+    hp_bar_config = config.get('hp_bar_detection')
+    if hp_bar_config:
+        monster_detector.apply_hp_bar_params(hp_bar_config)
+        print(f"✅ 已加载血条检测参数: {hp_bar_config}")
+    change_detector = monster_detector.enable_change_detection()
+    tracker = HpBarTracker(gate=20, rescan_interval=5)
+    # 玩家默认站在客户区中央
+    client_size = (capturer.client_width, capturer.client_height)
+    selector = TargetSelector(player_pos=(client_size[0] // 2, client_size[1] // 2),
+                              screen_size=client_size)
+    top_k = 3
     loot = LootingActions(input_ctrl)
+    # 物品名称模板（没有模板目录时不识别掉落，直接按 F 拾取）
+    config_dir = os.path.dirname(os.path.abspath(__file__))
+    detection_config = config.get('detection') or {}
+    stall_timeout = float(detection_config.get('stall_timeout', 3.0))
+    item_template_dir = detection_config.get('item_template_dir', 'templates/items')
+    item_detector = ItemDetector()
+    if os.path.isdir(os.path.join(config_dir, item_template_dir)):
+        count = item_detector.load_templates(os.path.join(config_dir, item_template_dir))
+        print(f"✅ 已加载 {count} 个物品模板")
+    # 背包格子区域（没有配置时不检查背包）
+    inventory = None
+    if detection_config.get('inventory_panel'):
+        inventory = InventoryDetector(detection_config['inventory_panel'],
+                                      detection_config.get('inventory_grid', (5, 6)))
+        if not inventory.fits_client(*client_size):
+            print(f"⚠️ 背包区域 {inventory.panel_region} 超出客户区 {client_size[0]}x{client_size[1]}，不检查背包")
+            inventory = None
+    # 点击悬停时间标定（配置了目标选中区域时才标定；截图走后台截图线程）
+    game_config = config.get('game') or {}
+    calibrator = None
+    if game_config.get('selection_roi'):
+        def capture_selection(region):
+            # grabber 和 detect_roi 在下面创建，标定只在主循环里进行
+            frame = grab_region(grabber, region, detect_roi)
+            return frame.image if frame is not None else None
+        
+        calibrator = HoverCalibrator(
+            input_ctrl, capture_selection, game_config['selection_roi'],
+            profile_key(windows[choice].title, client_size, game_config.get('profile')),
+            deselect_key=game_config.get('deselect_key', 0x1B))
+        if calibrator.load() is not None:
+            print(f"✅ 已加载悬停时间: {calibrator.hover_time * 1000:.0f} ms")
+        else:
+            print("💡 还没有悬停时间标定结果，将在第一个目标上标定")
     
     print("✅ 所有模块已就绪")
     
     # 配置
     print("\n⚙️ 配置:")
     max_attack_time = float(input("最大攻击等待时间(秒) [默认15]: ") or "15")
-    check_interval = float(input("检测血条间隔(秒) [默认1. 5]: ") or "1.5")
+    dead_frames = int(input("连续几帧看不到血条判定死亡 [默认3]: ") or "3")
     loot_wait = float(input("击杀后拾取延迟(秒) [默认2]:  ") or "2")
+    record_path = input("录制截图到文件(用于离线回放) [留空不录制]: ").strip()
     
     print("\n" + "=" * 60)
     print("🚀 ��始自动打怪！")
@@ -48,60 +134,123 @@ def main():
     
     killed_count = 0
     
+    # 只截取检测区域，不截整个窗口；截图放到后台线程，不阻塞检测和点击
+    detect_roi = monster_detector.get_capture_region()
+    recorder = FrameRecorder(record_path) if record_path else None
+    detect_fps = 20
+    grabber = FrameGrabber(capturer, fps=detect_fps, region=detect_roi, recorder=recorder)
+    grabber.start()
+    
     try:
         while True:
-            # 1. 截图检测怪物
-            img = capturer.capture_to_numpy()
-            monsters = monster_detector.detect_monsters_by_hp_bar(img)
+            # 1. 取一帧比当前更新的截图检测怪物
+            frame = grabber.wait_newer_than(grabber.seq, timeout=2.0)
+            if frame is None:
+                print("⚠️ 截图超时，重试...")
+                continue
+            monsters = tracker.process(monster_detector, frame.image, frame.origin, frame.timestamp)
             
             if not monsters:
                 print("⏳ 没有发现怪物，等待中...")
                 time.sleep(2)
+                tracker.reset()
+                continue
+            
+            # 2. 综合距离、剩余血量、最近是否打过给所有怪物打分，排出前几个目标
+            bars, ids = tracker.visible_bars()
+            order = selector.rank(bars, ids, k=top_k)
+            if len(order) == 0:
+                print("⏳ 看到的怪物都在黑名单中，等待中...")
+                time.sleep(2)
+                tracker.reset()
                 continue
             
-            # 2. 选择最近的怪物
-            monster = monster_detector.find_nearest_monster(monsters)
+            target = tracker.get(int(ids[order[0]]))
+            backups = [int(i) for i in ids[order[1:]]]
+            selector.mark_tried(target.id, target.hp_bar[:2])
             
-            click_x, click_y = monster['click_pos']
-            hp_x, hp_y, hp_w, hp_h = monster['hp_bar']
+            click_x, click_y = target.click_pos
+            # 检测结果是客户区坐标，点击用屏幕坐标
+            screen_x, screen_y = input_ctrl.client_to_screen(click_x, click_y)
+            hp_x, hp_y, hp_w, hp_h = target.hp_bar
             
-            print(f"\n🎯 发现怪物: 点击位置=({click_x}, {click_y}), 共{len(monsters)}个怪物")
+            print(f"\n🎯 发现怪物 #{target.id}: 点击位置=({click_x}, {click_y}), 共{len(monsters)}个怪物")
+            if backups:
+                print(f"   备选目标: {', '.join(f'#{i}' for i in backups)}")
             print(f"   血条位置: ({hp_x}, {hp_y}), 大小={hp_w}×{hp_h}")
             
-            # 3. 点击怪物
-            print(f"👆 点击怪物...")
-            input_ctrl.click_input(click_x, click_y, restore_cursor=True)
+            # 3. 点击怪物（移动/悬停/按下在后台执行，这边马上开始探测血条）
+            #    还没有悬停时间或到期复核时，先在这个目标上标定/复核，选中了就不用再点
+            click = None
+            if calibrator is not None and calibrator.maintain(screen_x, screen_y):
+                print(f"👆 标定/复核时已选中怪物")
+            else:
+                print(f"👆 点击怪物...")
+                click = input_ctrl.click_input(screen_x, screen_y, restore_cursor=True, wait=False)
+            
+            # 4. 智能等待：后台只截目标血条附近的小窗口，按预计击杀时间调整探测频率
+            print(f"⚔️ 等待角色攻击（最长{max_attack_time}秒，接近击杀时密集探测）...")
             
-            # 4. 智能等待：持续检测血条直到消失
-            print(f"⚔️ 等待角色攻击（最长{max_attack_time}秒，每{check_interval}秒检测一次）...")
+            probe = LivenessProbe(monster_detector, target.hp_bar, full_width=target.max_width)
+            predictor = KillPredictor(min_interval=1.0 / detect_fps, max_interval=0.5,
+                                      stall_timeout=stall_timeout)
+            grabber.set_region(probe.region)
             
             start_time = time.time()
             hp_disappeared = False
+            stalled = False
             check_count = 0
+            missing = 0
+            landed = 0.0
+            last_report = start_time
+            seq = grabber.seq
             
-            while time.time() - start_time < max_attack_time: 
-                time.sleep(check_interval)
-                check_count += 1
-                
-                # 检测血条是否还在
-                img_check = capturer.capture_to_numpy()
-                monsters_check = monster_detector.detect_monsters_by_hp_bar(img_check)
-                
-                # 检查同一位置的血条是否还在
-                hp_still_exists = False
-                for m in monsters_check:
-                    check_hp_x, check_hp_y, _, _ = m['hp_bar']
-                    if abs(check_hp_x - hp_x) < 20 and abs(check_hp_y - hp_y) < 20:
-                        hp_still_exists = True
+            try:
+                while time.time() - start_time < max_attack_time:
+                    frame = grabber.wait_newer_than(seq, timeout=2.0)
+                    if frame is None:
+                        continue
+                    seq = frame.seq
+                    check_count += 1
+                    
+                    result = probe.check(frame.image, frame.origin, frame.timestamp)
+                    if result.alive:
+                        missing = 0
+                        # 点击（移动、悬停、按下）还在后台执行时不记录血量，掉血计时从点击落下后开始
+                        if click is not None:
+                            if not click.done():
+                                continue
+                            click, landed = None, time.monotonic()
+                        if frame.timestamp < landed:
+                            continue
+                        predictor.add(frame.timestamp, result.fraction)
+                        if predictor.stalled(frame.timestamp):
+                            print(f"   ⚠️ 血量{predictor.stall_timeout:.0f}秒没有下降，放弃此目标")
+                            stalled = True
+                            break
+                        
+                        # 离预计击杀越近，后台截图越频繁
+                        grabber.fps = 1.0 / predictor.next_interval()
+                        if time.time() - last_report >= 1.0:
+                            last_report = time.time()
+                            remaining = predictor.time_to_death()
+                            eta = f"，预计{remaining:.1f}秒后击杀" if remaining is not None else ""
+                            print(f"   ⏳ 血条还在，剩余约 {result.fraction:.0%}{eta}（已探测{check_count}次）")
+                        continue
+                    
+                    # 连续几帧都看不到才算死亡，避免特效遮挡一帧就误判；确认期间全速截图
+                    grabber.fps = detect_fps
+                    missing += 1
+                    if missing >= dead_frames:
+                        elapsed = time.time() - start_time
+                        print(f"   ✅ 血条消失！耗时 {elapsed:.1f}秒（探测{check_count}次）")
+                        hp_disappeared = True
                         break
-                
-                if not hp_still_exists:
-                    elapsed = time.time() - start_time
-                    print(f"   ✅ 血条消失！耗时 {elapsed:.1f}秒（检测{check_count}次）")
-                    hp_disappeared = True
-                    break
-                else:
-                    print(f"   ⏳ 第{check_count}次检测：血条还在，继续等待...")
+            finally:
+                # 恢复截取整个检测区域；只保留排好队的备选目标，下一帧先在它们附近确认
+                grabber.fps = detect_fps
+                grabber.set_region(detect_roi)
+                tracker.retain(backups)
             
             # 5. 判断结果
             if hp_disappeared: 
@@ -110,25 +259,66 @@ def main():
                 
                 # 6. 拾取
                 print(f"💰 等待{loot_wait}秒后拾取...")
-                time.sleep(loot_wait)
+                precise_sleep(loot_wait)
+                
+                # 有物品模板时先截尸体附近看看有没有掉落
+                items = None
+                if item_detector.templates:
+                    frame = grab_region(grabber, item_detector.get_capture_region((click_x, click_y)),
+                                        detect_roi)
+                    if frame is not None:
+                        items = item_detector.detect_items(frame.image, (click_x, click_y), frame.origin)
                 
-                print(f"💰 拾取尸体...")
-                input_ctrl.click_input(click_x, click_y, restore_cursor=True)
-                time.sleep(0.3)
-                input_ctrl.send_key(0x46)  # F键
+                # 背包只重新识别有变化的格子，每次拾取前都能检查
+                bag_full = False
+                if inventory is not None:
+                    frame = grab_region(grabber, inventory.get_capture_region(), detect_roi)
+                    if frame is not None:
+                        try:
+                            changed = inventory.update(frame.image, frame.origin)
+                        except ValueError as e:
+                            # 窗口运行中被缩小，面板截不全：这次跳过检查
+                            print(f"⚠️ 背包检查跳过: {e}")
+                            changed = None
+                        if changed is not None:
+                            bag_full = inventory.is_full()
+                            if len(changed):
+                                print(f"🎒 背包: {inventory.occupied_count()}/{inventory.slot_count} 格")
+                
+                if bag_full:
+                    print("🎒 背包已满，跳过拾取")
+                elif items is not None and len(items) == 0:
+                    print("💨 附近没有识别到掉落，跳过拾取")
+                else:
+                    if items is not None:
+                        print(f"💰 发现掉落: {', '.join(item_detector.item_names(items))}")
+                    print(f"💰 拾取尸体...")
+                    # 点击、停顿、按 F 依次排队在后台执行，不阻塞下一轮截图和检测
+                    input_ctrl.click_input(screen_x, screen_y, restore_cursor=True, wait=False)
+                    input_ctrl.run(InputProgram('loot_wait').pause(0.3), wait=False)
+                    input_ctrl.send_key(0x46, wait=False)  # F键
                 
                 print(f"\n✅ 已击杀: {killed_count} 个怪物\n")
                 time.sleep(1)
             else:
-                print(f"⚠️ 超时{max_attack_time}秒，怪物可能还活着或已逃跑")
-                print("   跳过此怪物，寻找下一个目标...")
+                if not stalled:
+                    print(f"⚠️ 超时{max_attack_time}秒，怪物可能还活着或已逃跑")
+                print(f"   跳过此怪物，{selector.blacklist_time:.0f}秒内不再选择...")
+                selector.mark_timeout(target.id, target.hp_bar[:2])
                 time.sleep(1)
             
     except KeyboardInterrupt:
         print("\n\n" + "=" * 60)
         print("⏹️ 停止自动打怪")
         print(f"📊 总击杀:  {killed_count} 个怪物")
+        print(f"📊 画面未变跳过检测: {change_detector.hits}/{change_detector.checks} "
+              f"({change_detector.hit_rate:.0%})")
         print("=" * 60)
+    finally:
+        input_ctrl.stop_scheduler()
+        grabber.stop()
+        if recorder is not None:
+            recorder.close()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
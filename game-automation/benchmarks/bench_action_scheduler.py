@@ -0,0 +1,83 @@
+"""
+动作调度基准 - 用记录后端模拟控制循环：每轮检测 10 ms，每隔几轮点击一次，
+比较点击阻塞执行与交给调度线程时循环的吞吐，以及输入步骤相对计划时间的偏差
+运行: python benchmarks/bench_action_scheduler.py
+"""
+import sys
+import os
+import time
+import threading
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.input_backends import RecordingInputBackend
+from core.input_controller import InputController
+from core.action_scheduler import click_program, run_program
+
+
+class CursorRecordingBackend(RecordingInputBackend):
+    """移动真实鼠标的记录后端：点击后会恢复鼠标位置"""
+    uses_cursor = True
+
+
+def detect():
+    """模拟一次截图 + 检测"""
+    deadline = time.perf_counter() + 0.010
+    while time.perf_counter() < deadline:
+        pass
+
+
+def control_loop(controller, seconds=3.0, click_every=20, wait=True):
+    """跑 seconds 秒，返回 (检测轮数, 点击次数, 最长一轮耗时 ms)"""
+    ticks = clicks = 0
+    worst = 0.0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        detect()
+        ticks += 1
+        if ticks % click_every == 0:
+            controller.click_input(400, 300, wait=wait)
+            clicks += 1
+        worst = max(worst, time.perf_counter() - start)
+    if controller.scheduler is not None:
+        controller.scheduler.wait_idle()
+    return ticks, clicks, worst * 1000
+
+
+def step_errors(backend, hover=0.3, hold=0.1, after=0.25):
+    """每次点击 按下/释放/恢复 相对移动时刻的偏差（ms）"""
+    planned = np.array([hover, hover + hold, hover + hold + after])
+    events = backend.events
+    errors = []
+    for i in range(0, len(events) - 3, 4):
+        start = events[i][0]
+        actual = np.array([events[i + k][0] - start for k in (1, 2, 3)])
+        errors.append(actual - planned)
+    return np.abs(np.array(errors)) * 1000
+
+
+def main():
+    for wait in (True, False):
+        backend = CursorRecordingBackend(cursor=(10, 10))
+        controller = InputController(hwnd=0, backend=backend)
+        ticks, clicks, worst = control_loop(controller, wait=wait)
+        errors = step_errors(backend)
+        controller.stop_scheduler()
+        mode = "阻塞点击" if wait else "调度线程"
+        print(f"📊 {mode}: 3 秒内检测 {ticks} 轮，点击 {clicks} 次，最长一轮 {worst:.1f} ms | "
+              f"输入时序偏差 平均 {errors.mean():.2f} ms，最大 {errors.max():.2f} ms")
+
+    # 悬停期间被中断：按键没有按下，鼠标也要回到原位
+    backend = CursorRecordingBackend(cursor=(10, 10))
+    stop = threading.Event()
+    threading.Timer(0.05, stop.set).start()
+    run_program(backend, click_program(500, 300, hover=0.3), event=stop)
+    assert backend.cursor == (10, 10), backend.cursor
+    assert not any(action == 'button' for _, action, _ in backend.events)
+    print("✅ 点击中途停止后鼠标已恢复原位")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+批量检测基准 - 录制一段合成画面，比较逐帧调用 detect_monsters_by_hp_bar 与 detect_batch
+运行: python benchmarks/bench_batch_detect.py [recording.frames]
+"""
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.frame_recorder import FrameRecorder, FrameFile
+from detection.monster_detector import MonsterDetector
+from benchmarks.synthetic import make_scene
+
+
+def record_synthetic(path, frames=400):
+    """录制一段只含检测区域的合成画面（和 auto_hunt 录制的一样）"""
+    rng = np.random.default_rng(0)
+    x, y, w, h = MonsterDetector().get_capture_region()
+    with FrameRecorder(path) as recorder:
+        for i in range(frames):
+            image, _ = make_scene(rng=rng, noise=0.002)
+            recorder.write(image[y:y + h, x:x + w], timestamp=i / 20.0, origin=(x, y))
+
+
+def loop_detect(detector, frames):
+    """原来的做法：Python 循环逐帧检测，再转换成列"""
+    rows = []
+    for i in range(len(frames)):
+        origin = tuple(int(v) for v in frames.origins[i])
+        for monster in detector.detect_monsters_by_hp_bar(frames.images[i], origin):
+            rows.append((i,) + tuple(monster['hp_bar']))
+    return np.array(rows, dtype=np.int64).reshape(-1, 5)
+
+
+def timed(func, repeat=3):
+    """跑 repeat 次取最快的一次，减少偶然抖动"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main(path=None):
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), 'bench_batch.frames')
+        record_synthetic(path)
+
+    frames = FrameFile(path)
+    detector = MonsterDetector()
+    n = len(frames)
+    np.asarray(frames.images).sum()     # 先把录制文件读进页缓存，第一个计时不吃冷启动
+
+    expected, loop_s = timed(lambda: loop_detect(detector, frames))
+    print(f"📊 逐帧循环: {loop_s / n * 1000:.3f} ms/帧, {len(expected)} 个血条")
+
+    for workers in (1, 2, 4):
+        result, batch_s = timed(lambda: detector.detect_batch(frames, workers=workers))
+        got = np.stack([result[name] for name in ('frame', 'x', 'y', 'w', 'h')], axis=1)
+        same = np.array_equal(got, expected)
+        print(f"📊 detect_batch workers={workers}: {batch_s / n * 1000:.3f} ms/帧 "
+              f"({loop_s / batch_s:.2f}x) {'✅ 结果一致' if same else '❌ 结果不一致'}")
+    print(f"💡 CPU 核数: {os.cpu_count()}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+截图会话基准 - 用内存后端验证稳定状态下零重分配
+运行: python benchmarks/bench_capture_session.py
+"""
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.capture_session import CaptureSession, MemoryCaptureBackend
+
+
+def main(frames=2000):
+    rng = np.random.default_rng(0)
+    window = {'frame': rng.integers(0, 256, (768, 1024, 4), dtype=np.uint8)}
+    backend = MemoryCaptureBackend(lambda: window['frame'])
+    session = CaptureSession(backend)
+
+    # 稳定状态
+    start = time.perf_counter()
+    for _ in range(frames):
+        session.grab('printwindow')
+    elapsed = time.perf_counter() - start
+
+    print(f"📸 {frames} 帧, 每帧 {elapsed / frames * 1000:.3f} ms")
+    print(f"   画布分配次数: {session.alloc_count} (后端创建 {backend.surfaces_created})")
+    assert session.alloc_count == 1, "稳定状态下不应重新分配"
+
+    # 模拟窗口尺寸变化，只应多分配一次
+    window['frame'] = rng.integers(0, 256, (1080, 1920, 4), dtype=np.uint8)
+    for _ in range(10):
+        session.grab('bitblt')
+    print(f"   尺寸变化后分配次数: {session.alloc_count}, 释放 {backend.surfaces_released}")
+    assert session.alloc_count == 2
+
+    session.close()
+    print("✅ 稳定状态零重分配")
+
+    # BitBlt 截 ROI 直接从窗口拷贝，不应分配整窗画布
+    session = CaptureSession(MemoryCaptureBackend(lambda: window['frame']))
+    regions = [(100, 100, 200, 50), (1800, 1000, 200, 200)]
+    for _ in range(10):
+        rois = session.grab_regions('bitblt', regions)
+    assert session._surface is None and session.alloc_count == len(regions)
+    assert np.array_equal(rois[0], window['frame'][100:150, 100:300])
+    assert rois[1].shape == (80, 120, 4)
+    session.close()
+    print(f"✅ BitBlt 截 ROI 只分配 ROI 画布: {session.alloc_count} 次")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+回放基准 - 录制（或读取已有的）截图文件，用 ReplayCapture 回放并跑怪物检测
+运行: python benchmarks/bench_detection_replay.py [recording.frames]
+"""
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.frame_recorder import FrameRecorder
+from core.replay_capture import ReplayCapture
+from detection.monster_detector import MonsterDetector
+from benchmarks.synthetic import make_scene
+
+
+def record_synthetic(path, frames=200):
+    """录制一段合成画面"""
+    rng = np.random.default_rng(0)
+    with FrameRecorder(path) as recorder:
+        for i in range(frames):
+            image, _ = make_scene(rng=rng, noise=0.002)
+            recorder.write(image, timestamp=i / 20.0)
+
+
+def main(path=None):
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), 'bench_synthetic.frames')
+        record_synthetic(path)
+
+    replay = ReplayCapture(path)
+    detector = MonsterDetector()
+    region = detector.get_capture_region()
+
+    found = 0
+    start = time.perf_counter()
+    for _ in range(len(replay)):
+        image = replay.capture_to_numpy(region=region, copy=False)
+        found += len(detector.detect_monsters_by_hp_bar(image, origin=region[:2]))
+    elapsed = time.perf_counter() - start
+
+    print(f"📊 回放 {len(replay)} 帧: 每帧 {elapsed / len(replay) * 1000:.3f} ms, 共检测到 {found} 个血条")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
\ No newline at end of file
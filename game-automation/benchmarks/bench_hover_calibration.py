@@ -0,0 +1,90 @@
+"""
+悬停时间标定基准 - 在假游戏窗口上标定 click_input 的悬停时间，比较标定前后的单次点击耗时，
+检查结果的保存/读取，以及游戏变卡后复核把悬停时间调长
+运行: python benchmarks/bench_hover_calibration.py
+"""
+import sys
+import os
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import FakeSelectionGame
+from core.input_controller import InputController
+from core.hover_calibrator import HoverCalibrator, profile_key
+
+
+def click_seconds(controller, x, y, n=5):
+    """阻塞点击 n 次的平均耗时（秒）"""
+    start = time.perf_counter()
+    for _ in range(n):
+        controller.click_input(x, y)
+    return (time.perf_counter() - start) / n
+
+
+def success_rate(calibrator, x, y, n=10):
+    return sum(calibrator.try_click(x, y, calibrator.hover_time) for _ in range(n)) / n
+
+
+def main():
+    # 需要的悬停时间离相邻候选（及其乘上安全系数后的值）都留出足够余量，sleep 超时不会改变结果
+    game = FakeSelectionGame(required_hover=0.09)
+    controller = InputController(hwnd=0, backend=game)
+    x, y = game.target_center()
+    key = profile_key("假游戏", (1024, 768), "默认")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, 'config.yaml')
+        calibrator = HoverCalibrator(controller, game.capture, game.selection_roi, key, config_path)
+
+        default_seconds = click_seconds(controller, x, y)
+        start = time.perf_counter()
+        hover_time = calibrator.calibrate(x, y)
+        calibrate_seconds = time.perf_counter() - start
+        assert hover_time is not None and hover_time >= game.required_hover
+        calibrated_seconds = click_seconds(controller, x, y)
+
+        print(f"📊 游戏需要悬停 {game.required_hover * 1000:.0f} ms:")
+        print(f"   标定耗时 {calibrate_seconds:.1f} 秒（{calibrator.attempts} 次尝试）-> 悬停 {hover_time * 1000:.0f} ms，"
+              f"选中率 {success_rate(calibrator, x, y):.0%}")
+        print(f"   单次点击 {default_seconds * 1000:.0f} ms -> {calibrated_seconds * 1000:.0f} ms | "
+              f"{default_seconds / calibrated_seconds:.2f}x")
+
+        # 新的控制器读取保存的结果
+        other = InputController(hwnd=0, backend=game)
+        loaded = HoverCalibrator(other, game.capture, game.selection_roi, key, config_path).load()
+        assert loaded is not None and abs(loaded - hover_time) < 1e-3 and other.hover_time == loaded
+        print(f"✅ 保存/读取结果一致: {loaded * 1000:.1f} ms")
+
+        # 游戏变卡，需要更长的悬停：到期复核连续失败后逐级调长，直到通过
+        game.required_hover = 0.19
+        calibrator.clicks = calibrator.revalidate_clicks
+        steps = []
+        while calibrator.needs_validation():
+            assert len(steps) < len(calibrator.candidates) * calibrator.max_failed_checks
+            steps.append(calibrator.validate(x, y))
+        assert steps[-1] and calibrator.hover_time >= game.required_hover
+        print(f"📊 游戏需要悬停 {game.required_hover * 1000:.0f} ms: 复核 {len(steps)} 次后悬停 "
+              f"{calibrator.hover_time * 1000:.0f} ms，选中率 {success_rate(calibrator, x, y):.0%}")
+
+        # 已经是最长的候选时复核失败：保持不变（不跳回最短的候选），也不会每次点击都复核
+        game.required_hover = 1.0
+        calibrator._apply(calibrator.candidates[0], calibrator.validated_at)
+        calibrator.clicks = calibrator.revalidate_clicks
+        for _ in range(calibrator.max_failed_checks):
+            assert calibrator.needs_validation() and not calibrator.validate(x, y)
+        assert calibrator.hover_time == calibrator.candidates[0] and not calibrator.needs_validation()
+        print(f"✅ 最长的候选复核失败后保持 {calibrator.hover_time * 1000:.0f} ms，等下一个复核周期")
+
+        # 目标选不中（最长的候选也不够）：单个目标失败不放弃，连续 max_failed_targets 个才放弃
+        failing = HoverCalibrator(InputController(hwnd=0, backend=game), game.capture,
+                                  game.selection_roi, key, config_path=None)
+        for target in range(failing.max_failed_targets):
+            assert not failing.gave_up and failing.maintain(x, y) is False
+        assert failing.gave_up and failing.hover_time is None
+        print(f"✅ 连续 {failing.failed_targets} 个目标标定失败后放弃（共 {failing.attempts} 次尝试）")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+背包检测基准 - 5x6 背包，比较每次对所有格子分类与按格子哈希只分类变化的格子的耗时，并检查结果是否一致
+运行: python benchmarks/bench_inventory_detector.py
+"""
+import sys
+import os
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detection.inventory_detector import InventoryDetector, EMPTY
+from utils.image_utils import crop_region
+from benchmarks.synthetic import make_scene
+
+PANEL = (760, 380, 240, 288)
+GRID = (5, 6)
+
+
+def draw_panel(image, items, rng, noise=2):
+    """画背包：深色格子 + 边框，items 为 {格子下标: 颜色}，再加一点截图噪声"""
+    x, y, w, h = PANEL
+    cols, rows = GRID
+    image[y:y + h, x:x + w] = (35, 30, 30)
+    for i in range(cols * rows):
+        row, col = divmod(i, cols)
+        x0, y0 = x + col * w // cols, y + row * h // rows
+        x1, y1 = x + (col + 1) * w // cols, y + (row + 1) * h // rows
+        cv2.rectangle(image, (x0, y0), (x1 - 1, y1 - 1), (90, 90, 90), 1)
+        if i in items:
+            cv2.circle(image, ((x0 + x1) // 2, (y0 + y1) // 2), 14, items[i], -1)
+            cv2.line(image, (x0 + 8, y1 - 10), (x1 - 8, y0 + 10), (230, 230, 230), 2)
+    panel = image[y:y + h, x:x + w]
+    panel[:] = np.clip(panel + rng.integers(-noise, noise + 1, panel.shape), 0, 255)
+    return image
+
+
+def make_frames(count, rng):
+    """背包逐渐装满：大部分帧没有变化，偶尔多一个物品"""
+    background, _ = make_scene(bars=0, rng=rng)
+    colors = [tuple(int(c) for c in rng.integers(60, 255, 3)) for _ in range(8)]
+    items, frames, truth = {}, [], []
+    for n in range(count):
+        if n % 10 == 9 and len(items) < GRID[0] * GRID[1]:
+            items[len(items)] = colors[len(items) % len(colors)]
+        frames.append(draw_panel(background.copy(), items, rng))
+        truth.append(len(items))
+    return frames, truth
+
+
+def timeit(func, frames):
+    start = time.perf_counter()
+    results = [func(frame) for frame in frames]
+    return (time.perf_counter() - start) / len(frames) * 1000, results
+
+
+def main():
+    rng = np.random.default_rng(0)
+    frames, truth = make_frames(400, rng)
+
+    full = InventoryDetector(PANEL, GRID)
+
+    def classify_all(frame):
+        # 不算哈希，每次都对所有格子调用分类器
+        panel, _ = crop_region(frame, PANEL)
+        labels = [full.classify_slot(full._slot_image(panel, i)) for i in range(full.slot_count)]
+        return sum(1 for label in labels if label != EMPTY)
+
+    incremental = InventoryDetector(PANEL, GRID)
+
+    def classify_changed(frame):
+        incremental.update(frame)
+        return incremental.occupied_count()
+
+    full_ms, full_counts = timeit(classify_all, frames)
+    inc_ms, inc_counts = timeit(classify_changed, frames)
+    stats = incremental.stats()
+    print(f"📊 {GRID[0]}x{GRID[1]} 背包 {len(frames)} 帧:")
+    print(f"   全部格子重新分类: {full_ms:.3f} ms/帧 | 正确 {np.mean(np.equal(full_counts, truth)):.0%}")
+    print(f"   增量（只分类变化的格子）: {inc_ms:.3f} ms/帧 | 正确 {np.mean(np.equal(inc_counts, truth)):.0%} | "
+          f"{full_ms / inc_ms:.1f}x")
+    print(f"   调用分类器 {stats['classified']} 次，缓存命中 {stats['cache_hits']} 次，"
+          f"空格子 {len(incremental.free_slots())} 个{'（已满）' if incremental.is_full() else ''}")
+    assert incremental.classes.count(EMPTY) == GRID[0] * GRID[1] - truth[-1]
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+存活探针基准 - 比较探针与整区域重新检测的耗时，并检查血量比例随掉血变化
+运行: python benchmarks/bench_liveness_probe.py
+"""
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detection.monster_detector import MonsterDetector
+from detection.liveness_probe import LivenessProbe
+from benchmarks.synthetic import make_scene
+
+
+def timeit(func, repeat=2000):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    detector = MonsterDetector()
+    image, boxes = make_scene(rng=np.random.default_rng(1))
+    x, y, w, h = boxes[0]
+    probe = LivenessProbe(detector, boxes[0])
+
+    # 从探针窗口大小的截图上探测（等待击杀时后台线程只截这个窗口）
+    rx, ry, rw, rh = probe.region
+    window = np.ascontiguousarray(image[ry:ry + rh, rx:rx + rw])
+
+    full_ms = timeit(lambda: detector.detect_hp_bars(image), repeat=200)
+    probe_ms = timeit(lambda: probe.check(window, (rx, ry), 0.0))
+    print(f"📊 整区域检测 {full_ms:.3f} ms | 探针 {probe_ms:.4f} ms | {full_ms / probe_ms:.0f}x")
+
+    # 模拟掉血：血条从右往左变短，最后消失
+    drained = image.copy()
+    print("📊 剩余宽度 -> 探测比例:", end="")
+    for remaining in (w, w * 3 // 4, w // 2, w // 4, 0):
+        drained[y:y + h, x + remaining:x + w] = (20, 20, 20)
+        result = probe.check(drained)
+        print(f"  {remaining}/{w} -> {result.fraction:.2f}{'' if result.alive else ' 💀'}", end="")
+    print()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
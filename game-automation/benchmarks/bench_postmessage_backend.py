@@ -0,0 +1,67 @@
+"""
+后台消息点击基准 - 三个客户端窗口同时点击：移动真实鼠标的方式只能一个一个来，
+PostMessage 方式各窗口并行；同时检查投递的消息序列和客户区坐标换算
+运行: python benchmarks/bench_postmessage_backend.py
+"""
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.input_backends import (RecordingInputBackend, PostMessageInputBackend, make_lparam,
+                                 WM_MOUSEMOVE, WM_LBUTTONDOWN, WM_LBUTTONUP, MK_LBUTTON)
+from core.input_controller import InputController
+
+# 三个客户端窗口客户区左上角的屏幕坐标
+WINDOWS = {101: (0, 0), 102: (1024, 0), 103: (0, 768)}
+
+
+class CursorRecordingBackend(RecordingInputBackend):
+    """移动真实鼠标的记录后端（模拟 mouse_event / SendInput）"""
+    uses_cursor = True
+
+
+def click_all(controllers):
+    """每个窗口点击客户区 (400, 300)，返回全部完成的耗时"""
+    start = time.perf_counter()
+    futures = [controller.click_input(ox + 400, oy + 300, wait=False)
+               for controller, (ox, oy) in zip(controllers, WINDOWS.values())]
+    for future in futures:
+        future.result()
+    return time.perf_counter() - start
+
+
+def main():
+    cursor = [InputController(hwnd, backend=CursorRecordingBackend()) for hwnd in WINDOWS]
+    cursor_seconds = click_all(cursor)
+
+    messages = {hwnd: [] for hwnd in WINDOWS}
+
+    def make_backend(hwnd):
+        ox, oy = WINDOWS[hwnd]
+        return PostMessageInputBackend(
+            hwnd, post=lambda h, msg, wparam, lparam: messages[h].append((msg, wparam, lparam)),
+            screen_to_client=lambda x, y: (x - ox, y - oy))
+
+    background = [InputController(hwnd, backend=make_backend(hwnd)) for hwnd in WINDOWS]
+    background_seconds = click_all(background)
+
+    for controller in cursor + background:
+        controller.stop_scheduler()
+
+    print(f"📊 {len(WINDOWS)} 个窗口各点击一次:")
+    print(f"   移动真实鼠标（互斥）: {cursor_seconds:.2f} 秒")
+    print(f"   PostMessage 后台点击: {background_seconds:.2f} 秒 | {cursor_seconds / background_seconds:.1f}x")
+
+    # 每个窗口都是 悬停 -> 按下 -> 释放，坐标都是自己的客户区坐标
+    expected = [(WM_MOUSEMOVE, 0, make_lparam(400, 300)),
+                (WM_LBUTTONDOWN, MK_LBUTTON, make_lparam(400, 300)),
+                (WM_LBUTTONUP, 0, make_lparam(400, 300))]
+    for hwnd, sent in messages.items():
+        assert sent == expected, (hwnd, sent)
+    print("✅ 消息序列和客户区坐标正确")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+精确计时基准 - 比较 time.sleep 与 precise_sleep 实际睡眠时间和请求时间的偏差，
+以及按固定间隔循环时 sleep(间隔) 与 Ticker 的累计漂移和每拍抖动
+运行: python benchmarks/bench_precise_sleep.py
+"""
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.timer import precise_sleep, sleep_margin, Ticker, JitterStats
+
+REQUESTS = [0.001, 0.005, 0.016, 0.050]
+
+
+def sleep_errors(sleep, request, n):
+    """n 次 sleep(request) 的超时量（ms）"""
+    errors = np.empty(n)
+    for i in range(n):
+        start = time.perf_counter()
+        sleep(request)
+        errors[i] = (time.perf_counter() - start - request) * 1000
+    return errors
+
+
+def work():
+    """模拟每拍 2 ms 的处理"""
+    deadline = time.perf_counter() + 0.002
+    while time.perf_counter() < deadline:
+        pass
+
+
+def naive_loop(period, ticks):
+    """处理完再 sleep(period)：返回 (累计漂移 ms, 每拍间隔误差 ms)"""
+    start = time.perf_counter()
+    stamps = np.empty(ticks)
+    for i in range(ticks):
+        work()
+        time.sleep(period)
+        stamps[i] = time.perf_counter()
+    drift = (stamps[-1] - start - ticks * period) * 1000
+    return drift, (np.diff(stamps) - period) * 1000
+
+
+def ticker_loop(period, ticks):
+    """Ticker 按截止时间排程：返回 (累计漂移 ms, 每拍醒来偏差统计)"""
+    stats = JitterStats(ticks)
+    ticker = Ticker(period, stats=stats)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        work()
+        ticker.wait()
+    drift = (time.perf_counter() - start - ticks * period) * 1000
+    return drift, stats.summary(), ticker.missed
+
+
+def main():
+    print(f"📊 粗睡眠提前量: {sleep_margin() * 1000:.2f} ms")
+    print(f"📊 睡眠超时量（实际 - 请求，ms）:")
+    for request in REQUESTS:
+        n = max(20, int(1.0 / request / 4))
+        coarse = sleep_errors(time.sleep, request, n)
+        precise = sleep_errors(precise_sleep, request, n)
+        print(f"   {request * 1000:5.1f} ms x{n:3d} | time.sleep 平均 {coarse.mean():.3f} 最大 {coarse.max():.3f} | "
+              f"precise_sleep 平均 {precise.mean():.3f} 最大 {precise.max():.3f}")
+
+    period, ticks = 0.020, 250
+    drift, intervals = naive_loop(period, ticks)
+    print(f"📊 {ticks} 拍 x {period * 1000:.0f} ms，每拍处理 2 ms:")
+    print(f"   sleep(周期): 累计漂移 {drift:.1f} ms，间隔误差 平均 {intervals.mean():.2f} ms，"
+          f"p99 {np.percentile(intervals, 99):.2f} ms")
+    drift, summary, missed = ticker_loop(period, ticks)
+    print(f"   Ticker:      累计漂移 {drift:.1f} ms，醒来偏差 平均 {summary['mean_ms']:.3f} ms，"
+          f"p99 {summary['p99_ms']:.3f} ms，最大 {summary['max_ms']:.3f} ms，丢拍 {missed}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+红色分类器基准 - 校验与原来的 HSV + 两次 inRange 逐像素一致，并比较耗时
+运行: python benchmarks/bench_red_classifier.py
+"""
+import sys
+import os
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detection.monster_detector import MonsterDetector
+from detection.red_classifier import get_red_classifier
+from utils.image_utils import bgrx_view
+from benchmarks.synthetic import make_scene
+
+
+def reference_mask(detector, image):
+    """原来的实现：cvtColor + 两次 inRange + bitwise_or"""
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    mask1 = cv2.inRange(hsv, detector.hp_bar_lower, detector.hp_bar_upper)
+    mask2 = cv2.inRange(hsv, detector.hp_bar_lower2, detector.hp_bar_upper2)
+    return cv2.bitwise_or(mask1, mask2)
+
+
+def timeit(func, repeat=200):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def as_bgrx_view(image):
+    """模拟截图返回的 BGRX 缓冲区上的 BGR 视图"""
+    h, w = image.shape[:2]
+    bgrx = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+    return bgrx_view(bgrx.tobytes(), w, h)
+
+
+def main():
+    detector = MonsterDetector()
+    classifier = get_red_classifier(detector)
+
+    # 逐像素一致性：全部 2^24 种颜色，默认阈值（折叠路径）和不能折叠的阈值各一次
+    colors = np.arange(1 << 24, dtype=np.uint32).view(np.uint8).reshape(4096, 4096, 4)[:, :, :3]
+    colors = np.ascontiguousarray(colors)
+    other = MonsterDetector()
+    other.hp_bar_upper = np.array([11, 255, 255])
+    for name, owner in (('默认阈值', detector), ('非对称阈值', other)):
+        if not np.array_equal(get_red_classifier(owner).classify(colors),
+                              reference_mask(owner, colors)):
+            print(f"❌ {name} 全色域校验不一致")
+            return
+        print(f"✅ {name} 全色域 16777216 种颜色与 HSV + inRange 结果一致 "
+              f"(折叠: {get_red_classifier(owner).folded})")
+
+    rng = np.random.default_rng(0)
+    x, y, w, h = detector.get_capture_region()
+    cases = [
+        ('合成画面', make_scene(rng=rng)[0]),
+        ('合成画面+5%噪点', make_scene(rng=rng, noise=0.05)[0]),
+        ('随机噪声', rng.integers(0, 256, (768, 1024, 3), dtype=np.uint8)),
+    ]
+
+    for name, image in cases:
+        for layout, frame in (('BGR', image), ('BGRX视图', as_bgrx_view(image))):
+            roi = frame[y:y + h, x:x + w]
+            expected = reference_mask(detector, roi)
+            out = np.empty(roi.shape[:2], dtype=np.uint8)
+            if not np.array_equal(classifier.classify(roi, out=out), expected):
+                print(f"❌ {name} ({layout}) 结果不一致")
+                return
+
+            ref_ms = timeit(lambda: reference_mask(detector, roi))
+            new_ms = timeit(lambda: classifier.classify(roi, out=out))
+            print(f"📊 {name:<14} {layout:<8} 原实现 {ref_ms:.3f} ms | "
+                  f"分类器 {new_ms:.3f} ms | {ref_ms / new_ms:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
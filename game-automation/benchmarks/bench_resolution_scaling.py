@@ -0,0 +1,49 @@
+"""
+分辨率基准 - 检测区域按客户区比例换算后，比较全分辨率检测与粗扫 + 细扫在各分辨率下的耗时
+运行: python benchmarks/bench_resolution_scaling.py
+"""
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detection.monster_detector import MonsterDetector
+from benchmarks.synthetic import make_scene
+
+
+def timeit(func, images):
+    func(images[0])
+    start = time.perf_counter()
+    for image in images:
+        func(image)
+    return (time.perf_counter() - start) / len(images) * 1000
+
+
+def main():
+    for width, height in ((1024, 768), (1920, 1080), (2560, 1440), (3840, 2160)):
+        full = MonsterDetector()
+        full.set_client_size(width, height)
+        full.coarse_min_pixels = float('inf')
+        coarse = MonsterDetector()
+        coarse.set_client_size(width, height)
+        coarse.coarse_min_pixels = 0
+
+        region = full.get_capture_region()
+        rng = np.random.default_rng(0)
+        images = [make_scene(height, width, bars=12, rng=rng, noise=noise, region=region)[0]
+                  for noise in (0.0, 0.0005, 0.002) * 4]
+
+        same = all(np.array_equal(np.sort(full.detect_hp_bars(image), order=['y', 'x']),
+                                  np.sort(coarse.detect_hp_bars(image), order=['y', 'x']))
+                   for image in images)
+        full_ms = timeit(full.detect_hp_bars, images)
+        coarse_ms = timeit(coarse.detect_hp_bars, images)
+        print(f"📊 {width}x{height} 检测区域 {region[2]}x{region[3]}: 全分辨率 {full_ms:6.2f} ms | "
+              f"粗扫+细扫 {coarse_ms:6.2f} ms | {full_ms / coarse_ms:.2f}x "
+              f"{'✅ 结果一致' if same else '❌ 结果不一致'}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
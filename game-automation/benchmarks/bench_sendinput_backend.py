@@ -0,0 +1,62 @@
+"""
+SendInput 后端基准 - 用记录函数代替系统调用，统计各种动作需要的系统调用次数，
+检查编译出的 INPUT 数组，并测量编译 + 构造 ctypes 数组的耗时
+运行: python benchmarks/bench_sendinput_backend.py
+"""
+import sys
+import os
+import time
+import ctypes
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.input_backends import (RecordingInputBackend, SendInputBackend, INPUT, INPUT_MOUSE,
+                                 KEYEVENTF_KEYUP, compile_inputs, build_input_array)
+from core.action_scheduler import (run_program, click_program, double_click_program, drag_program,
+                                   combo_program, key_program)
+
+SCREEN = (0, 0, 1920, 1080)
+
+# (名称, 程序)；时长都设为 0 的是"不需要停顿"的动作
+PROGRAMS = [
+    ("单击（悬停 0.3 秒）", click_program(960, 540, restore_cursor=False)),
+    ("快速单击", click_program(960, 540, hover=0, hold=0, after=0, restore_cursor=True, restore_delay=0)),
+    ("双击", double_click_program(960, 540, hover=0, hold=0, gap=0, restore_cursor=False)),
+    ("拖拽", drag_program(100, 100, 500, 400, hover=0, hold=0, moves=4, restore_cursor=False)),
+    ("Ctrl+Shift+S", combo_program([0x11, 0x10, 0x53], hold=0.02, gap=0)),
+    ("按键 F", key_program(0x46, hold=0.02, after=0)),
+]
+
+
+def main():
+    print(f"📊 系统调用次数（mouse_event/PostMessage 逐个调用 vs SendInput 按时刻合并）:")
+    for name, program in PROGRAMS:
+        recording = RecordingInputBackend()
+        run_program(recording, program)
+        batches = []
+        sendinput = SendInputBackend(0, screen_size=SCREEN, send=batches.append)
+        run_program(sendinput, program)
+        sizes = '+'.join(str(len(batch)) for batch in batches)
+        print(f"   {name:<14} {len(recording.events):2d} 次 -> {sendinput.calls} 次 SendInput（每次事件数 {sizes}）")
+
+    # 检查组合键编译结果：按下顺序、释放逆序
+    events = compile_inputs([('key', (0x11, True)), ('key', (0x53, True))], SCREEN)
+    events += compile_inputs([('key', (0x53, False)), ('key', (0x11, False))], SCREEN)
+    assert [e[1] for e in events] == [0x11, 0x53, 0x53, 0x11]
+    assert [bool(e[3] & KEYEVENTF_KEYUP) for e in events] == [False, False, True, True]
+
+    # 屏幕右下角换算成 65535
+    move = compile_inputs([('move', (1919, 1079))], SCREEN)[0]
+    assert move[0] == INPUT_MOUSE and move[1:3] == (65535, 65535)
+    print(f"✅ 编译结果检查通过，sizeof(INPUT) = {ctypes.sizeof(INPUT)}")
+
+    steps = [('move', (960, 540)), ('button', ('left', True)), ('button', ('left', False))]
+    n = 20000
+    start = time.perf_counter()
+    for _ in range(n):
+        build_input_array(compile_inputs(steps, SCREEN))
+    print(f"📊 单击编译 + 构造 INPUT[3]: {(time.perf_counter() - start) / n * 1e6:.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
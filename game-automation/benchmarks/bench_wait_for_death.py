@@ -0,0 +1,85 @@
+"""
+等待击杀模拟 - 用假时钟驱动 DeathDetector.wait_for_death，比较固定间隔与自适应探测
+运行: python benchmarks/bench_wait_for_death.py
+"""
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detection.death_detector import DeathDetector
+from utils.image_utils import crop_region
+
+
+class FakeClock:
+    """假时钟：sleep 只推进时间，不真的等待"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+class FakeFight:
+    """模拟一场战斗：血条在 kill_time 秒内线性掉光（kill_time 为 None 表示打不动）"""
+
+    BAR_HEIGHT = 3
+
+    def __init__(self, clock, monster_region, kill_time, bar_width=30):
+        self.clock = clock
+        self.kill_time = kill_time
+        self.bar_width = bar_width
+        x, y, _, _ = monster_region
+        self.bar_x, self.bar_y = x, y - 15
+        self.frame = np.zeros((768, 1024, 3), dtype=np.uint8)
+
+        # 只剩 1 列（3 个像素）时已低于 DeathDetector 的 5 像素阈值，从这时起算作死亡
+        self.death_time = None if kill_time is None else kill_time * (1 - 1 / bar_width)
+
+    def capture(self, region=None):
+        self.frame[:] = (40, 80, 40)
+        if self.kill_time is None:
+            remaining = 1.0
+        else:
+            remaining = max(0.0, 1.0 - self.clock() / self.kill_time)
+        width = int(np.ceil(self.bar_width * remaining - 1e-9))
+        if width:
+            self.frame[self.bar_y:self.bar_y + self.BAR_HEIGHT,
+                       self.bar_x:self.bar_x + width] = (30, 30, 230)
+        if region is None:
+            return self.frame
+        return crop_region(self.frame, region)[0]
+
+
+def run(kill_time, monster_width=30, **kwargs):
+    clock = FakeClock()
+    monster_region = (400, 300, monster_width, 40)
+    fight = FakeFight(clock, monster_region, kill_time)
+    detector = DeathDetector()
+    dead = detector.wait_for_death(fight.capture, monster_region, max_wait=10.0,
+                                   clock=clock, sleep=clock.sleep, **kwargs)
+    return dead, clock.now - (fight.death_time or 0.0), detector.last_wait_stats
+
+
+def main():
+    fixed = dict(min_interval=0.5, max_interval=0.5, stall_timeout=1e9)
+    for kill_time in (1.2, 3.7, 8.3, None):
+        name = f"{kill_time}秒击杀" if kill_time else "打不动"
+        for label, kwargs in (("固定0.5秒", fixed), ("自适应", {})):
+            dead, late, stats = run(kill_time, **kwargs)
+            result = f"发现延迟 {late * 1000:4.0f} ms" if dead else f"{late:.2f}秒后放弃"
+            print(f"📊 {name:<8} {label:<6}: {result}, 探测 {stats['polls']} 次")
+
+    # 怪物框比血条宽（90 vs 30 像素）：剩余比例要按血条宽度算，掉血慢的目标才不会被误判为打不动
+    for width in (30, 90):
+        dead, late, stats = run(40.0, monster_width=width)
+        print(f"📊 40秒击杀 怪物框宽 {width}: 等待 10 秒的结果 {stats['result']}，探测 {stats['polls']} 次")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""
+合成测试画面 - 随机背景 + 若干红色细血条，以及会响应点击的假游戏窗口，供基准脚本使用
+"""
+import json
+import os
+import cv2
+import numpy as np
+from core.input_backends import RecordingInputBackend
+
+
+def make_scene(height=768, width=1024, bars=8, rng=None, noise=0.0,
+               bar_size=(30, 3), region=(100, 100, 800, 450)):
+    """
+    生成一帧带血条的 BGR 画面
+
+    :param bars: 血条数量
+    :param rng: np.random.Generator
+    :param noise: 红色噪点比例（0~1），模拟技能特效等干扰
+    :param bar_size: 血条 (宽, 高)
+    :param region: 血条分布的区域 (x, y, w, h)
+    :return: (image, [(x, y, w, h), ...])
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+
+    # 平滑的随机背景（偏绿/偏蓝，避免误检）
+    small = rng.integers(0, 120, (height // 16 + 1, width // 16 + 1, 3), dtype=np.uint8)
+    small[:, :, 1] += 60
+    image = cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+
+    if noise > 0:
+        mask = rng.random((height, width)) < noise
+        image[mask] = (0, 0, 220)
+
+    rx, ry, rw, rh = region
+    bar_w, bar_h = bar_size
+    boxes = []
+    for _ in range(bars):
+        x = int(rng.integers(rx + 5, rx + rw - bar_w - 5))
+        y = int(rng.integers(ry + 5, ry + rh - bar_h - 60))
+        # 血条外框 + 红色血量
+        image[y - 1:y + bar_h + 1, x - 1:x + bar_w + 1] = (20, 20, 20)
+        image[y:y + bar_h, x:x + bar_w] = (30, 30, 230)
+        boxes.append((x, y, bar_w, bar_h))
+
+    return image, boxes
+
+
+def make_moving_scenes(frames, height=768, width=1024, bars=8, rng=None, speed=40.0,
+                       fps=20.0, bar_size=(30, 3), region=(100, 100, 800, 450)):
+    """
+    生成血条匀速移动的连续画面（背景不变，血条碰到区域边缘反弹），供跟踪相关的基准使用
+
+    :param frames: 帧数
+    :param speed: 血条最大移动速度（像素/秒）
+    :return: 生成器，每次产出 (image, [(x, y, w, h), ...])，boxes 与血条一一对应
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+    background, _ = make_scene(height, width, bars=0, rng=rng, region=region)
+
+    rx, ry, rw, rh = region
+    bar_w, bar_h = bar_size
+    low = np.array([rx + 5, ry + 5], dtype=np.float64)
+    high = np.array([rx + rw - bar_w - 5, ry + rh - bar_h - 60], dtype=np.float64)
+
+    # 初始位置互相错开，避免血条一开始就重叠
+    positions = []
+    while len(positions) < bars:
+        candidate = rng.uniform(low, high)
+        if all(abs(candidate[0] - x) > bar_w * 2 or abs(candidate[1] - y) > 20
+               for x, y in positions):
+            positions.append(candidate)
+    positions = np.array(positions)
+    velocities = rng.uniform(-speed, speed, (bars, 2)) / fps
+
+    image = np.empty_like(background)
+    for _ in range(frames):
+        np.copyto(image, background)
+        boxes = []
+        for x, y in positions.astype(int):
+            image[y - 1:y + bar_h + 1, x - 1:x + bar_w + 1] = (20, 20, 20)
+            image[y:y + bar_h, x:x + bar_w] = (30, 30, 230)
+            boxes.append((int(x), int(y), bar_w, bar_h))
+        yield image, boxes
+
+        positions += velocities
+        bounce = (positions < low) | (positions > high)
+        velocities[bounce] *= -1
+        np.clip(positions, low, high, out=positions)
+
+
+def record_labelled(path, frames=40, rng=None, noise=0.002, decoys=4, region=(100, 100, 800, 450)):
+    """
+    录制一段带标注的合成画面（标注写到同名 .json，格式见 calibrate_detector.py）
+
+    每帧加几条暗红色的假血条（亮度低、不该被检测到），让阈值标定有区分度。
+
+    :param decoys: 每帧假血条数量
+    :param region: 录制的区域（客户区坐标），同时也是血条分布的区域
+    """
+    from core.frame_recorder import FrameRecorder
+
+    rng = rng if rng is not None else np.random.default_rng(0)
+    x0, y0, w, h = region
+    labels = {}
+    with FrameRecorder(path) as recorder:
+        for i in range(frames):
+            image, boxes = make_scene(rng=rng, noise=noise, region=region)
+            for _ in range(decoys):
+                x = int(rng.integers(x0 + 5, x0 + w - 35))
+                y = int(rng.integers(y0 + 5, y0 + h - 10))
+                image[y:y + 3, x:x + 30] = (20, 20, 85)
+            recorder.write(image[y0:y0 + h, x0:x0 + w], timestamp=i / 20.0, origin=(x0, y0))
+            labels[str(i)] = [list(box) for box in boxes]
+
+    with open(os.path.splitext(path)[0] + '.json', 'w', encoding='utf-8') as f:
+        json.dump({'frames': labels}, f)
+
+
+class FakeSelectionGame(RecordingInputBackend):
+    """
+    假游戏窗口 - 同时充当输入后端和截图函数，离线测试悬停时间标定
+
+    鼠标移到目标上、停留不少于 required_hover 秒再按下左键才会选中目标（点到别处取消选中），
+    选中时在 selection_roi 里画出目标头像框；按 deselect_key 取消选中。
+    窗口位于屏幕左上角，屏幕坐标即客户区坐标。
+    """
+
+    def __init__(self, target=(480, 300, 60, 80), selection_roi=(10, 10, 200, 48), required_hover=0.08,
+                 size=(1024, 768), deselect_key=0x1B, noise=6, rng=None):
+        """
+        :param target: 目标在画面中的范围 (x, y, w, h)
+        :param required_hover: 游戏识别悬停需要的时间（秒），运行中可以修改（模拟卡顿）
+        :param noise: 每次截图叠加的随机噪声幅度（0~255）
+        """
+        super().__init__()
+        self.target = target
+        self.selection_roi = selection_roi
+        self.required_hover = required_hover
+        self.deselect_key = deselect_key
+        self.noise = noise
+        self.selected = False
+        self.clicks = 0
+        self._hover_start = None
+        self._rng = rng if rng is not None else np.random.default_rng(0)
+        self._background, _ = make_scene(size[1], size[0], bars=0, rng=self._rng)
+        x, y, w, h = target
+        self._background[y:y + h, x:x + w] = (40, 90, 160)
+
+    def target_center(self):
+        x, y, w, h = self.target
+        return x + w // 2, y + h // 2
+
+    def move(self, x, y):
+        super().move(x, y)
+        tx, ty, tw, th = self.target
+        on_target = tx <= x < tx + tw and ty <= y < ty + th
+        self._hover_start = self.clock() if on_target else None
+
+    def button(self, button, down, x=0, y=0):
+        super().button(button, down, x, y)
+        if button == 'left' and down:
+            self.clicks += 1
+            self.selected = self._hover_start is not None and \
+                self.clock() - self._hover_start >= self.required_hover
+
+    def key(self, vk, down, sync=False):
+        super().key(vk, down, sync)
+        if down and vk == self.deselect_key:
+            self.selected = False
+
+    def capture(self, region=None):
+        """截图：region 为 (x, y, w, h) 时只返回这一块"""
+        image = self._background.copy()
+        if self.selected:
+            x, y, w, h = self.selection_roi
+            # 头像框 + 名字条
+            cv2.rectangle(image, (x + 4, y + 4), (x + h - 4, y + h - 4), (40, 90, 160), -1)
+            cv2.rectangle(image, (x + h, y + 8), (x + w - 8, y + 20), (230, 230, 230), -1)
+        if region is not None:
+            x, y, w, h = region
+            image = image[y:y + h, x:x + w]
+        if self.noise:
+            jitter = self._rng.integers(-self.noise, self.noise + 1, image.shape)
+            image = np.clip(image + jitter, 0, 255).astype(np.uint8)
+        return image
\ No newline at end of file
@@ -0,0 +1,246 @@
+"""
+血条检测参数标定 - 用标注好的帧搜索 HSV 阈值和尺寸参数，多进程并行，最优参数写入 config.yaml
+用法: python calibrate_detector.py 录制或图片文件... [--workers N] [--report 报告.csv] [--dry-run]
+
+标注文件与帧文件同名、扩展名换成 .json，坐标都是客户区坐标:
+    录制文件 xxx.frames -> xxx.json: {"frames": {"帧下标": [[x, y, w, h], ...], ...}}
+        没有出现在 "frames" 里的帧不参与评估
+    图片 xxx.png -> xxx.json: {"boxes": [[x, y, w, h], ...], "origin": [x, y]}
+        origin 可省略，表示图片是整个客户区
+"""
+import sys
+import os
+import csv
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.frame_recorder import FrameFile
+from detection.monster_detector import MonsterDetector
+from detection.red_classifier import get_red_classifier
+from detection.hp_bars import filter_hp_bar_boxes
+from utils.image_utils import crop_region
+from utils.config_loader import DEFAULT_CONFIG_PATH, save_section
+
+CONFIG_SECTION = 'hp_bar_detection'
+
+# 默认搜索空间：颜色参数决定掩码（慢），尺寸参数只筛选外接矩形（快）
+COLOR_GRID = {
+    'hue_low_max': [8, 10, 12],
+    'hue_high_min': [168, 170, 172],
+    'saturation_min': [70, 100, 130],
+    'value_min': [70, 100, 130],
+}
+SIZE_GRID = {
+    'min_width': [10, 15, 20],
+    'max_width': [50, 70],
+    'min_height': [1],
+    'max_height': [4, 5, 7],
+    'min_ratio': [4.0, 5.0, 6.0],
+}
+
+# 子进程里加载的标注数据，由 _init_worker 设置
+_dataset = []
+_worker_client_size = []
+
+
+def label_path(path):
+    """帧文件对应的标注文件路径"""
+    return os.path.splitext(path)[0] + '.json'
+
+
+def load_dataset(paths):
+    """
+    读取帧和标注
+
+    :return: [(image, origin, labels), ...]，labels 为 (m, 4) int32 数组
+    """
+    samples = []
+    for path in paths:
+        with open(label_path(path), 'r', encoding='utf-8') as f:
+            label = json.load(f)
+
+        if 'frames' in label:
+            frames = FrameFile(path)
+            for index, boxes in sorted(label['frames'].items(), key=lambda item: int(item[0])):
+                index = int(index)
+                origin = tuple(int(v) for v in frames.origins[index])
+                samples.append((frames.images[index], origin,
+                                np.array(boxes, dtype=np.int32).reshape(-1, 4)))
+        else:
+            image = cv2.imread(path)
+            if image is None:
+                raise ValueError(f"cannot read image: {path}")
+            origin = tuple(label.get('origin', (0, 0)))
+            samples.append((image, origin,
+                            np.array(label['boxes'], dtype=np.int32).reshape(-1, 4)))
+    return samples
+
+
+def match_boxes(detected, labels, min_iou=0.5):
+    """
+    检测框与标注框一对一匹配（按 IoU 从大到小贪心）
+
+    :return: 匹配上的数量
+    """
+    if not len(detected) or not len(labels):
+        return 0
+    d = detected[:, np.newaxis, :].astype(np.float64)
+    g = labels[np.newaxis, :, :].astype(np.float64)
+    iw = np.minimum(d[..., 0] + d[..., 2], g[..., 0] + g[..., 2]) - np.maximum(d[..., 0], g[..., 0])
+    ih = np.minimum(d[..., 1] + d[..., 3], g[..., 1] + g[..., 3]) - np.maximum(d[..., 1], g[..., 1])
+    inter = np.clip(iw, 0, None) * np.clip(ih, 0, None)
+    iou = inter / (d[..., 2] * d[..., 3] + g[..., 2] * g[..., 3] - inter)
+
+    order = np.argsort(iou, axis=None)[::-1]
+    order = order[iou.flat[order] >= min_iou]
+    used_d, used_g = set(), set()
+    for flat in order:
+        di, gi = divmod(int(flat), len(labels))
+        if di not in used_d and gi not in used_g:
+            used_d.add(di)
+            used_g.add(gi)
+    return len(used_d)
+
+
+def _init_worker(paths, client_size=None):
+    _dataset[:] = load_dataset(paths)
+    _worker_client_size[:] = client_size or ()
+
+
+def evaluate_color(color, sizes, min_iou=0.5):
+    """
+    评估一组颜色参数下的所有尺寸参数组合
+
+    掩码和外接矩形每帧只算一次，各尺寸组合只重新筛选，
+    每个候选的检测耗时 = 掩码耗时 + 自己的筛选耗时。
+
+    :param color: 颜色参数 dict
+    :param sizes: 尺寸参数 dict 的列表
+    :return: [(params, tp, fp, fn, ms_per_frame), ...]
+    """
+    detector = MonsterDetector()
+    detector.apply_hp_bar_params(color)
+    if _worker_client_size:
+        detector.set_client_size(*_worker_client_size)
+    classifier = get_red_classifier(detector)
+    region = detector.get_capture_region()
+
+    start = time.perf_counter()
+    frame_boxes = []
+    for image, origin, _ in _dataset:
+        roi, (roi_x, roi_y) = crop_region(image, region, origin)
+        boxes = detector._scan_roi(roi, classifier) if roi.size else np.empty((0, 4), np.int32)
+        frame_boxes.append(boxes + np.array([roi_x, roi_y, 0, 0], np.int32))
+    color_seconds = time.perf_counter() - start
+
+    results = []
+    frames = max(1, len(_dataset))
+    for size in sizes:
+        start = time.perf_counter()
+        tp = fp = fn = 0
+        for boxes, (_, _, labels) in zip(frame_boxes, _dataset):
+            keep = filter_hp_bar_boxes(boxes, size['min_width'], size['max_width'],
+                                       size['min_height'], size['max_height'], size['min_ratio'])
+            detected = boxes[keep]
+            matched = match_boxes(detected, labels, min_iou)
+            tp += matched
+            fp += len(detected) - matched
+            fn += len(labels) - matched
+        seconds = color_seconds + time.perf_counter() - start
+        results.append((dict(color, **size), tp, fp, fn, seconds / frames * 1000))
+    return results
+
+
+def _grid(space):
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def calibrate(paths, color_grid=COLOR_GRID, size_grid=SIZE_GRID, workers=None, min_iou=0.5,
+              client_size=None):
+    """
+    在所有 CPU 核上搜索参数
+
+    :param paths: 带标注的录制/图片文件列表
+    :param workers: 进程数，None 表示 CPU 核数，1 表示在当前进程内计算
+    :param client_size: 录制时的客户区 (宽, 高)，None 表示 1024x768
+    :return: [{'params', 'precision', 'recall', 'f1', 'ms'}, ...]，按 F1 从高到低、耗时从低到高排序
+    """
+    colors = _grid(color_grid)
+    sizes = _grid(size_grid)
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1:
+        _init_worker(paths, client_size)
+        raw = [evaluate_color(color, sizes, min_iou) for color in colors]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(paths, client_size)) as pool:
+            raw = list(pool.map(evaluate_color, colors, itertools.repeat(sizes),
+                                itertools.repeat(min_iou)))
+
+    results = []
+    for params, tp, fp, fn, ms in itertools.chain.from_iterable(raw):
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        results.append({'params': params, 'precision': precision, 'recall': recall,
+                        'f1': f1, 'ms': ms})
+    results.sort(key=lambda r: (-r['f1'], r['ms']))
+    return results
+
+
+def write_report(path, results):
+    """每个候选一行的 CSV 报告"""
+    keys = list(results[0]['params']) if results else []
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(keys + ['precision', 'recall', 'f1', 'ms_per_frame'])
+        for r in results:
+            writer.writerow([r['params'][k] for k in keys] +
+                            [f"{r['precision']:.4f}", f"{r['recall']:.4f}", f"{r['f1']:.4f}",
+                             f"{r['ms']:.3f}"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="血条检测参数标定")
+    parser.add_argument('paths', nargs='+', help="录制文件或图片（同名 .json 为标注）")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认 CPU 核数")
+    parser.add_argument('--iou', type=float, default=0.5, help="检测框算作命中的最小 IoU")
+    parser.add_argument('--client-size', help="录制时的客户区大小，例如 1920x1080（默认 1024x768）")
+    parser.add_argument('--report', help="把所有候选的结果写到 CSV")
+    parser.add_argument('--top', type=int, default=10, help="打印前几名")
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help="写入的配置文件")
+    parser.add_argument('--dry-run', action='store_true', help="只报告，不写配置")
+    args = parser.parse_args()
+
+    candidates = len(_grid(COLOR_GRID)) * len(_grid(SIZE_GRID))
+    print(f"🔍 搜索 {candidates} 组参数...")
+    start = time.perf_counter()
+    client_size = tuple(int(v) for v in args.client_size.lower().split('x')) if args.client_size else None
+    results = calibrate(args.paths, workers=args.workers, min_iou=args.iou, client_size=client_size)
+    print(f"✅ 完成，用时 {time.perf_counter() - start:.1f}秒")
+
+    print(f"\n📊 前 {args.top} 名:")
+    for r in results[:args.top]:
+        print(f"   精确率 {r['precision']:.3f} | 召回率 {r['recall']:.3f} | F1 {r['f1']:.3f} | "
+              f"{r['ms']:.3f} ms/帧 | {r['params']}")
+
+    if args.report:
+        write_report(args.report, results)
+        print(f"📄 报告已写入: {args.report}")
+
+    if results and not args.dry_run:
+        save_section(CONFIG_SECTION, results[0]['params'], args.config,
+                     comment="血条检测参数（calibrate_detector.py 自动生成）")
+        print(f"💾 最优参数已写入: {args.config} [{CONFIG_SECTION}]")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
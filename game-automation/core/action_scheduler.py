@@ -0,0 +1,353 @@
+"""
+动作调度 - 后台线程按截止时间执行定时输入程序，调用方拿到 Future 后可以继续截图和检测
+"""
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from utils.timer import JitterStats, sleep_margin, sleep_until
+
+
+class InputProgram:
+    """
+    一段定时输入
+
+    steps 为 [(相对开始的秒数, 操作, 参数), ...]，操作是输入后端的方法名
+    （move / button / post_button / key / char），另外两个操作由执行器处理：
+        save_cursor     记下当前鼠标位置
+        restore_cursor  移回记下的位置
+    duration 是整段程序占用输入设备的时间（最后一步之后可能还要停留一会儿）。
+    """
+
+    __slots__ = ('name', 'steps', 'duration')
+
+    def __init__(self, name='', steps=None, duration=0.0):
+        self.name = name
+        self.steps = list(steps or [])
+        self.duration = duration
+
+    def at(self, offset, action, *args):
+        """在 offset 秒时执行一个操作，返回自身方便连写"""
+        self.steps.append((offset, action, args))
+        self.duration = max(self.duration, offset)
+        return self
+
+    def then(self, delay, action, *args):
+        """在上一步（或当前结尾）之后 delay 秒执行一个操作"""
+        return self.at(self.duration + delay, action, *args)
+
+    def pause(self, delay):
+        """结尾再停留 delay 秒"""
+        self.duration += delay
+        return self
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __repr__(self):
+        return f"InputProgram({self.name!r}, {len(self.steps)} steps, {self.duration:.3f}s)"
+
+
+# ==================== 常用程序 ====================
+
+def click_program(x, y, button='left', hover=0.3, hold=0.1, after=0.15, restore_cursor=True,
+                  restore_delay=0.1):
+    """移动 -> 停留 hover -> 按下 hold -> 释放 -> 停留 after（-> restore_delay 后恢复鼠标位置）"""
+    program = InputProgram(f'click({x}, {y})')
+    if restore_cursor:
+        program.at(0.0, 'save_cursor')
+    program.at(0.0, 'move', x, y)
+    program.then(hover, 'button', button, True, x, y)
+    program.then(hold, 'button', button, False, x, y)
+    if restore_cursor:
+        program.then(after + restore_delay, 'restore_cursor')
+    else:
+        program.pause(after)
+    return program
+
+
+def double_click_program(x, y, hover=0.1, hold=0.05, gap=0.1, restore_cursor=True, restore_delay=0.1):
+    """双击：两次按下/释放之间隔 gap 秒"""
+    program = InputProgram(f'double_click({x}, {y})')
+    if restore_cursor:
+        program.at(0.0, 'save_cursor')
+    program.at(0.0, 'move', x, y)
+    program.then(hover, 'button', 'left', True, x, y)
+    program.then(hold, 'button', 'left', False, x, y)
+    program.then(gap, 'button', 'left', True, x, y)
+    program.then(hold, 'button', 'left', False, x, y)
+    if restore_cursor:
+        program.then(restore_delay, 'restore_cursor')
+    return program
+
+
+def drag_program(x0, y0, x1, y1, button='left', hover=0.05, hold=0.0, moves=1, move_interval=0.0,
+                 restore_cursor=True, restore_delay=0.05):
+    """
+    拖拽：移到起点 -> 停留 hover -> 按下 -> hold 后分 moves 步移到终点 -> 释放
+
+    hold 和 move_interval 都为 0 时，按下-移动-释放在同一时刻，SendInput 后端一次提交。
+    """
+    program = InputProgram(f'drag({x0}, {y0} -> {x1}, {y1})')
+    if restore_cursor:
+        program.at(0.0, 'save_cursor')
+    program.at(0.0, 'move', x0, y0)
+    program.then(hover, 'button', button, True, x0, y0)
+    for i in range(1, moves + 1):
+        x = x0 + (x1 - x0) * i // moves
+        y = y0 + (y1 - y0) * i // moves
+        program.then(hold if i == 1 else move_interval, 'move', x, y)
+    program.then(0.0, 'button', button, False, x1, y1)
+    if restore_cursor:
+        program.then(restore_delay, 'restore_cursor')
+    return program
+
+
+def key_program(vk, hold=0.05, after=0.05, sync=False):
+    """按下 -> hold 秒后释放 -> 停留 after"""
+    program = InputProgram(f'key({vk:#x})')
+    program.at(0.0, 'key', vk, True, sync)
+    program.then(hold, 'key', vk, False, sync)
+    return program.pause(after)
+
+
+def combo_program(vks, hold=0.05, gap=0.02):
+    """组合键：依次按下（间隔 gap），hold 秒后逆序释放；gap=0 时按下和释放各是一组"""
+    program = InputProgram('combo(' + '+'.join(f'{vk:#x}' for vk in vks) + ')')
+    for i, vk in enumerate(vks):
+        program.then(gap if i else 0.0, 'key', vk, True)
+    program.pause(gap + hold)
+    for i, vk in enumerate(reversed(vks)):
+        program.then(gap if i else 0.0, 'key', vk, False)
+    return program.pause(gap)
+
+
+def text_program(text, interval=0.02):
+    """逐个字符发送 WM_CHAR，每个字符之后停留 interval"""
+    program = InputProgram(f'text({text!r})')
+    for c in text:
+        program.at(program.duration, 'char', ord(c))
+        program.pause(interval)
+    return program
+
+
+# ==================== 执行 ====================
+
+# 移动真实鼠标的后端（uses_cursor）共用同一个鼠标：一段鼠标程序执行期间独占，
+# 多个窗口的控制器各自的调度线程不会把悬停和点击交错在一起
+_CURSOR_LOCK = threading.Lock()
+_CURSOR_ACTIONS = ('move', 'button', 'save_cursor', 'restore_cursor')
+
+
+def run_program(backend, program, clock=time.perf_counter, event=None):
+    """
+    在当前线程按截止时间执行输入程序
+
+    每一步的截止时间都相对程序开始时刻计算，前面某一步晚了不会把后面的步骤整体推迟；
+    offset 相同的步骤作为一组一起提交给后端。
+    执行中出错时会释放已经按下的键和鼠标按键再抛出异常；
+    出错或被中断时，程序要恢复鼠标位置且已经移动过鼠标的，也会把鼠标移回原位。
+
+    :param backend: InputBackend
+    :param clock: 返回当前秒数的函数
+    :param event: threading.Event，被设置时中断执行
+    :return: 每一步的延迟（实际执行时间 - 计划时间，秒）列表
+    """
+    if backend.uses_cursor and any(step[1] in _CURSOR_ACTIONS for step in program.steps):
+        with _CURSOR_LOCK:
+            return _run_steps(backend, program, clock, event)
+    return _run_steps(backend, program, clock, event)
+
+
+def _run_steps(backend, program, clock, event):
+    # 用精确 sleep 等每一步的截止时间：time.sleep 在 Windows 上可能多睡十几毫秒
+    start = clock()
+    saved_cursor = None
+    moved = False
+    restored = False
+    held = []
+    lateness = []
+    try:
+        # 同一时刻到期的操作一起交给后端，SendInputBackend 会合成一次系统调用
+        for offset, group in itertools.groupby(program.steps, key=lambda step: step[0]):
+            if sleep_until(start + offset, event, clock):
+                return lateness
+            late = clock() - start - offset
+
+            batch = []
+            for _, action, args in group:
+                lateness.append(late)
+                if action == 'save_cursor':
+                    saved_cursor = backend.get_cursor_pos()
+                elif action == 'restore_cursor':
+                    if saved_cursor is not None:
+                        batch.append(('move', tuple(saved_cursor)))
+                    restored = True
+                else:
+                    batch.append((action, args))
+                    if action == 'move':
+                        moved = True
+                    if action in ('button', 'post_button', 'key'):
+                        # 记下还没释放的按键，出错时释放
+                        key = (action, args[0])
+                        if args[1]:
+                            held.append((key, args))
+                        else:
+                            held = [item for item in held if item[0] != key]
+            backend.execute(batch)
+
+        sleep_until(start + program.duration, event, clock)
+    finally:
+        for (action, code), args in reversed(held):
+            try:
+                getattr(backend, action)(code, False, *args[2:])
+            except Exception:
+                pass
+        # 中途停止/取消/出错时跳过了恢复步骤，鼠标还停在目标上
+        if saved_cursor is not None and moved and not restored and backend.uses_cursor:
+            try:
+                backend.execute([('move', tuple(saved_cursor))])
+            except Exception:
+                pass
+    return lateness
+
+
+class ActionScheduler:
+    """
+    动作调度线程
+
+    输入程序按提交顺序逐个执行（同一时刻只有一段程序占用鼠标键盘），
+    submit 立即返回 Future，程序执行完成后 Future 的结果是各步骤的延迟列表。
+    """
+
+    def __init__(self, backend, clock=time.perf_counter):
+        """
+        :param backend: InputBackend
+        :param clock: 返回当前秒数的函数
+        """
+        self.backend = backend
+        self.clock = clock
+
+        self._queue = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._idle = threading.Condition()
+        self._pending = 0
+
+        # 统计
+        self.executed = 0
+        self.failed = 0
+        self.jitter = JitterStats()     # 每一步相对计划时间的延迟
+
+    def start(self):
+        """启动调度线程"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        sleep_margin()  # 提前测量粗睡眠提前量，不让第一个程序等测量
+        self._thread = threading.Thread(target=self._run, name="ActionScheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """
+        停止调度线程：正在执行的程序提前结束（已按下的键会释放），排队的程序全部取消
+        """
+        self._stop_event.set()
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.cancel_pending()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def submit(self, program):
+        """
+        排队执行一段输入程序
+
+        :param program: InputProgram
+        :return: concurrent.futures.Future
+        """
+        if self._thread is None:
+            raise RuntimeError("ActionScheduler is not running")
+        future = Future()
+        with self._idle:
+            self._pending += 1
+        self._queue.put((program, future))
+        return future
+
+    def cancel_pending(self):
+        """取消所有还没开始执行的程序，返回取消的数量"""
+        cancelled = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                continue
+            if item[1].cancel():
+                cancelled += 1
+            self._done()
+        return cancelled
+
+    def pending(self):
+        """排队中和正在执行的程序数"""
+        return self._pending
+
+    def wait_idle(self, timeout=None):
+        """等待所有已提交的程序执行完，返回是否在超时前完成"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _done(self):
+        with self._idle:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            item = self._queue.get()
+            if item is None:
+                continue
+            program, future = item
+            if not future.set_running_or_notify_cancel():
+                self._done()
+                continue
+
+            try:
+                lateness = run_program(self.backend, program, self.clock, self._stop_event)
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ 输入程序执行失败 {program}: {e}")
+                future.set_exception(e)
+            else:
+                self.executed += 1
+                for late in lateness:
+                    self.jitter.add(late)
+                future.set_result(lateness)
+            finally:
+                self._done()
+
+    def stats(self):
+        """返回统计信息"""
+        jitter = self.jitter.summary()
+        return {
+            'executed': self.executed,
+            'failed': self.failed,
+            'pending': self._pending,
+            'avg_lateness_ms': jitter['mean_ms'],
+            'p99_lateness_ms': jitter['p99_ms'],
+            'max_lateness_ms': jitter['max_ms'],
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
\ No newline at end of file
@@ -0,0 +1,434 @@
+"""
+截图会话 - 长期持有 DC/位图，避免每帧重复分配 GDI 资源
+"""
+import ctypes
+import numpy as np
+from collections import OrderedDict
+from typing import Tuple
+
+try:
+    import win32gui
+    import win32ui
+    import win32con
+    from ctypes import windll
+except ImportError:
+    # 非 Windows 平台（离线测试/回放）只能使用内存后端
+    win32gui = win32ui = win32con = windll = None
+
+
+class CaptureBackend:
+    """
+    截图后端接口
+
+    会话只通过这几个方法访问底层资源，方便替换成内存假后端做离线验证。
+    surface 是后端自定义的"画布"对象（Win32 下为兼容 DC + 位图）。
+    """
+
+    def get_client_size(self) -> Tuple[int, int]:
+        """返回当前客户区大小 (width, height)"""
+        raise NotImplementedError
+
+    def create_surface(self, width, height):
+        """创建指定大小的画布"""
+        raise NotImplementedError
+
+    def release_surface(self, surface):
+        """释放画布"""
+        raise NotImplementedError
+
+    def print_window(self, surface) -> bool:
+        """用 PrintWindow 把窗口内容画到画布上，返回是否成功"""
+        raise NotImplementedError
+
+    def bitblt(self, surface, src=(0, 0)) -> bool:
+        """用 BitBlt 把窗口内容拷贝到画布上，返回是否成功"""
+        raise NotImplementedError
+
+    def copy_surface(self, dst, src, src_pos=(0, 0)) -> bool:
+        """从另一块画布的 src_pos 处拷贝 dst 大小的区域"""
+        raise NotImplementedError
+
+    def read_bits(self, surface, buffer):
+        """把画布像素 (BGRX) 读入预分配的 numpy 缓冲区 (h, w, 4)"""
+        raise NotImplementedError
+
+    def close(self):
+        """释放后端持有的全部资源"""
+        pass
+
+
+class _GdiSurface:
+    """GDI 画布：兼容 DC + 兼容位图"""
+
+    def __init__(self, dc, bitmap, width, height):
+        self.dc = dc
+        self.bitmap = bitmap
+        self.width = width
+        self.height = height
+
+
+class Win32CaptureBackend(CaptureBackend):
+    """Win32 GDI 后端 - 窗口 DC 在整个会话期间只获取一次"""
+
+    def __init__(self, hwnd):
+        if win32gui is None:
+            raise RuntimeError("Win32CaptureBackend 需要 pywin32（仅支持 Windows）")
+        self.hwnd = hwnd
+        self._hwnd_dc = win32gui.GetWindowDC(hwnd)
+        self._mfc_dc = win32ui.CreateDCFromHandle(self._hwnd_dc)
+
+    def get_client_size(self):
+        client_rect = win32gui.GetClientRect(self.hwnd)
+        width, height = client_rect[2], client_rect[3]
+        if width <= 0 or height <= 0:
+            # 客户区无效时退回到窗口大小
+            rect = win32gui.GetWindowRect(self.hwnd)
+            width, height = rect[2] - rect[0], rect[3] - rect[1]
+        return width, height
+
+    def create_surface(self, width, height):
+        save_dc = self._mfc_dc.CreateCompatibleDC()
+        bitmap = win32ui.CreateBitmap()
+        bitmap.CreateCompatibleBitmap(self._mfc_dc, width, height)
+        save_dc.SelectObject(bitmap)
+        return _GdiSurface(save_dc, bitmap, width, height)
+
+    def release_surface(self, surface):
+        win32gui.DeleteObject(surface.bitmap.GetHandle())
+        surface.dc.DeleteDC()
+
+    def print_window(self, surface):
+        # 参数3:  0=默认, 1=PW_CLIENTONLY, 2=PW_RENDERFULLCONTENT, 3=两者结合
+        return windll.user32.PrintWindow(self.hwnd, surface.dc.GetSafeHdc(), 3) != 0
+
+    def bitblt(self, surface, src=(0, 0)):
+        surface.dc.BitBlt((0, 0), (surface.width, surface.height),
+                          self._mfc_dc, src, win32con.SRCCOPY)
+        return True
+
+    def copy_surface(self, dst, src, src_pos=(0, 0)):
+        dst.dc.BitBlt((0, 0), (dst.width, dst.height), src.dc, src_pos, win32con.SRCCOPY)
+        return True
+
+    def read_bits(self, surface, buffer):
+        # 直接写入预分配缓冲区，不产生中间 bytes 对象
+        windll.gdi32.GetBitmapBits(ctypes.c_void_p(surface.bitmap.GetHandle()),
+                                   buffer.nbytes,
+                                   buffer.ctypes.data_as(ctypes.c_void_p))
+
+    def close(self):
+        if self._mfc_dc is not None:
+            self._mfc_dc.DeleteDC()
+            win32gui.ReleaseDC(self.hwnd, self._hwnd_dc)
+            self._mfc_dc = None
+            self._hwnd_dc = None
+
+
+class MemoryCaptureBackend(CaptureBackend):
+    """
+    内存假后端 - 用 numpy 图像模拟窗口，统计画布分配次数
+
+    :param source: (h, w, 3) BGR / (h, w, 4) BGRX 数组，或返回这类数组的函数
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.surfaces_created = 0
+        self.surfaces_released = 0
+        self.print_window_calls = 0
+        self.bitblt_calls = 0
+
+    def _current_frame(self):
+        frame = self.source() if callable(self.source) else self.source
+        if frame.shape[2] == 3:
+            bgrx = np.zeros(frame.shape[:2] + (4,), dtype=np.uint8)
+            bgrx[:, :, :3] = frame
+            return bgrx
+        return frame
+
+    def get_client_size(self):
+        frame = self.source() if callable(self.source) else self.source
+        return frame.shape[1], frame.shape[0]
+
+    def create_surface(self, width, height):
+        self.surfaces_created += 1
+        return np.zeros((height, width, 4), dtype=np.uint8)
+
+    def release_surface(self, surface):
+        self.surfaces_released += 1
+
+    def _blit(self, surface, src):
+        frame = self._current_frame()
+        x, y = src
+        h, w = surface.shape[:2]
+        patch = frame[y:y + h, x:x + w]
+        surface[:patch.shape[0], :patch.shape[1]] = patch
+        return True
+
+    def print_window(self, surface):
+        self.print_window_calls += 1
+        return self._blit(surface, (0, 0))
+
+    def bitblt(self, surface, src=(0, 0)):
+        self.bitblt_calls += 1
+        return self._blit(surface, src)
+
+    def copy_surface(self, dst, src, src_pos=(0, 0)):
+        x, y = src_pos
+        h, w = dst.shape[:2]
+        dst[...] = src[y:y + h, x:x + w]
+        return True
+
+    def read_bits(self, surface, buffer):
+        buffer[...] = surface
+
+
+def is_black_frame(pixels, threshold=10, step=4):
+    """
+    判断画面是否全黑（隔 step 个像素抽样，避免整帧扫描）
+
+    :param pixels: (h, w, c) 数组或 PIL Image
+    :param threshold: 最大亮度低于该值视为全黑
+    """
+    arr = np.asarray(pixels)
+    sample = arr[::step, ::step]
+    if sample.ndim == 3 and sample.shape[2] == 4:
+        sample = sample[:, :, :3]  # 忽略 BGRX 的填充字节
+    return sample.size == 0 or sample.max() < threshold
+
+
+class CaptureMethodSelector:
+    """
+    自动截图方法选择器
+
+    只在首次或健康检查失败（连续 N 帧全黑 / 截图异常）时按顺序探测一次，
+    其余时间固定使用上次胜出的方法。
+    """
+
+    def __init__(self, methods=('printwindow', 'bitblt', 'screen'), max_black_frames=5):
+        """
+        :param methods: 探测顺序
+        :param max_black_frames: 连续多少帧全黑后重新探测
+        """
+        self.methods = list(methods)
+        self.max_black_frames = max_black_frames
+        self.current = None
+        self.black_streak = 0
+
+        # 统计
+        self.wins = {m: 0 for m in self.methods}     # 各方法在探测中胜出的次数
+        self.frames = {m: 0 for m in self.methods}   # 各方法实际截取的帧数
+        self.probe_count = 0
+
+    def needs_probe(self):
+        """是否需要重新探测"""
+        return self.current is None
+
+    def record_win(self, method):
+        """记录探测结果"""
+        self.current = method
+        self.black_streak = 0
+        self.wins[method] += 1
+        self.probe_count += 1
+
+    def report_frame(self, black):
+        """
+        报告一帧的健康状况
+
+        :param black: 该帧是否全黑；None 表示不参与健康检查（如 ROI 截图）
+        :return: 是否触发了重新探测
+        """
+        self.frames[self.current] += 1
+        if black is None:
+            return False
+        if not black:
+            self.black_streak = 0
+            return False
+
+        self.black_streak += 1
+        if self.black_streak >= self.max_black_frames:
+            self.invalidate()
+            return True
+        return False
+
+    def invalidate(self):
+        """放弃当前方法，下一帧重新探测"""
+        self.current = None
+        self.black_streak = 0
+
+    def stats(self):
+        """返回统计信息"""
+        return {
+            'current': self.current,
+            'probe_count': self.probe_count,
+            'wins': dict(self.wins),
+            'frames': dict(self.frames),
+        }
+
+
+def clip_region(region, width, height):
+    """
+    把截图区域裁剪到客户区范围内
+
+    :param region: (x, y, w, h)
+    :return: 与客户区的交集 (x, y, w, h)，宽或高可能为 0
+    """
+    x, y, w, h = region
+    x0 = min(max(0, x), width)
+    y0 = min(max(0, y), height)
+    x1 = max(x0, min(width, x + w))
+    y1 = max(y0, min(height, y + h))
+    return x0, y0, x1 - x0, y1 - y0
+
+
+class CaptureSession:
+    """
+    长期截图会话
+
+    画布和像素缓冲区只在客户区大小变化时重新分配，
+    稳定状态下每帧只有一次 PrintWindow/BitBlt 和一次像素读取。
+    ROI 截图使用按尺寸缓存的小画布，只读取区域内的像素。
+    """
+
+    def __init__(self, backend, max_region_surfaces=8):
+        """
+        :param backend: CaptureBackend 实例
+        :param max_region_surfaces: 最多缓存多少种尺寸的 ROI 画布
+        """
+        self.backend = backend
+        self.width = 0
+        self.height = 0
+        self.frame = None  # (h, w, 4) BGRX 缓冲区，每帧复用
+
+        self._surface = None
+
+        # ROI 画布缓存: (w, h, slot) -> (surface, buffer)，按最近使用排序
+        self.max_region_surfaces = max_region_surfaces
+        self._region_surfaces = OrderedDict()
+
+        # 统计
+        self.alloc_count = 0
+        self.frame_count = 0
+        self.region_count = 0
+
+    def ensure_surface(self):
+        """检查客户区大小，只有变化时才重新分配画布"""
+        width, height = self.backend.get_client_size()
+        if self._surface is not None and (width, height) == (self.width, self.height):
+            return False
+
+        if self._surface is not None:
+            self.backend.release_surface(self._surface)
+            self._surface = None
+
+        self._surface = self.backend.create_surface(width, height)
+        self.frame = np.empty((height, width, 4), dtype=np.uint8)
+        self.width = width
+        self.height = height
+        self.alloc_count += 1
+        return True
+
+    def _region_surface(self, width, height, slot=0):
+        """取出（或创建）指定尺寸的 ROI 画布，slot 区分同一次截图里的同尺寸区域"""
+        key = (width, height, slot)
+        entry = self._region_surfaces.get(key)
+        if entry is not None:
+            self._region_surfaces.move_to_end(key)
+            return entry
+
+        if len(self._region_surfaces) >= self.max_region_surfaces:
+            _, (old_surface, _) = self._region_surfaces.popitem(last=False)
+            self.backend.release_surface(old_surface)
+
+        entry = (self.backend.create_surface(width, height),
+                 np.empty((height, width, 4), dtype=np.uint8))
+        self._region_surfaces[key] = entry
+        self.alloc_count += 1
+        return entry
+
+    def _render(self, method):
+        """把整个窗口画到主画布上（不读取像素）"""
+        if method == 'printwindow':
+            ok = self.backend.print_window(self._surface)
+        elif method == 'bitblt':
+            ok = self.backend.bitblt(self._surface)
+        else:
+            raise ValueError(f"Unknown capture method: {method}")
+
+        if not ok:
+            print("⚠️ PrintWindow 返回失败" if method == 'printwindow' else "⚠️ BitBlt 返回失败")
+
+    def grab(self, method='printwindow', region=None):
+        """
+        截取一帧到复用缓冲区
+
+        :param method: 'printwindow' 或 'bitblt'
+        :param region: 截取区域 (x, y, w, h)，None 表示整个客户区
+        :return: (h, w, 4) BGRX 数组（下一次 grab 会覆盖其内容）
+        """
+        if region is not None:
+            return self.grab_regions(method, [region])[0]
+
+        self.ensure_surface()
+        self._render(method)
+        self.backend.read_bits(self._surface, self.frame)
+        self.frame_count += 1
+        return self.frame
+
+    def grab_regions(self, method, regions):
+        """
+        一次截图读取多个区域，只读取区域内的像素
+
+        BitBlt 直接从窗口 DC 拷贝各区域，不需要整窗画布；PrintWindow 只能整窗绘制，
+        所以先画到主画布一次，再从主画布拷贝各区域。
+
+        :param method: 'printwindow' 或 'bitblt'
+        :param regions: [(x, y, w, h), ...]，超出客户区的部分会被裁掉
+        :return: 与 regions 对应的 (h, w, 4) BGRX 数组列表（下一次截图会覆盖）
+        """
+        if method == 'printwindow':
+            self.ensure_surface()
+            self._render(method)
+            width, height = self.width, self.height
+        elif method == 'bitblt':
+            width, height = self.backend.get_client_size()
+        else:
+            raise ValueError(f"Unknown capture method: {method}")
+
+        results = []
+        slots = {}
+        for region in regions:
+            x, y, w, h = clip_region(region, width, height)
+            if w == 0 or h == 0:
+                results.append(np.empty((0, 0, 4), dtype=np.uint8))
+                continue
+
+            slot = slots.get((w, h), 0)
+            slots[(w, h)] = slot + 1
+            surface, buffer = self._region_surface(w, h, slot)
+            if method == 'printwindow':
+                self.backend.copy_surface(surface, self._surface, (x, y))
+            else:
+                self.backend.bitblt(surface, (x, y))
+            self.backend.read_bits(surface, buffer)
+            results.append(buffer)
+
+        self.frame_count += 1
+        self.region_count += len(regions)
+        return results
+
+    def close(self):
+        """释放画布和后端资源"""
+        if self._surface is not None:
+            self.backend.release_surface(self._surface)
+            self._surface = None
+        for surface, _ in self._region_surfaces.values():
+            self.backend.release_surface(surface)
+        self._region_surfaces.clear()
+        self.backend.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
\ No newline at end of file
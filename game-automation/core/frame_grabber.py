@@ -0,0 +1,251 @@
+"""
+后台截图线程 - 按目标帧率持续截图，写入预分配的环形缓冲区
+"""
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from utils.image_utils import bgrx_to_bgr
+from utils.timer import Ticker, precise_sleep
+
+
+class Frame:
+    """
+    一帧截图
+
+    image 指向环形缓冲区中的槽位，生产者转一圈后会覆盖它；
+    需要长期保存时请调用 copy()。
+    """
+
+    __slots__ = ('seq', 'timestamp', 'image', 'origin')
+
+    def __init__(self, seq, timestamp, image, origin=(0, 0)):
+        self.seq = seq                # 帧序号，从 1 开始递增
+        self.timestamp = timestamp    # time.monotonic() 时间戳
+        self.image = image            # (h, w, 3) BGR
+        self.origin = origin          # image 左上角的客户区坐标
+
+    def copy(self):
+        """拷贝一份不会被覆盖的帧"""
+        return Frame(self.seq, self.timestamp, self.image.copy(), self.origin)
+
+
+class FrameRing:
+    """固定大小的帧环形缓冲区，缓冲区只在帧尺寸变化时重新分配"""
+
+    def __init__(self, size=4):
+        if size < 2:
+            raise ValueError("ring size must be at least 2")
+        self.size = size
+        self.shape = None
+        self._buffers = []
+        self._index = 0
+
+    def allocate(self, shape):
+        """按帧尺寸分配全部槽位"""
+        self.shape = tuple(shape)
+        self._buffers = [np.empty(self.shape, dtype=np.uint8) for _ in range(self.size)]
+        self._index = 0
+
+    def next_slot(self):
+        """返回下一个可写槽位（最旧的那一帧）"""
+        buffer = self._buffers[self._index]
+        self._index = (self._index + 1) % self.size
+        return buffer
+
+
+class FrameGrabber:
+    """
+    后台截图线程
+
+    消费者通过 latest() 取最新帧，或通过 wait_newer_than(seq) 等待新帧，
+    截图不再阻塞检测和输入。
+    """
+
+    # 最多同时保留几种帧尺寸的环形缓冲区（整个检测区域、血条探针、掉落、背包……）
+    MAX_RINGS = 4
+
+    def __init__(self, capturer, fps=20.0, ring_size=4, region=None, recorder=None):
+        """
+        :param capturer: 提供 grab_frame(regions=...) 原始像素的截图器
+                         （ScreenCaptureAdvanced / ReplayCapture 等）
+        :param fps: 目标帧率（运行中可以直接修改，下一帧生效）
+        :param ring_size: 每种帧尺寸的环形缓冲区槽位数
+        :param region: 只截取该区域 (x, y, w, h)，None 表示整帧
+        :param recorder: 可选的 FrameRecorder，每帧同时写入录制文件
+        """
+        self.capturer = capturer
+        self.fps = fps
+        self.region = region
+        self.recorder = recorder
+        self.origin = tuple(region[:2]) if region is not None else (0, 0)
+
+        if ring_size < 2:
+            raise ValueError("ring size must be at least 2")
+        self.ring_size = ring_size
+        self._rings = OrderedDict()   # 帧尺寸 -> FrameRing，最近用过的在最后
+        self._cond = threading.Condition()
+        self._latest = None
+        self._seq = 0
+
+        self._thread = None
+        self._running = False
+        self._stop_event = threading.Event()
+        self._ticker = Ticker(0.0)
+
+        # 统计
+        self.error_count = 0
+        self.total_capture_time = 0.0
+        self.ring_allocs = 0
+
+    # ==================== 生产者 ====================
+
+    def start(self):
+        """启动截图线程"""
+        if self._running:
+            return
+        self._running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="FrameGrabber", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """停止截图线程"""
+        self._running = False
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def set_region(self, region):
+        """
+        切换截图区域（例如等待击杀时只截目标血条附近的小窗口）
+        切换前已开始的那一帧仍是旧区域，消费者请以 Frame.origin 为准
+        :param region: (x, y, w, h)，None 表示整帧
+        """
+        with self._cond:
+            self.region = region
+            # 区域超出客户区左/上边时截图会被裁掉，实际左上角不小于 0
+            self.origin = (max(0, region[0]), max(0, region[1])) if region is not None else (0, 0)
+
+    def _ring_for(self, shape):
+        """按帧尺寸取环形缓冲区；每种尺寸各一个，来回切换截图区域时不重新分配"""
+        ring = self._rings.get(shape)
+        if ring is not None:
+            self._rings.move_to_end(shape)
+            return ring
+        if len(self._rings) >= self.MAX_RINGS:
+            self._rings.popitem(last=False)
+        ring = FrameRing(self.ring_size)
+        ring.allocate(shape)
+        self._rings[shape] = ring
+        self.ring_allocs += 1
+        return ring
+
+    def _capture_into_slot(self, region):
+        """
+        截一帧写入对应尺寸的下一个槽位
+        先取原始像素（BGRX 或 BGR，尺寸是裁剪到客户区后的实际尺寸），再转换进槽位
+        """
+        if region is None:
+            raw = self.capturer.grab_frame()
+        else:
+            raw = self.capturer.grab_frame(regions=[region])[0]
+        slot = self._ring_for(raw.shape[:2] + (3,)).next_slot()
+        return bgrx_to_bgr(raw, slot)
+
+    def _run(self):
+        # 按截止时间排程（帧间隔不随截图耗时漂移），落后太多时不追帧
+        ticker = self._ticker
+        ticker.period = 1.0 / self.fps if self.fps > 0 else 0.0
+        ticker.reset()
+
+        while self._running:
+            period = 1.0 / self.fps if self.fps > 0 else 0.0
+            with self._cond:
+                region, origin = self.region, self.origin
+
+            start = time.monotonic()
+            try:
+                image = self._capture_into_slot(region)
+            except Exception as e:
+                self.error_count += 1
+                print(f"❌ 后台截图失败: {e}")
+                precise_sleep(max(period, 0.1), self._stop_event)
+                ticker.reset()
+                continue
+
+            timestamp = time.monotonic()
+            self.total_capture_time += timestamp - start
+
+            with self._cond:
+                self._seq += 1
+                frame = Frame(self._seq, timestamp, image, origin)
+                self._latest = frame
+                self._cond.notify_all()
+
+            # 只录制和录制文件同尺寸的帧（临时切换区域时截到的小窗口不录）
+            if self.recorder is not None and self.recorder.shape in (None, image.shape):
+                try:
+                    self.recorder.write_frame(frame)
+                except Exception as e:
+                    print(f"❌ 录制失败，停止录制: {e}")
+                    self.recorder = None
+
+            # fps 修改从下一帧生效；fps 为 0 时不限速
+            ticker.period = period
+            if period > 0:
+                ticker.wait(self._stop_event)
+            else:
+                ticker.reset()
+
+    # ==================== 消费者 ====================
+
+    @property
+    def seq(self):
+        """最新帧序号（还没有帧时为 0）"""
+        return self._seq
+
+    def latest(self):
+        """返回最新一帧，还没有帧时返回 None"""
+        with self._cond:
+            return self._latest
+
+    def wait_newer_than(self, seq, timeout=None):
+        """
+        等待序号大于 seq 的帧
+
+        :param seq: 已处理过的帧序号（传 0 表示任意帧）
+        :param timeout: 最长等待时间（秒），None 表示一直等
+        :return: 新帧；超时或线程已停止时返回 None
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq or not self._running, timeout)
+            if self._seq > seq:
+                return self._latest
+            return None
+
+    def is_fresh(self, frame):
+        """帧所在槽位是否还没被生产者覆盖"""
+        return frame is not None and self._seq - frame.seq < self.ring_size - 1
+
+    def stats(self):
+        """返回统计信息"""
+        frames = self._seq
+        return {
+            'frames': frames,
+            'errors': self.error_count,
+            'avg_capture_ms': self.total_capture_time / frames * 1000 if frames else 0.0,
+            'ring_allocs': self.ring_allocs,
+            'missed_ticks': self._ticker.missed,
+            'tick_jitter_ms': self._ticker.stats.summary(),
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
\ No newline at end of file
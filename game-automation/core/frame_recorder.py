@@ -0,0 +1,166 @@
+"""
+截图录制 - 把截图帧按块写入可内存映射的文件，用于离线回放和基准测试
+
+文件格式（小端）:
+    64 字节文件头: magic(8) version(u4) height(u4) width(u4) channels(u4) frame_count(u8)
+    之后是定长记录: seq(u8) timestamp(f8) origin(i4 x2) image(u1, h*w*c)
+定长记录可以直接用 np.memmap 映射成 (N, h, w, c) 的数组。
+"""
+import os
+import struct
+import time
+import numpy as np
+
+MAGIC = b'GAFRAMES'
+VERSION = 1
+HEADER_SIZE = 64
+_HEADER_FORMAT = '<8sIIIIQ'
+
+
+def frame_record_dtype(height, width, channels):
+    """单帧记录的结构化 dtype"""
+    return np.dtype([
+        ('seq', '<u8'),
+        ('timestamp', '<f8'),
+        ('origin', '<i4', (2,)),
+        ('image', 'u1', (height, width, channels)),
+    ])
+
+
+class FrameRecorder:
+    """
+    截图录制器
+
+    帧先写入预分配的块缓冲区，攒满 chunk_frames 帧再一次性写盘，
+    录制线程里每帧只有一次内存拷贝。
+    """
+
+    def __init__(self, path, chunk_frames=32):
+        """
+        :param path: 输出文件路径（建议扩展名 .frames）
+        :param chunk_frames: 每块帧数
+        """
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.frame_count = 0
+        self.shape = None
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._file = open(path, 'wb')
+        self._file.write(b'\0' * HEADER_SIZE)
+        self._chunk = None
+        self._pending = 0
+
+    def _write_header(self):
+        height, width, channels = self.shape if self.shape else (0, 0, 0)
+        header = struct.pack(_HEADER_FORMAT, MAGIC, VERSION, height, width, channels,
+                             self.frame_count)
+        self._file.seek(0)
+        self._file.write(header.ljust(HEADER_SIZE, b'\0'))
+        self._file.seek(0, os.SEEK_END)
+
+    def write(self, image, timestamp=None, origin=(0, 0), seq=None):
+        """
+        写入一帧
+
+        :param image: (h, w, c) uint8 图像，同一文件内尺寸必须一致
+        :param timestamp: time.monotonic() 时间戳，None 表示当前时间
+        :param origin: 图像左上角的客户区坐标
+        :param seq: 帧序号，None 表示按写入顺序编号
+        """
+        if image.ndim == 2:
+            image = image[:, :, np.newaxis]
+
+        if self.shape is None:
+            self.shape = tuple(image.shape)
+            self._chunk = np.zeros(self.chunk_frames, dtype=frame_record_dtype(*self.shape))
+            self._write_header()
+        elif tuple(image.shape) != self.shape:
+            raise ValueError(f"frame shape {image.shape} does not match recording {self.shape}")
+
+        record = self._chunk[self._pending]
+        record['seq'] = self.frame_count + 1 if seq is None else seq
+        record['timestamp'] = time.monotonic() if timestamp is None else timestamp
+        record['origin'] = origin
+        record['image'] = image
+
+        self._pending += 1
+        self.frame_count += 1
+        if self._pending == self.chunk_frames:
+            self.flush()
+
+    def write_frame(self, frame):
+        """写入 FrameGrabber 产出的 Frame"""
+        self.write(frame.image, frame.timestamp, frame.origin, frame.seq)
+
+    def flush(self):
+        """把块缓冲区写盘"""
+        if self._pending:
+            self._file.write(memoryview(self._chunk[:self._pending]).cast('B'))
+            self._pending = 0
+        self._write_header()
+        self._file.flush()
+
+    def close(self):
+        """写完剩余帧并更新文件头"""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        print(f"✅ 录制完成: {self.path} ({self.frame_count} 帧)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FrameFile:
+    """
+    录制文件读取器 - 内存映射，不把整个文件读进内存
+
+    images/timestamps/origins 都是 memmap 视图，支持切片和批量处理。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+
+        magic, version, height, width, channels, frame_count = struct.unpack_from(
+            _HEADER_FORMAT, header)
+        if magic != MAGIC:
+            raise ValueError(f"not a frame recording: {path}")
+        if version != VERSION:
+            raise ValueError(f"unsupported recording version: {version}")
+
+        self.shape = (height, width, channels)
+        dtype = frame_record_dtype(height, width, channels)
+
+        # 录制中断时文件头里的帧数可能和实际不符，以文件里完整的记录数为准
+        available = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+        if available != frame_count:
+            print(f"⚠️ 文件头帧数 {frame_count} 与实际 {available} 不符，按实际读取")
+        self.frame_count = available
+
+        if self.frame_count:
+            self.records = np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE,
+                                     shape=(self.frame_count,))
+        else:
+            self.records = np.zeros(0, dtype=dtype)
+
+        self.images = self.records['image']
+        self.timestamps = self.records['timestamp']
+        self.origins = self.records['origin']
+        self.seqs = self.records['seq']
+
+    def __len__(self):
+        return self.frame_count
+
+    def __getitem__(self, index):
+        return self.images[index]
\ No newline at end of file
@@ -0,0 +1,252 @@
+"""
+悬停时间标定 - click_input 每次点击前固定悬停 0.3 秒等游戏识别，是单次点击最大的开销。
+从长到短尝试悬停时间，用选中目标后画面小区域（目标头像/名字框）的变化确认点击生效；
+学到的最短悬停时间按 窗口 + 游戏配置 保存到 config.yaml，之后自动使用并定期复核
+"""
+import time
+import cv2
+import numpy as np
+from core.action_scheduler import click_program
+from utils.config_loader import DEFAULT_CONFIG_PATH, load_config, save_section
+from utils.timer import precise_sleep
+
+CONFIG_SECTION = 'hover_calibration'
+
+# 从长到短尝试的悬停时间（秒）
+DEFAULT_CANDIDATES = (0.3, 0.2, 0.15, 0.1, 0.07, 0.05, 0.03, 0.02, 0.0)
+
+
+def profile_key(window_title, client_size, profile=None):
+    """标定结果的键：窗口标题 + 客户区尺寸（+ 游戏配置名）"""
+    key = f"{window_title} {client_size[0]}x{client_size[1]}"
+    return f"{key} {profile}" if profile else key
+
+
+def changed_fraction(before, after, pixel_threshold=30):
+    """两张同尺寸截图中，任一通道变化超过 pixel_threshold 的像素比例"""
+    diff = cv2.absdiff(before, after)
+    if diff.ndim == 3:
+        diff = diff.max(axis=2)
+    return float(np.count_nonzero(diff > pixel_threshold)) / diff.size
+
+
+class HoverCalibrator:
+    """
+    悬停时间标定器
+
+    每次尝试：按取消选中键 -> 截 selection_roi 作为基准 -> 以给定悬停时间点击目标
+    -> confirm_timeout 内反复截图，ROI 里足够多的像素变了就认为目标被选中。
+    标定结果写入 input_ctrl.hover_time，click_input 不传 hover_time 时自动使用。
+    某个目标上最长的候选也选不中只算这个目标没有结果（目标可能刚好走开/死亡），
+    连续 max_failed_targets 个目标都失败才放弃本次运行的标定；复核同理，
+    连续 max_failed_checks 次没选中才把悬停时间调长。
+    """
+
+    def __init__(self, input_ctrl, capture, selection_roi, key, config_path=DEFAULT_CONFIG_PATH,
+                 candidates=DEFAULT_CANDIDATES, trials=3, safety=1.25, deselect_key=0x1B, settle=0.1,
+                 min_changed=0.05, pixel_threshold=30, confirm_timeout=0.5, poll_interval=0.03,
+                 revalidate_clicks=200, revalidate_seconds=1800.0, max_failed_targets=3, max_failed_checks=2,
+                 clock=time.time):
+        """
+        :param input_ctrl: InputController
+        :param capture: capture(region) -> BGR 图像，region 为客户区坐标；返回 None 表示没截到
+        :param selection_roi: 选中目标时会变化的区域 (x, y, w, h)，客户区坐标
+        :param key: 保存结果用的键，见 profile_key
+        :param config_path: 保存结果的配置文件，None 表示不保存
+        :param candidates: 从长到短尝试的悬停时间（秒）
+        :param trials: 每个悬停时间要连续成功几次才算通过
+        :param safety: 最短通过时间乘上的安全系数（不超过最长的候选）
+        :param deselect_key: 每次尝试前取消选中的按键（虚拟键码，默认 Esc），None 表示不按键
+        :param settle: 取消选中后等多久再截基准图（秒）
+        :param min_changed: ROI 中变化像素的比例达到多少算选中
+        :param pixel_threshold: 单个像素变化多少算变了（0~255）
+        :param confirm_timeout: 点击后最多等多久确认（秒）
+        :param poll_interval: 确认期间的截图间隔（秒）
+        :param revalidate_clicks: 点击多少次后复核一次
+        :param revalidate_seconds: 距上次确认多少秒后复核一次
+        :param max_failed_targets: 连续多少个目标标定失败后放弃标定
+        :param max_failed_checks: 连续多少次复核没选中才改用更长的候选
+        :param clock: 返回当前时间（秒）的函数；确认时间会保存到文件，默认 time.time
+        """
+        self.input = input_ctrl
+        self.capture = capture
+        self.selection_roi = tuple(selection_roi)
+        self.key = key
+        self.config_path = config_path
+        self.candidates = sorted(candidates, reverse=True)
+        self.trials = trials
+        self.safety = safety
+        self.deselect_key = deselect_key
+        self.settle = settle
+        self.min_changed = min_changed
+        self.pixel_threshold = pixel_threshold
+        self.confirm_timeout = confirm_timeout
+        self.poll_interval = poll_interval
+        self.revalidate_clicks = revalidate_clicks
+        self.revalidate_seconds = revalidate_seconds
+        self.max_failed_targets = max_failed_targets
+        self.max_failed_checks = max_failed_checks
+        self.clock = clock
+
+        self.hover_time = None      # 标定出的悬停时间，None 表示还没有结果
+        self.validated_at = 0.0     # 上次确认有效的时间（clock()）
+        self.clicks = 0             # 上次确认后的点击次数
+        self.failed_targets = 0     # 连续标定失败的目标数
+        self.failed_checks = 0      # 当前悬停时间连续复核失败的次数
+        self.gave_up = False        # 连续多个目标标定失败，本次运行不再标定
+
+        # 统计
+        self.attempts = 0
+
+    def _apply(self, hover_time, validated_at):
+        self.hover_time = hover_time
+        self.validated_at = validated_at
+        self.clicks = 0
+        self.input.hover_time = hover_time
+
+    # ==================== 保存 ====================
+
+    def load(self):
+        """
+        读取保存的标定结果并应用到 input_ctrl
+        :return: 悬停时间（秒），没有结果时返回 None
+        """
+        if self.config_path is None:
+            return None
+        entry = (load_config(self.config_path).get(CONFIG_SECTION) or {}).get(self.key)
+        if not entry:
+            return None
+        self._apply(float(entry['hover_time']), float(entry.get('validated', 0.0)))
+        return self.hover_time
+
+    def save(self):
+        """把当前结果写入配置文件的 hover_calibration 段（其他窗口的结果保留）"""
+        if self.config_path is None or self.hover_time is None:
+            return
+        section = dict(load_config(self.config_path).get(CONFIG_SECTION) or {})
+        section[self.key] = {'hover_time': round(float(self.hover_time), 4),
+                             'validated': round(float(self.validated_at), 1)}
+        save_section(CONFIG_SECTION, section, self.config_path,
+                     comment='click_input 悬停时间标定结果（窗口 -> 悬停秒数、上次确认时间），自动生成')
+
+    # ==================== 标定 ====================
+
+    def try_click(self, x, y, hover_time):
+        """
+        以 hover_time 点击一次目标
+        :param x, y: 目标的屏幕坐标
+        :return: 目标是否被选中
+        """
+        self.attempts += 1
+        if self.deselect_key is not None:
+            self.input.send_key(self.deselect_key)
+        precise_sleep(self.settle)
+        before = self.capture(self.selection_roi)
+        if before is None:
+            return False
+
+        # 按下时长与 click_input 默认值一致；释放后不用停留，下面直接截图确认
+        self.input.run(click_program(x, y, hover=hover_time, hold=0.1, after=0.0,
+                                     restore_cursor=self.input.backend.uses_cursor, restore_delay=0.0))
+
+        deadline = time.perf_counter() + self.confirm_timeout
+        while True:
+            after = self.capture(self.selection_roi)
+            if after is not None and after.shape == before.shape and \
+                    changed_fraction(before, after, self.pixel_threshold) >= self.min_changed:
+                return True
+            if time.perf_counter() >= deadline:
+                return False
+            precise_sleep(self.poll_interval)
+
+    def calibrate(self, x, y):
+        """
+        从长到短尝试 candidates，找出连续 trials 次都能选中目标的最短悬停时间
+        :param x, y: 目标的屏幕坐标
+        :return: 标定出的悬停时间（秒）；最长的候选也选不中时返回 None（保持原悬停时间，
+                 下一个目标再标定；连续 max_failed_targets 个目标失败后不再标定）
+        """
+        passed = None
+        for hover_time in self.candidates:
+            if not all(self.try_click(x, y, hover_time) for _ in range(self.trials)):
+                break
+            passed = hover_time
+
+        if passed is None:
+            self.failed_targets += 1
+            if self.failed_targets >= self.max_failed_targets:
+                self.gave_up = True
+                print(f"❌ 连续 {self.failed_targets} 个目标悬停 {self.candidates[0]:.2f} 秒也没有选中，"
+                      f"不再标定，保持 {self.input.hover_time:.2f} 秒")
+            else:
+                print(f"⚠️ 悬停 {self.candidates[0]:.2f} 秒也没有选中这个目标，下一个目标再标定")
+            return None
+
+        self.failed_targets = 0
+        hover_time = min(passed * self.safety, self.candidates[0])
+        self._apply(hover_time, self.clock())
+        self.save()
+        print(f"✅ 悬停时间标定为 {hover_time * 1000:.0f} ms（最短通过 {passed * 1000:.0f} ms）")
+        return hover_time
+
+    # ==================== 复核 ====================
+
+    def needs_validation(self):
+        """点击次数或距上次确认的时间到了，需要复核"""
+        if self.hover_time is None:
+            return False
+        return self.clicks >= self.revalidate_clicks or \
+            self.clock() - self.validated_at >= self.revalidate_seconds
+
+    def validate(self, x, y):
+        """
+        用当前悬停时间点一次目标，确认仍然有效（游戏卡顿、换了画质都可能需要更长的悬停）
+        单次失败可能只是目标死亡/走开，下一次点击再复核；连续 max_failed_checks 次失败
+        才改用下一个更长的候选。已经是最长的候选时保持不变，等下一个复核周期
+        :param x, y: 目标的屏幕坐标
+        :return: 目标是否被选中
+        """
+        if self.try_click(x, y, self.hover_time):
+            self.failed_checks = 0
+            self._apply(self.hover_time, self.clock())
+            self.save()
+            return True
+
+        self.failed_checks += 1
+        if self.failed_checks < self.max_failed_checks:
+            print(f"⚠️ 悬停 {self.hover_time * 1000:.0f} ms 没有选中目标，下一次点击再复核")
+            return False
+
+        self.failed_checks = 0
+        longer = [c for c in self.candidates if c > self.hover_time]
+        if not longer:
+            # 最长的候选也选不中，多半是目标的问题：保持不变，不要每次点击都复核
+            print(f"⚠️ 悬停 {self.hover_time * 1000:.0f} ms（最长）连续 {self.max_failed_checks} 次没有选中目标，"
+                  f"保持不变")
+            self._apply(self.hover_time, self.clock())
+            return False
+
+        hover_time = min(longer)
+        print(f"⚠️ 悬停 {self.hover_time * 1000:.0f} ms 连续 {self.max_failed_checks} 次没有选中目标，"
+              f"改为 {hover_time * 1000:.0f} ms")
+        # 调长后下一次点击立即复核新的悬停时间
+        self._apply(hover_time, self.validated_at)
+        self.clicks = self.revalidate_clicks
+        self.save()
+        return False
+
+    def maintain(self, x, y):
+        """
+        每次点击目标前调用：还没有结果时标定，到期时复核，否则只计数
+        :param x, y: 目标的屏幕坐标
+        :return: 标定/复核时是否已经选中了目标（True 时调用方不用再点击）
+        """
+        if self.hover_time is None:
+            if self.gave_up or self.calibrate(x, y) is None:
+                return False
+            # 标定最后一轮没有选中，用标定结果点一次，顺便确认
+            return self.validate(x, y)
+        if self.needs_validation():
+            return self.validate(x, y)
+        self.clicks += 1
+        return False
\ No newline at end of file
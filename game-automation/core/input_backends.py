@@ -0,0 +1,414 @@
+"""
+输入后端 - 输入程序只通过这几个基本操作访问系统输入，方便替换成记录假后端做离线验证
+"""
+import ctypes
+import time
+from typing import Tuple
+
+try:
+    import win32api
+    import win32con
+    import win32gui
+    from ctypes import windll
+except ImportError:
+    # 非 Windows 平台（离线测试）只能使用记录后端
+    win32api = win32con = win32gui = windll = None
+
+
+class InputBackend:
+    """
+    输入后端接口
+
+    每个方法都是一次立即完成的系统调用，不包含任何等待；
+    按下与释放之间隔多久由输入程序（core.action_scheduler.InputProgram）决定。
+    uses_cursor 为 True 的后端移动真实鼠标，同一时刻只能有一个程序使用（见 run_program）。
+    """
+
+    uses_cursor = False
+
+    def get_cursor_pos(self) -> Tuple[int, int]:
+        """返回当前鼠标屏幕坐标"""
+        raise NotImplementedError
+
+    def move(self, x, y):
+        """把鼠标移到屏幕坐标 (x, y)"""
+        raise NotImplementedError
+
+    def button(self, button, down, x=0, y=0):
+        """
+        鼠标按键
+
+        :param button: 'left' 或 'right'
+        :param down: True 按下，False 释放
+        """
+        raise NotImplementedError
+
+    def post_button(self, button, down, x, y):
+        """
+        向窗口投递客户区坐标的鼠标按键消息（不移动真实鼠标）
+
+        :param x, y: 客户区坐标
+        """
+        raise NotImplementedError
+
+    def key(self, vk, down, sync=False):
+        """
+        键盘按键
+
+        :param vk: 虚拟键码
+        :param down: True 按下，False 释放
+        :param sync: True 时等窗口处理完再返回（SendMessage）
+        """
+        raise NotImplementedError
+
+    def char(self, code):
+        """发送一个字符（WM_CHAR）"""
+        raise NotImplementedError
+
+    def execute(self, steps):
+        """
+        执行同一时刻到期的一组操作
+
+        :param steps: [(操作名, 参数元组), ...]
+        默认逐个调用；能把多个操作合成一次系统调用的后端（SendInputBackend）重写这个方法。
+        """
+        for action, args in steps:
+            getattr(self, action)(*args)
+
+    def close(self):
+        """释放后端持有的全部资源"""
+        pass
+
+
+class Win32InputBackend(InputBackend):
+    """Win32 后端 - 鼠标用 SetCursorPos + mouse_event，键盘向窗口投递消息"""
+
+    uses_cursor = True
+
+    _BUTTON_FLAGS = {
+        'left': (0x0002, 0x0004),   # MOUSEEVENTF_LEFTDOWN / LEFTUP
+        'right': (0x0008, 0x0010),  # MOUSEEVENTF_RIGHTDOWN / RIGHTUP
+    }
+
+    def __init__(self, hwnd):
+        if win32api is None:
+            raise RuntimeError("Win32InputBackend 需要 pywin32（仅支持 Windows）")
+        self.hwnd = hwnd
+
+    def get_cursor_pos(self):
+        return win32api.GetCursorPos()
+
+    def move(self, x, y):
+        win32api.SetCursorPos((x, y))
+
+    def button(self, button, down, x=0, y=0):
+        flag = self._BUTTON_FLAGS[button][0 if down else 1]
+        win32api.mouse_event(flag, x, y, 0, 0)
+
+    def post_button(self, button, down, x, y):
+        if button == 'left':
+            message = win32con.WM_LBUTTONDOWN if down else win32con.WM_LBUTTONUP
+            wparam = win32con.MK_LBUTTON if down else 0
+        else:
+            message = win32con.WM_RBUTTONDOWN if down else win32con.WM_RBUTTONUP
+            wparam = win32con.MK_RBUTTON if down else 0
+        win32api.PostMessage(self.hwnd, message, wparam, win32api.MAKELONG(x, y))
+
+    def key(self, vk, down, sync=False):
+        message = win32con.WM_KEYDOWN if down else win32con.WM_KEYUP
+        if sync:
+            win32gui.SendMessage(self.hwnd, message, vk, 0)
+        else:
+            win32api.PostMessage(self.hwnd, message, vk, 0)
+
+    def char(self, code):
+        win32api.PostMessage(self.hwnd, win32con.WM_CHAR, code, 0)
+
+
+# ==================== SendInput ====================
+
+INPUT_MOUSE = 0
+INPUT_KEYBOARD = 1
+
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_RIGHTDOWN = 0x0008
+MOUSEEVENTF_RIGHTUP = 0x0010
+MOUSEEVENTF_VIRTUALDESK = 0x4000
+MOUSEEVENTF_ABSOLUTE = 0x8000
+
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+
+
+# 字段宽度按 Win32 定义写死（LONG/DWORD 32 位，ULONG_PTR 指针宽度），在 Linux 上布局也一致
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [('dx', ctypes.c_int32), ('dy', ctypes.c_int32), ('mouseData', ctypes.c_uint32),
+                ('dwFlags', ctypes.c_uint32), ('time', ctypes.c_uint32),
+                ('dwExtraInfo', ctypes.c_size_t)]
+
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [('wVk', ctypes.c_uint16), ('wScan', ctypes.c_uint16), ('dwFlags', ctypes.c_uint32),
+                ('time', ctypes.c_uint32), ('dwExtraInfo', ctypes.c_size_t)]
+
+
+class _INPUT_UNION(ctypes.Union):
+    _fields_ = [('mi', MOUSEINPUT), ('ki', KEYBDINPUT)]
+
+
+class INPUT(ctypes.Structure):
+    _fields_ = [('type', ctypes.c_uint32), ('u', _INPUT_UNION)]
+
+
+def compile_inputs(steps, screen_size):
+    """
+    把一组操作编译成 SendInput 事件
+
+    :param steps: [(操作名, 参数元组), ...]，操作为 move / button / key / char
+    :param screen_size: 虚拟桌面 (left, top, width, height)，用于把坐标换算成 0~65535 的绝对坐标
+    :return: [(INPUT_MOUSE, dx, dy, flags) 或 (INPUT_KEYBOARD, vk, scan, flags), ...]
+    """
+    left, top, width, height = screen_size
+    events = []
+    for action, args in steps:
+        if action == 'move':
+            x, y = args[:2]
+            dx = round((x - left) * 65535 / max(1, width - 1))
+            dy = round((y - top) * 65535 / max(1, height - 1))
+            events.append((INPUT_MOUSE, dx, dy,
+                           MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_VIRTUALDESK))
+        elif action == 'button':
+            button, down = args[:2]
+            flag = {('left', True): MOUSEEVENTF_LEFTDOWN, ('left', False): MOUSEEVENTF_LEFTUP,
+                    ('right', True): MOUSEEVENTF_RIGHTDOWN, ('right', False): MOUSEEVENTF_RIGHTUP}
+            events.append((INPUT_MOUSE, 0, 0, flag[(button, bool(down))]))
+        elif action == 'key':
+            vk, down = args[:2]
+            events.append((INPUT_KEYBOARD, vk, 0, 0 if down else KEYEVENTF_KEYUP))
+        elif action == 'char':
+            # Unicode 字符用一对按下/释放，wScan 为字符编码
+            events.append((INPUT_KEYBOARD, 0, args[0], KEYEVENTF_UNICODE))
+            events.append((INPUT_KEYBOARD, 0, args[0], KEYEVENTF_UNICODE | KEYEVENTF_KEYUP))
+        else:
+            raise ValueError(f"SendInput cannot compile action: {action}")
+    return events
+
+
+def build_input_array(events):
+    """compile_inputs 的结果 -> ctypes INPUT 数组"""
+    array = (INPUT * len(events))()
+    for item, (kind, a, b, flags) in zip(array, events):
+        item.type = kind
+        if kind == INPUT_MOUSE:
+            item.u.mi.dx, item.u.mi.dy, item.u.mi.dwFlags = a, b, flags
+        else:
+            item.u.ki.wVk, item.u.ki.wScan, item.u.ki.dwFlags = a, b, flags
+    return array
+
+
+def send_input(events):
+    """一次 SendInput 提交全部事件，返回系统实际插入的事件数"""
+    array = build_input_array(events)
+    return windll.user32.SendInput(len(array), array, ctypes.sizeof(INPUT))
+
+
+class SendInputBackend(InputBackend):
+    """
+    SendInput 后端 - 同一时刻到期的操作编译成一个 INPUT[] 数组，一次系统调用提交
+
+    单击（hold=0）、组合键的按下/释放、拖拽的按下-移动-释放都能合成一次调用，
+    SendInput 插入的事件序列不会被其他输入打断；只有程序里需要停顿（悬停、按住）的地方才分成多次。
+    注意 SendInput 的键盘事件发给前台窗口，不像 PostMessage 那样指定窗口。
+    客户区消息（post_button）仍然直接投递给窗口。
+    """
+
+    uses_cursor = True
+
+    SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN, SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN = 76, 77, 78, 79
+
+    def __init__(self, hwnd, screen_size=None, send=None):
+        """
+        :param hwnd: 目标窗口句柄（post_button 使用）
+        :param screen_size: 虚拟桌面 (left, top, width, height)，None 表示向系统查询
+        :param send: send(events) 提交函数，None 表示 send_input；离线测试可以传入记录函数
+        """
+        if send is None and windll is None:
+            raise RuntimeError("SendInputBackend 需要 Windows（离线测试请传入 send）")
+        self.hwnd = hwnd
+        self._send = send or send_input
+        if screen_size is None:
+            metrics = windll.user32.GetSystemMetrics
+            screen_size = (metrics(self.SM_XVIRTUALSCREEN), metrics(self.SM_YVIRTUALSCREEN),
+                           metrics(self.SM_CXVIRTUALSCREEN), metrics(self.SM_CYVIRTUALSCREEN))
+        self.screen_size = tuple(screen_size)
+        self._cursor = (0, 0)
+        self.calls = 0
+
+    def get_cursor_pos(self):
+        return win32api.GetCursorPos() if win32api is not None else self._cursor
+
+    def execute(self, steps):
+        batch = []
+        for action, args in steps:
+            if action == 'post_button':
+                self._flush(batch)
+                batch = []
+                self.post_button(*args)
+            else:
+                batch.append((action, args))
+        self._flush(batch)
+
+    def _flush(self, steps):
+        if not steps:
+            return
+        for action, args in steps:
+            if action == 'move':
+                self._cursor = tuple(args[:2])
+        self.calls += 1
+        self._send(compile_inputs(steps, self.screen_size))
+
+    def move(self, x, y):
+        self.execute([('move', (x, y))])
+
+    def button(self, button, down, x=0, y=0):
+        self.execute([('button', (button, down))])
+
+    def post_button(self, button, down, x, y):
+        Win32InputBackend.post_button(self, button, down, x, y)
+
+    def key(self, vk, down, sync=False):
+        self.execute([('key', (vk, down))])
+
+    def char(self, code):
+        self.execute([('char', (code,))])
+
+
+# ==================== PostMessage ====================
+
+WM_KEYDOWN = 0x0100
+WM_KEYUP = 0x0101
+WM_CHAR = 0x0102
+WM_MOUSEMOVE = 0x0200
+WM_LBUTTONDOWN = 0x0201
+WM_LBUTTONUP = 0x0202
+WM_RBUTTONDOWN = 0x0204
+WM_RBUTTONUP = 0x0205
+MK_LBUTTON = 0x0001
+MK_RBUTTON = 0x0002
+
+_BUTTON_MESSAGES = {
+    'left': (WM_LBUTTONDOWN, WM_LBUTTONUP, MK_LBUTTON),
+    'right': (WM_RBUTTONDOWN, WM_RBUTTONUP, MK_RBUTTON),
+}
+
+
+def make_lparam(x, y):
+    """客户区坐标打包成鼠标消息的 lParam（低 16 位 x，高 16 位 y，负数按补码）"""
+    return ((y & 0xFFFF) << 16) | (x & 0xFFFF)
+
+
+class PostMessageInputBackend(InputBackend):
+    """
+    后台消息后端 - 所有输入都投递给窗口，不移动真实鼠标、不需要窗口在前台
+
+    程序里的坐标仍是屏幕坐标，按本窗口的位置换算成客户区坐标；
+    move 发 WM_MOUSEMOVE 模拟悬停，按键消息带上按住的鼠标键标志（拖拽）。
+    鼠标位置是每个后端自己记的虚拟位置，多个窗口各用一个后端可以同时操作。
+    """
+
+    def __init__(self, hwnd, post=None, send=None, screen_to_client=None):
+        """
+        :param hwnd: 目标窗口句柄
+        :param post: post(hwnd, msg, wparam, lparam)，None 表示 win32api.PostMessage
+        :param send: send(hwnd, msg, wparam, lparam)，None 表示 win32gui.SendMessage（sync 按键）
+        :param screen_to_client: screen_to_client(x, y) -> (cx, cy)，None 表示按窗口当前位置换算
+        """
+        if win32api is None and (post is None or screen_to_client is None):
+            raise RuntimeError("PostMessageInputBackend 需要 pywin32（离线测试请传入 post 和 screen_to_client）")
+        self.hwnd = hwnd
+        self._post = post or win32api.PostMessage
+        self._send = send or (win32gui.SendMessage if win32gui is not None else self._post)
+        self._screen_to_client = screen_to_client or (lambda x, y: win32gui.ScreenToClient(hwnd, (x, y)))
+        self._cursor = (0, 0)       # 虚拟鼠标的屏幕坐标
+        self._buttons = 0           # 按住的鼠标键（MK_* 标志）
+        self.messages = 0
+
+    def _message(self, msg, wparam, lparam, sync=False):
+        self.messages += 1
+        (self._send if sync else self._post)(self.hwnd, msg, wparam, lparam)
+
+    def get_cursor_pos(self):
+        return self._cursor
+
+    def move(self, x, y):
+        self._cursor = (x, y)
+        cx, cy = self._screen_to_client(x, y)
+        self._message(WM_MOUSEMOVE, self._buttons, make_lparam(cx, cy))
+
+    def button(self, button, down, x=None, y=None):
+        # 坐标用最近一次 move 的位置（mouse_event 的按键也不带坐标）
+        cx, cy = self._screen_to_client(*self._cursor)
+        self.post_button(button, down, cx, cy)
+
+    def post_button(self, button, down, x, y):
+        down_msg, up_msg, flag = _BUTTON_MESSAGES[button]
+        if down:
+            self._buttons |= flag
+            self._message(down_msg, self._buttons, make_lparam(x, y))
+        else:
+            self._buttons &= ~flag
+            self._message(up_msg, self._buttons, make_lparam(x, y))
+
+    def key(self, vk, down, sync=False):
+        # lParam: 重复次数 1；释放时带上"之前是按下"和"正在释放"两位
+        self._message(WM_KEYDOWN if down else WM_KEYUP, vk, 0x00000001 if down else 0xC0000001, sync)
+
+    def char(self, code):
+        self._message(WM_CHAR, code, 0x00000001)
+
+
+class RecordingInputBackend(InputBackend):
+    """
+    记录假后端 - 不产生真实输入，按调用顺序记下 (时间, 操作, 参数)
+
+    用于在 Linux 上检查输入程序的时序，events 里的时间来自 clock。
+    """
+
+    def __init__(self, cursor=(0, 0), clock=time.monotonic):
+        self.cursor = tuple(cursor)
+        self.clock = clock
+        self.events = []
+
+    def _record(self, action, *args):
+        self.events.append((self.clock(), action, args))
+
+    def get_cursor_pos(self):
+        return self.cursor
+
+    def move(self, x, y):
+        self.cursor = (x, y)
+        self._record('move', x, y)
+
+    def button(self, button, down, x=0, y=0):
+        self._record('button', button, down)
+
+    def post_button(self, button, down, x, y):
+        self._record('post_button', button, down, x, y)
+
+    def key(self, vk, down, sync=False):
+        self._record('key', vk, down)
+
+    def char(self, code):
+        self._record('char', code)
+
+    def timeline(self):
+        """[(相对第一个事件的秒数, 操作, 参数), ...]"""
+        if not self.events:
+            return []
+        start = self.events[0][0]
+        return [(t - start, action, args) for t, action, args in self.events]
+
+    def clear(self):
+        self.events.clear()
\ No newline at end of file
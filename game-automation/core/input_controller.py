@@ -1,25 +1,51 @@
 """
 输入控制器 - 支持多种输入方式
 """
-import win32api
-import win32con
-import win32gui
-import time
 from typing import Tuple, Optional
+from utils.timer import precise_sleep
+from core.input_backends import Win32InputBackend, SendInputBackend, PostMessageInputBackend
+from core.action_scheduler import (ActionScheduler, InputProgram, run_program, click_program,
+                                   double_click_program, drag_program, key_program, combo_program,
+                                   text_program)
+
+try:
+    import win32con
+    import win32gui
+except ImportError:
+    # 非 Windows 平台（离线测试）只能配合记录后端使用
+    win32con = win32gui = None
 
 class InputController:
     """
     输入控制器 - 支持鼠标和键盘输入
     支持多种实现方式：PostMessage, SendMessage, SendInput
+    
+    每个动作先编成定时输入程序（InputProgram），再交给输入后端（method 选择）执行：
+    wait=True 时在当前线程执行完才返回（原来的行为），
+    wait=False 时交给后台调度线程，立即返回 Future，调用方可以继续截图和检测。
+    鼠标坐标都是屏幕坐标；不移动真实鼠标的后端（postmessage）忽略 restore_cursor。
     """
     
-    def __init__(self, hwnd):
+    # 输入方式 -> 后端
+    BACKENDS = {
+        'mouse_event': Win32InputBackend,   # SetCursorPos + mouse_event，键盘 PostMessage
+        'sendinput': SendInputBackend,      # 同一时刻的事件合成一次 SendInput
+        'postmessage': PostMessageInputBackend,  # 全部投递窗口消息，不占用鼠标，可多开并行
+    }
+    
+    def __init__(self, hwnd, backend=None, method='mouse_event'):
         """
         初始化输入控制器
         
         : param hwnd: 目标窗口句柄
+        :param backend: 输入后端，None 时按 method 创建
+        :param method: 输入方式，见 BACKENDS
         """
         self.hwnd = hwnd
+        self.backend = backend if backend is not None else self.BACKENDS[method](hwnd)
+        self.scheduler = None
+        # click_input 默认悬停时间（秒）；HoverCalibrator 标定后会改成游戏实际需要的最短时间
+        self.hover_time = 0.3
         
         # 虚拟键码映射
         self.VK_MAP = {
@@ -76,182 +102,156 @@ class InputController:
         
         raise ValueError(f"Unknown key: {key}")
     
+    # ==================== 调度 ====================
+    
+    def start_scheduler(self):
+        """启动后台动作调度线程（wait=False 的动作第一次提交时会自动启动）"""
+        if self.scheduler is None:
+            self.scheduler = ActionScheduler(self.backend)
+            self.scheduler.start()
+        return self.scheduler
+    
+    def stop_scheduler(self):
+        """停止调度线程，未执行的动作取消，已按下的键释放"""
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+    
+    def run(self, program, wait=True):
+        """
+        执行一段输入程序
+        
+        :param program: InputProgram
+        :param wait: True 时阻塞到执行完；False 时交给调度线程，立即返回 Future
+        :return: wait=False 时返回 Future，否则返回 None
+        """
+        if not wait:
+            return self.start_scheduler().submit(program)
+        if self.scheduler is not None:
+            # 调度线程在运行时也排队执行，保证和之前提交的动作不交叉
+            self.scheduler.submit(program).result()
+        else:
+            run_program(self.backend, program)
+        return None
+    
     # ==================== 键盘输入方法 ====================
     
-    def send_key(self, key, duration=0.05):
+    def send_key(self, key, duration=0.05, wait=True):
         """
         发送按键到窗口 - 使用 PostMessage
         
         :param key: 键名或虚拟键码
         :param duration: 按键持续时间（秒）
+        :param wait: False 时不阻塞，返回 Future
         """
-        vk_code = self.get_vk_code(key)
-        
-        # 按下
-        win32api.PostMessage(self.hwnd, win32con.WM_KEYDOWN, vk_code, 0)
-        time.sleep(duration)
-        
-        # 释放
-        win32api.PostMessage(self.hwnd, win32con.WM_KEYUP, vk_code, 0)
-        time.sleep(0.05)
+        return self.run(key_program(self.get_vk_code(key), hold=duration), wait)
     
-    def send_key_direct(self, key, duration=0.05):
+    def send_key_direct(self, key, duration=0.05, wait=True):
         """
         发送按键 - 使用 SendMessage (同步)
         
         :param key: 键名或虚拟键码
         :param duration: 按键持续时间（秒）
+        :param wait: False 时不阻塞，返回 Future
         """
-        vk_code = self.get_vk_code(key)
-        
-        # 按下
-        win32gui.SendMessage(self.hwnd, win32con.WM_KEYDOWN, vk_code, 0)
-        time.sleep(duration)
-        
-        # 释放
-        win32gui.SendMessage(self.hwnd, win32con.WM_KEYUP, vk_code, 0)
-        time.sleep(0.05)
+        return self.run(key_program(self.get_vk_code(key), hold=duration, sync=True), wait)
     
-    def send_char(self, char):
+    def send_char(self, char, wait=True):
         """
         发送字符（支持中文）
         
         :param char: 字符
+        :param wait: False 时不阻塞，返回 Future
         """
-        for c in char:
-            win32api.PostMessage(self. hwnd, win32con.WM_CHAR, ord(c), 0)
-            time.sleep(0.02)
+        return self.run(text_program(char), wait)
     
-    def send_key_combo(self, *keys, duration=0.05):
+    def send_key_combo(self, *keys, duration=0.05, wait=True):
         """
         发送组合键（如 Ctrl+C）
         
         :param keys: 键序列，如 ('CTRL', 'C')
         : param duration: 按键持续时间
+        :param wait: False 时不阻塞，返回 Future
         """
         vk_codes = [self.get_vk_code(k) for k in keys]
-        
-        # 按下所有键
-        for vk in vk_codes:
-            win32api.PostMessage(self. hwnd, win32con.WM_KEYDOWN, vk, 0)
-            time.sleep(0.02)
-        
-        time.sleep(duration)
-        
-        # 释放所有键（逆序）
-        for vk in reversed(vk_codes):
-            win32api.PostMessage(self.hwnd, win32con.WM_KEYUP, vk, 0)
-            time.sleep(0.02)
+        return self.run(combo_program(vk_codes, hold=duration), wait)
     
     # ==================== 鼠标输入方法 ====================
     
-    def click_input(self, x, y, restore_cursor=True, hover_time=0.3, click_duration=0.1):
+    def click_input(self, x, y, button='left', restore_cursor=True, hover_time=None, click_duration=0.1,
+                    wait=True):
         """
-        在指定位置点击鼠标左键 - 增强版
+        在指定位置点击鼠标 - 增强版
+        
+        移动 -> 停留 hover_time（让游戏识别悬停）-> 按下 click_duration -> 释放
+        -> 停留 0.15 秒（确保游戏处理完事件）-> 再过 0.1 秒恢复鼠标位置
         
         :param x: 屏幕坐标 x
         :param y: 屏幕坐标 y
+        :param button: 'left' 或 'right'
         :param restore_cursor: 是否恢复鼠标位置
-        :param hover_time: 鼠标移动后停留时间（秒） - 让游戏识别悬停
+        :param hover_time: 鼠标移动后停留时间（秒） - 让游戏识别悬停，None 表示用 self.hover_time
         :param click_duration: 鼠标按下持续时间（秒）
+        :param wait: False 时不阻塞，返回 Future（整段约 0.65 秒在后台执行）
         """
-        # 保存原始鼠标位置
-        if restore_cursor:
-            original_pos = win32api.GetCursorPos()
-        
-        # 1. 移动鼠标到目标位置
-        win32api. SetCursorPos((x, y))
-        
-        # 2. 停留一段时间（让游戏识别到鼠标悬停）
-        time.sleep(hover_time)
-        
-        # 3. 按下鼠标左键
-        win32api.mouse_event(win32con. MOUSEEVENTF_LEFTDOWN, x, y, 0, 0)
-        
-        # 4. 保持按下状态一段时间
-        time.sleep(click_duration)
-        
-        # 5. 释放鼠标左键
-        win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, x, y, 0, 0)
-        
-        # 6. 点击后再停留一小段时间（确保游戏处理完事件）
-        time.sleep(0.15)
-        
-        # 7. 恢复鼠标位置
-        if restore_cursor:
-            time.sleep(0.1)
-            win32api.SetCursorPos(original_pos)
+        if hover_time is None:
+            hover_time = self.hover_time
+        program = click_program(x, y, button, hover=hover_time, hold=click_duration,
+                                restore_cursor=restore_cursor and self.backend.uses_cursor)
+        return self.run(program, wait)
     
-    def click_at_client(self, x, y, button='left'):
+    def click_at_client(self, x, y, button='left', wait=True):
         """
         在客户区坐标点击 - 使用 PostMessage
         
         :param x: 客户区坐标 x
         :param y: 客户区坐标 y
         :param button: 'left' 或 'right'
+        :param wait: False 时不阻塞，返回 Future
         """
-        lparam = win32api.MAKELONG(x, y)
-        
-        if button == 'left':
-            win32api.PostMessage(self.hwnd, win32con. WM_LBUTTONDOWN, win32con.MK_LBUTTON, lparam)
-            time.sleep(0.05)
-            win32api.PostMessage(self.hwnd, win32con. WM_LBUTTONUP, 0, lparam)
-        elif button == 'right':
-            win32api.PostMessage(self.hwnd, win32con. WM_RBUTTONDOWN, win32con.MK_RBUTTON, lparam)
-            time.sleep(0.05)
-            win32api.PostMessage(self.hwnd, win32con.WM_RBUTTONUP, 0, lparam)
+        program = InputProgram(f'click_at_client({x}, {y})')
+        program.at(0.0, 'post_button', button, True, x, y)
+        program.then(0.05, 'post_button', button, False, x, y)
+        return self.run(program, wait)
     
-    def double_click(self, x, y, restore_cursor=True):
+    def double_click(self, x, y, restore_cursor=True, wait=True):
         """
         双击
         
         :param x: 屏幕坐标 x
         :param y: 屏幕坐标 y
         :param restore_cursor: 是否恢复鼠标位置
+        :param wait: False 时不阻塞，返回 Future
         """
-        if restore_cursor:
-            original_pos = win32api.GetCursorPos()
-        
-        win32api.SetCursorPos((x, y))
-        time.sleep(0.1)
-        
-        # 第一次点击
-        win32api.mouse_event(win32con. MOUSEEVENTF_LEFTDOWN, x, y, 0, 0)
-        time.sleep(0.05)
-        win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, x, y, 0, 0)
-        
-        time.sleep(0.1)
-        
-        # 第二次点击
-        win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, x, y, 0, 0)
-        time.sleep(0.05)
-        win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, x, y, 0, 0)
-        
-        if restore_cursor:
-            time. sleep(0.1)
-            win32api.SetCursorPos(original_pos)
+        program = double_click_program(x, y, restore_cursor=restore_cursor and self.backend.uses_cursor)
+        return self.run(program, wait)
     
-    def right_click(self, x, y, restore_cursor=True):
+    def right_click(self, x, y, restore_cursor=True, wait=True):
         """
         右键点击
         
         :param x:  屏幕坐标 x
         :param y:  屏幕坐标 y
         :param restore_cursor: 是否恢复鼠标位置
+        :param wait: False 时不阻塞，返回 Future
         """
-        if restore_cursor: 
-            original_pos = win32api.GetCursorPos()
-        
-        win32api. SetCursorPos((x, y))
-        time.sleep(0.1)
-        
-        win32api.mouse_event(win32con.MOUSEEVENTF_RIGHTDOWN, x, y, 0, 0)
-        time.sleep(0.05)
-        win32api.mouse_event(win32con. MOUSEEVENTF_RIGHTUP, x, y, 0, 0)
+        program = click_program(x, y, 'right', hover=0.1, hold=0.05, after=0.0,
+                                restore_cursor=restore_cursor and self.backend.uses_cursor)
+        return self.run(program, wait)
+    
+    def drag(self, x0, y0, x1, y1, button='left', hold=0.05, restore_cursor=True, wait=True):
+        """
+        拖拽
         
-        if restore_cursor:
-            time. sleep(0.1)
-            win32api.SetCursorPos(original_pos)
+        :param x0, y0: 起点屏幕坐标
+        :param x1, y1: 终点屏幕坐标
+        :param hold: 按下后多久开始移动（秒），0 表示按下-移动-释放一次提交
+        :param restore_cursor: 是否恢复鼠标位置
+        :param wait: False 时不阻塞，返回 Future
+        """
+        program = drag_program(x0, y0, x1, y1, button, hold=hold,
+                               restore_cursor=restore_cursor and self.backend.uses_cursor)
+        return self.run(program, wait)
     
     def move_mouse(self, x, y):
         """
@@ -260,7 +260,7 @@ class InputController:
         :param x:  屏幕坐标 x
         :param y:  屏幕坐标 y
         """
-        win32api.SetCursorPos((x, y))
+        self.run(InputProgram(f'move({x}, {y})').at(0.0, 'move', x, y))
     
     # ==================== 辅助方法 ====================
     
@@ -302,7 +302,7 @@ class InputController:
         try:
             win32gui.ShowWindow(self.hwnd, win32con.SW_RESTORE)
             win32gui.SetForegroundWindow(self.hwnd)
-            time.sleep(0.1)
+            precise_sleep(0.1)
             return True
         except Exception as e: 
             print(f"激活窗口失败: {e}")
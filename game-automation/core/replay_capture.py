@@ -0,0 +1,110 @@
+"""
+回放截图器 - 用录制文件代替真实窗口，接口与 ScreenCaptureAdvanced 一致
+"""
+import time
+import numpy as np
+from PIL import Image
+from core.frame_recorder import FrameFile
+from utils.image_utils import crop_region
+from utils.timer import sleep_until
+
+
+class ReplayCapture:
+    """
+    回放录制的截图
+
+    按录制时间戳实时回放（realtime=True），或者尽可能快地回放，
+    让整个检测流程可以在没有游戏窗口的 Linux 上做基准和回归测试。
+    """
+
+    def __init__(self, path, realtime=False, speed=1.0, loop=False):
+        """
+        :param path: FrameRecorder 录制的文件
+        :param realtime: 是否按录制时的帧间隔回放
+        :param speed: 实时回放的倍速
+        :param loop: 播完后是否从头循环
+        """
+        self.frames = FrameFile(path)
+        self.realtime = realtime
+        self.speed = speed
+        self.loop = loop
+
+        self.index = 0
+        self.last_timestamp = None
+        self.last_origin = (0, 0)
+
+        self._start_wall = None
+        self._start_ts = None
+
+    def __len__(self):
+        return len(self.frames)
+
+    def rewind(self):
+        """回到第一帧"""
+        self.index = 0
+        self._start_wall = None
+
+    def _next_index(self):
+        if self.index >= len(self.frames):
+            if not self.loop or len(self.frames) == 0:
+                raise EOFError("回放已结束")
+            self.rewind()
+
+        index = self.index
+        self.index += 1
+
+        if self.realtime:
+            timestamp = float(self.frames.timestamps[index])
+            if self._start_wall is None:
+                self._start_wall = time.monotonic()
+                self._start_ts = timestamp
+            target = self._start_wall + (timestamp - self._start_ts) / self.speed
+            sleep_until(target, clock=time.monotonic)
+
+        return index
+
+    def grab_frame(self, regions=None):
+        """
+        取下一帧
+        :param regions: ROI 列表 [(x, y, w, h), ...]，None 表示整帧
+        :return: (h, w, 3) BGR 只读视图；传入 regions 时为视图列表
+        """
+        index = self._next_index()
+        image = self.frames.images[index]
+        origin = tuple(int(v) for v in self.frames.origins[index])
+
+        self.last_timestamp = float(self.frames.timestamps[index])
+        self.last_origin = origin
+
+        if regions is None:
+            return image
+        return [crop_region(image, region, origin)[0] for region in regions]
+
+    def capture_to_numpy(self, region=None, out=None, copy=True):
+        """
+        取下一帧（接口同 ScreenCaptureAdvanced.capture_to_numpy）
+        :param region: 只取该区域 (x, y, w, h)，客户区坐标
+        :param out: 预分配的 (h, w, 3) uint8 缓冲区
+        :param copy: out 为 None 时是否返回独立的数组；False 时返回内存映射的只读视图
+        :return: BGR 数组
+        """
+        if region is None:
+            image = self.grab_frame()
+        else:
+            image = self.grab_frame(regions=[region])[0]
+
+        if out is None:
+            return image.copy() if copy else image
+        if out.shape != image.shape:
+            raise ValueError(f"out shape {out.shape} does not match frame {image.shape}")
+        np.copyto(out, image)
+        return out
+
+    def capture_regions(self, regions):
+        """一次取出同一帧里的多个区域"""
+        return self.grab_frame(regions=regions)
+
+    def capture(self, method='auto'):
+        """取下一帧并转换为 PIL Image"""
+        image = self.grab_frame()
+        return Image.fromarray(np.ascontiguousarray(image[:, :, ::-1]))
\ No newline at end of file
@@ -9,6 +9,7 @@ import win32gui
 import win32ui
 import win32con
 import os
+from utils.image_utils import bgrx_view, bgrx_to_bgr
 
 class ScreenCapture:
     """屏幕截图器"""
@@ -32,6 +33,45 @@ class ScreenCapture:
             self.width = 800
             self.height = 600
     
+    def _grab_bgrx(self, region=None):
+        """
+        截取窗口原始像素
+        :param region:  截取区域 (x, y, width, height)，None表示全屏
+        : return: (h, w, 4) BGRX 只读数组（直接包装位图字节，不拷贝）
+        """
+        # 获取窗口设备上下文
+        hwndDC = win32gui.GetWindowDC(self.hwnd)
+        mfcDC = win32ui.CreateDCFromHandle(hwndDC)
+        saveDC = mfcDC.CreateCompatibleDC()
+        
+        # 确定截图区域
+        if region is None:
+            x, y = 0, 0
+            width, height = self.width, self.height
+        else:
+            x, y, width, height = region
+        
+        # 创建位图对象
+        saveBitMap = win32ui.CreateBitmap()
+        saveBitMap.CreateCompatibleBitmap(mfcDC, width, height)
+        saveDC.SelectObject(saveBitMap)
+        
+        # 截图到位图
+        result = saveDC.BitBlt((0, 0), (width, height), mfcDC, (x, y), win32con.SRCCOPY)
+        
+        # 位图字节直接包装成数组
+        bmpinfo = saveBitMap.GetInfo()
+        bmpstr = saveBitMap.GetBitmapBits(True)
+        frame = bgrx_view(bmpstr, bmpinfo['bmWidth'], bmpinfo['bmHeight'])
+        
+        # 清理资源
+        win32gui.DeleteObject(saveBitMap.GetHandle())
+        saveDC.DeleteDC()
+        mfcDC.DeleteDC()
+        win32gui.ReleaseDC(self.hwnd, hwndDC)
+        
+        return frame
+    
     def capture(self, region=None):
         """
         截取窗口画面（后台截图，不影响用户操作）
@@ -39,57 +79,38 @@ class ScreenCapture:
         : return: PIL Image 对象
         """
         try:
-            # 获取窗口设备上下文
-            hwndDC = win32gui.GetWindowDC(self.hwnd)
-            mfcDC = win32ui.CreateDCFromHandle(hwndDC)
-            saveDC = mfcDC.CreateCompatibleDC()
-            
-            # 确定截图区域
-            if region is None:
-                x, y = 0, 0
-                width, height = self.width, self.height
-            else:
-                x, y, width, height = region
-            
-            # 创建位图对象
-            saveBitMap = win32ui.CreateBitmap()
-            saveBitMap.CreateCompatibleBitmap(mfcDC, width, height)
-            saveDC.SelectObject(saveBitMap)
-            
-            # 截图到位图
-            result = saveDC.BitBlt((0, 0), (width, height), mfcDC, (x, y), win32con.SRCCOPY)
-            
-            # 转换为PIL Image
-            bmpinfo = saveBitMap.GetInfo()
-            bmpstr = saveBitMap.GetBitmapBits(True)
-            
-            img = Image.frombuffer(
-                'RGB',
-                (bmpinfo['bmWidth'], bmpinfo['bmHeight']),
-                bmpstr, 'raw', 'BGRX', 0, 1
-            )
-            
-            # 清理资源
-            win32gui.DeleteObject(saveBitMap.GetHandle())
-            saveDC.DeleteDC()
-            mfcDC.DeleteDC()
-            win32gui.ReleaseDC(self.hwnd, hwndDC)
-            
-            return img
+            frame = self._grab_bgrx(region)
+            height, width = frame.shape[:2]
+            return Image.frombuffer('RGB', (width, height), frame, 'raw', 'BGRX', 0, 1)
             
         except Exception as e:
             print(f"❌ 截图失败:  {e}")
             raise
     
-    def capture_to_numpy(self, region=None):
+    def capture_to_numpy(self, region=None, out=None, copy=True):
         """
-        截取窗口并转换为numpy数组（用于OpenCV处理）
+        截取窗口并转换为numpy数组（用于OpenCV处理），不经过 PIL
         :param region:  截取区域
+        :param out: 预分配的 (h, w, 3) uint8 缓冲区，传入时结果写入其中
+        :param copy: out 为 None 时是否返回独立的连续数组；False 时返回位图字节的只读视图（少一次拷贝）
         :return: numpy数组 (BGR格式)
         """
-        img = self.capture(region)
-        # PIL是RGB，OpenCV是BGR，需要转换
-        return np.array(img)[: , :, ::-1]. copy()
+        try:
+            frame = self._grab_bgrx(region)
+        except Exception as e:
+            print(f"❌ 截图失败:  {e}")
+            raise
+        # 位图本身就是 BGRX，去掉填充字节即为 OpenCV 的 BGR
+        image = bgrx_to_bgr(frame, out)
+        return image.copy() if out is None and copy else image
+    
+    def capture_regions(self, regions):
+        """
+        截取多个区域（每个区域只拷贝自己的像素）
+        :param regions: [(x, y, w, h), ...]
+        :return: 与 regions 对应的 BGR 数组列表
+        """
+        return [self.capture_to_numpy(region) for region in regions]
     
     def save_screenshot(self, filename, region=None):
         """
@@ -8,13 +8,25 @@ import win32ui
 import win32con
 from ctypes import windll
 import time
+from core.capture_session import (CaptureSession, Win32CaptureBackend,
+                                  CaptureMethodSelector, is_black_frame)
+from utils.image_utils import bgrx_to_bgr, crop_region
 
 class ScreenCaptureAdvanced:
     """支持 DirectX 游戏的截图器"""
     
+    METHOD_NAMES = {'printwindow': 'PrintWindow', 'bitblt': 'BitBlt', 'screen': '屏幕截取'}
+    
+    # 每个窗口记住自己的截图方法（同一窗口新建截图器时复用）
+    _selectors = {}
+    
     def __init__(self, hwnd):
         self.hwnd = hwnd
         self.update_window_size()
+        
+        # 长期截图会话：DC/位图只在客户区大小变化时重建
+        self.session = CaptureSession(Win32CaptureBackend(hwnd))
+        self.selector = self._selectors.setdefault(hwnd, CaptureMethodSelector())
     
     def update_window_size(self):
         """更新窗口大小"""
@@ -45,92 +57,31 @@ class ScreenCaptureAdvanced:
         """
         方法1: 使用 PrintWindow API（最适合 DirectX 游戏）
         """
-        print("🎮 尝试 PrintWindow 方法...")
-        
-        # 先尝试激活窗口
+        frame = self.session.grab('printwindow')
+        return self._frame_to_image(frame)
+    
+    def capture_with_bitblt(self):
+        """
+        方法2: 使用 BitBlt（传统方法）
+        """
+        frame = self.session.grab('bitblt')
+        return self._frame_to_image(frame)
+    
+    def _restore_if_minimized(self):
+        """窗口最小化时先恢复（只在探测时调用，不进入每帧路径）"""
         try:
             if win32gui.IsIconic(self.hwnd):
                 win32gui.ShowWindow(self.hwnd, 9)  # SW_RESTORE
-            time.sleep(0.1)
+                time.sleep(0.1)
         except: 
             pass
-        
-        # 获取窗口DC
-        hwndDC = win32gui.GetWindowDC(self.hwnd)
-        mfcDC = win32ui.CreateDCFromHandle(hwndDC)
-        saveDC = mfcDC.CreateCompatibleDC()
-        
-        # 使用客户区大小
-        width = self.client_width if self.client_width > 0 else self.width
-        height = self. client_height if self.client_height > 0 else self. height
-        
-        # 创建位图
-        saveBitMap = win32ui.CreateBitmap()
-        saveBitMap.CreateCompatibleBitmap(mfcDC, width, height)
-        saveDC.SelectObject(saveBitMap)
-        
-        # 使用 PrintWindow（关键！）
-        # 参数3:  0=默认, 1=PW_CLIENTONLY, 2=PW_RENDERFULLCONTENT, 3=两者结合
-        result = windll.user32.PrintWindow(self.hwnd, saveDC. GetSafeHdc(), 3)
-        
-        if result == 0:
-            print("⚠️ PrintWindow 返回失败")
-        
-        # 给游戏一点时间渲染
-        time.sleep(0.05)
-        
-        # 转换为 PIL Image
-        bmpinfo = saveBitMap.GetInfo()
-        bmpstr = saveBitMap.GetBitmapBits(True)
-        
-        img = Image.frombuffer(
-            'RGB',
-            (bmpinfo['bmWidth'], bmpinfo['bmHeight']),
-            bmpstr, 'raw', 'BGRX', 0, 1
-        )
-        
-        # 清理
-        win32gui.DeleteObject(saveBitMap.GetHandle())
-        saveDC.DeleteDC()
-        mfcDC.DeleteDC()
-        win32gui.ReleaseDC(self.hwnd, hwndDC)
-        
-        return img
     
-    def capture_with_bitblt(self):
-        """
-        方法2: 使用 BitBlt（传统方法）
-        """
-        print("📸 尝试 BitBlt 方法...")
-        
-        hwndDC = win32gui. GetWindowDC(self.hwnd)
-        mfcDC = win32ui.CreateDCFromHandle(hwndDC)
-        saveDC = mfcDC.CreateCompatibleDC()
-        
-        width = self.client_width if self.client_width > 0 else self.width
-        height = self.client_height if self. client_height > 0 else self.height
-        
-        saveBitMap = win32ui. CreateBitmap()
-        saveBitMap.CreateCompatibleBitmap(mfcDC, width, height)
-        saveDC.SelectObject(saveBitMap)
-        
-        result = saveDC.BitBlt((0, 0), (width, height), mfcDC, (0, 0), win32con.SRCCOPY)
-        
-        bmpinfo = saveBitMap. GetInfo()
-        bmpstr = saveBitMap.GetBitmapBits(True)
-        
-        img = Image.frombuffer(
-            'RGB',
-            (bmpinfo['bmWidth'], bmpinfo['bmHeight']),
-            bmpstr, 'raw', 'BGRX', 0, 1
-        )
-        
-        win32gui.DeleteObject(saveBitMap.GetHandle())
-        saveDC.DeleteDC()
-        mfcDC. DeleteDC()
-        win32gui.ReleaseDC(self.hwnd, hwndDC)
-        
-        return img
+    def _frame_to_image(self, frame):
+        """BGRX/BGR 帧转 PIL Image（会拷贝，缓冲区可被下一帧复用）"""
+        if frame.shape[2] == 3:
+            return Image.fromarray(np.ascontiguousarray(frame[:, :, ::-1]))
+        height, width = frame.shape[:2]
+        return Image.frombuffer('RGB', (width, height), frame, 'raw', 'BGRX', 0, 1)
     
     def capture_screen_region(self):
         """
@@ -149,8 +100,8 @@ class ScreenCaptureAdvanced:
         return img
     
     def _is_all_black(self, img):
-        """检查图片是否全黑"""
-        arr = np.array(img)
+        """检查图片是否全黑（抽样检查，忽略 BGRX 填充字节）"""
+        arr = np.asarray(img)[::4, ::4, :3]
         avg_brightness = arr.mean()
         max_brightness = arr.max()
         
@@ -158,54 +109,107 @@ class ScreenCaptureAdvanced:
         
         return max_brightness < 10
     
-    def capture(self, method='auto'):
+    def _grab(self, method, regions=None):
         """
-        智能截图 - 自动尝试多种方法
-        : param method: 'auto', 'printwindow', 'bitblt', 'screen'
+        用指定方法截取原始像素
+        :param regions: ROI 列表 [(x, y, w, h), ...]，None 表示整帧
+        :return: 整帧时返回单个数组，否则返回与 regions 对应的数组列表。
+                 PrintWindow/BitBlt 返回会话缓冲区里的 (h, w, 4) BGRX 数组，
+                 屏幕截取返回 (h, w, 3) BGR 视图
         """
-        self.update_window_size()
+        if method in ('printwindow', 'bitblt'):
+            if regions is None:
+                return self.session.grab(method)
+            return self.session.grab_regions(method, regions)
+        elif method == 'screen':
+            frame = np.asarray(self.capture_screen_region())[:, :, ::-1]
+            if regions is None:
+                return frame
+            return [crop_region(frame, region)[0] for region in regions]
+        raise ValueError(f"Unknown capture method: {method}")
+    
+    def _probe(self):
+        """按顺序探测截图方法，记住第一个不全黑的方法"""
+        self._restore_if_minimized()
         
-        if method == 'auto':
-            # 方法1: PrintWindow (最适合游戏)
+        for method in self.selector.methods:
+            name = self.METHOD_NAMES.get(method, method)
             try:
-                img = self.capture_with_printwindow()
-                if not self._is_all_black(img):
-                    print("✅ PrintWindow 成功！")
-                    return img
+                if method == 'screen':
+                    print("⚠️ 前两种方法都失败，尝试屏幕截取（需要游戏窗口可见）")
                 else:
-                    print("⚠️ PrintWindow 截图全黑")
-            except Exception as e:
-                print(f"❌ PrintWindow 失败: {e}")
-            
-            # 方法2: BitBlt
-            try:
-                img = self.capture_with_bitblt()
-                if not self._is_all_black(img):
-                    print("✅ BitBlt 成功！")
-                    return img
-                else: 
-                    print("⚠️ BitBlt 截图全黑")
-            except Exception as e:
-                print(f"❌ BitBlt 失败: {e}")
-            
-            # 方法3: 屏幕截取（需要窗口可见）
-            try:
-                print("⚠️ 前两种方法都失败，尝试屏幕截取（需要游戏窗口可见）")
-                img = self.capture_screen_region()
-                if not self._is_all_black(img):
-                    print("✅ 屏幕截取成功！")
-                    return img
+                    print(f"🔍 尝试 {name} 方法...")
+                frame = self._grab(method)
+                if not self._is_all_black(frame):
+                    print(f"✅ {name} 成功！之后固定使用该方法")
+                    self.selector.record_win(method)
+                    self.selector.report_frame(False)
+                    return frame
+                else:
+                    print(f"⚠️ {name} 截图全黑")
             except Exception as e:
-                print(f"❌ 屏幕截取失败:  {e}")
-            
-            raise Exception("所有截图方法都失败了！")
+                print(f"❌ {name} 失败: {e}")
         
-        elif method == 'printwindow': 
-            return self.capture_with_printwindow()
-        elif method == 'bitblt':
-            return self.capture_with_bitblt()
-        elif method == 'screen':
-            return self. capture_screen_region()
+        raise Exception("所有截图方法都失败了！")
+    
+    def grab_frame(self, method='auto', regions=None):
+        """
+        截取原始像素 - 自动模式只探测一次，之后固定使用胜出的方法
+        : param method: 'auto', 'printwindow', 'bitblt', 'screen'
+        : param regions: ROI 列表 [(x, y, w, h), ...]，None 表示整帧
+        : return: (h, w, 4) BGRX 或 (h, w, 3) BGR 数组；传入 regions 时为数组列表
+                  （都可能被下一帧覆盖）
+        """
+        if method != 'auto':
+            return self._grab(method, regions)
+        
+        selector = self.selector
+        if selector.needs_probe():
+            frame = self._probe()
+            if regions is None:
+                return frame
+        
+        current = selector.current
+        try:
+            result = self._grab(current, regions)
+        except Exception as e:
+            print(f"❌ {self.METHOD_NAMES[current]} 失败: {e}，重新探测")
+            selector.invalidate()
+            frame = self._probe()
+            if regions is None:
+                return frame
+            return self._grab(selector.current, regions)
+        
+        # 健康检查：连续多帧全黑则下一帧重新探测。
+        # ROI 本身可能就是暗的，所有 ROI 都全黑时补截一次整帧确认，整帧也全黑才算这一帧全黑
+        if regions is None:
+            black = is_black_frame(result)
+        else:
+            rois = [roi for roi in result if roi.size]
+            black = None
+            if rois:
+                black = all(is_black_frame(roi) for roi in rois) and is_black_frame(self._grab(current))
+        if selector.report_frame(black):
+            print(f"⚠️ {self.METHOD_NAMES[current]} 连续{selector.max_black_frames}帧全黑，将重新探测")
+        
+        return result
+    
+    def capture(self, method='auto'):
+        """
+        智能截图 - 返回 PIL Image
+        : param method: 'auto', 'printwindow', 'bitblt', 'screen'
+        """
+        if method == 'screen':
+            return self.capture_screen_region()
+        return self._frame_to_image(self.grab_frame(method))
+    
+    def capture_stats(self):
+        """截图方法统计（各方法胜出次数、截取帧数、探测次数）"""
+        return self.selector.stats()
+    
+    def close(self):
+        """释放截图会话持有的 DC/位图"""
+        self.session.close()
     
     def save_screenshot(self, filename):
         """保存截图"""
@@ -222,8 +226,26 @@ class ScreenCaptureAdvanced:
             print(f"❌ 保存截图失败:  {e}")
             raise
     
-    def capture_to_numpy(self):
-        """截取并转换为 numpy 数组（用于 OpenCV）"""
-        img = self.capture()
-        # PIL 是 RGB，OpenCV 是 BGR
-        return np.array(img)[: , :, ::-1]. copy()
\ No newline at end of file
+    def capture_to_numpy(self, region=None, out=None, copy=True):
+        """
+        截取并转换为 numpy 数组（用于 OpenCV），不经过 PIL
+        :param region: 只截取该区域 (x, y, w, h)，None 表示整帧
+        :param out: 预分配的 (h, w, 3) uint8 缓冲区，传入时结果写入其中
+        :param copy: out 为 None 时是否返回独立的连续数组；
+                     False 时返回会话缓冲区的视图（少一次拷贝，下一次截图会覆盖）
+        :return: BGR 数组
+        """
+        if region is None:
+            frame = self.grab_frame()
+        else:
+            frame = self.grab_frame(regions=[region])[0]
+        image = bgrx_to_bgr(frame, out)
+        return image.copy() if out is None and copy else image
+    
+    def capture_regions(self, regions):
+        """
+        一次截图取出多个区域，只读取并转换这些区域的像素
+        :param regions: [(x, y, w, h), ...]
+        :return: 与 regions 对应的 BGR 视图列表（下一次截图会覆盖）
+        """
+        return [bgrx_to_bgr(frame) for frame in self.grab_frame(regions=regions)]
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+批量检测 - 对 (N, H, W, 3) 帧数组或录制文件逐帧检测血条，结果按列合并成一个结构化数组
+"""
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from utils.image_utils import crop_region
+from core.frame_recorder import FrameFile
+from detection.hp_bars import HP_BAR_DTYPE
+
+# 一行一个血条，frame 为所在帧在输入中的下标
+BATCH_DTYPE = np.dtype([('frame', '<i4')] + HP_BAR_DTYPE.descr)
+
+# 子进程里的检测器和帧来源，由 _init_worker 设置
+_worker = {}
+
+
+def _open_frames(frames):
+    """
+    统一帧来源
+
+    :return: (images, origins, source)；source 是子进程重新打开同一份数据的描述，
+             None 表示只能把帧数据本身发给子进程
+    """
+    if isinstance(frames, str):
+        frames = FrameFile(frames)
+    if isinstance(frames, FrameFile):
+        return frames.images, frames.origins, ('file', frames.path)
+
+    images = frames
+    if images.ndim != 4:
+        raise ValueError(f"frames must be (N, H, W, C), got shape {images.shape}")
+    if isinstance(images, np.memmap) and images.filename and images.flags.c_contiguous:
+        # 按文件名重新映射，不经过进程间管道传像素
+        base = images
+        while isinstance(base.base, np.memmap):
+            base = base.base
+        offset = base.offset + (images.__array_interface__['data'][0]
+                                - base.__array_interface__['data'][0])
+        return images, None, ('memmap', images.filename, offset, images.dtype.str, images.shape)
+    return images, None, None
+
+
+def _strip_detector(detector):
+    """发给子进程的检测器副本：去掉画面变化检测的状态（批量检测不使用）和线程池"""
+    detector = copy.copy(detector)
+    detector.change_detector = None
+    detector._last_result = None
+    detector._last_origin = None
+    detector._tile_pool = None      # 已经按进程并行，子进程里不再分块
+    return detector
+
+
+def detect_frames(detector, images, origins=None, start=0):
+    """
+    在当前进程内逐帧检测（和逐帧调用 detect_hp_bars 做的事情相同，只是不用画面变化检测）
+
+    :param detector: MonsterDetector
+    :param images: (n, H, W, C) 数组（可以是 memmap 的切片）
+    :param origins: (n, 2) 每帧左上角的客户区坐标；None 表示都是整帧 (0, 0)
+    :param start: images[0] 在整个输入中的帧下标
+    :return: BATCH_DTYPE 结构化数组
+    """
+    region = detector.get_capture_region()
+    parts = []
+    for i in range(len(images)):
+        origin = (0, 0) if origins is None else (int(origins[i][0]), int(origins[i][1]))
+        roi, (roi_x, roi_y) = crop_region(images[i], region, origin)
+        if roi.size == 0:
+            continue
+        bars = detector._detect_in_roi(roi, roi_x, roi_y)
+        if len(bars):
+            parts.append((start + i, bars))
+
+    if not parts:
+        return np.empty(0, dtype=BATCH_DTYPE)
+    indices, bars = zip(*parts)
+    counts = [len(b) for b in bars]
+    bars = np.concatenate(bars)
+    result = np.empty(len(bars), dtype=BATCH_DTYPE)
+    result['frame'] = np.repeat(indices, counts)
+    for name in HP_BAR_DTYPE.names:
+        result[name] = bars[name]
+    return result
+
+
+def _init_worker(detector, source):
+    _worker['detector'] = detector
+    if source is None:
+        _worker['images'] = _worker['origins'] = None
+    elif source[0] == 'file':
+        frames = FrameFile(source[1])
+        _worker['images'], _worker['origins'] = frames.images, frames.origins
+    else:
+        _, filename, offset, dtype, shape = source
+        _worker['images'] = np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=shape)
+        _worker['origins'] = None
+
+
+def _detect_range(start, stop):
+    images, origins = _worker['images'], _worker['origins']
+    return detect_frames(_worker['detector'], images[start:stop],
+                         None if origins is None else origins[start:stop], start)
+
+
+def _detect_chunk(start, images, origins):
+    return detect_frames(_worker['detector'], images, origins, start)
+
+
+def detect_batch(detector, frames, origins=None, workers=1, chunk_frames=64):
+    """
+    批量检测血条
+
+    :param detector: MonsterDetector
+    :param frames: (N, H, W, C) 数组、np.memmap、FrameFile 或录制文件路径
+    :param origins: (N, 2) 每帧左上角的客户区坐标；FrameFile 默认用录制时的 origin，
+                    数组默认都是整帧 (0, 0)；也可以传一个 (x, y) 表示所有帧相同
+    :param workers: 进程数，1 表示在当前进程内处理；不超过 CPU 核数（单核上进程池只有额外开销）
+    :param chunk_frames: 每个任务处理的帧数
+    :return: BATCH_DTYPE 结构化数组，按帧下标排序；按列取用，例如 result['frame']、result['x']
+    """
+    images, file_origins, source = _open_frames(frames)
+    if origins is None:
+        origins = file_origins
+    elif np.ndim(origins) == 1:
+        origins = np.broadcast_to(np.asarray(origins), (len(images), 2))
+
+    n = len(images)
+    workers = min(workers, os.cpu_count() or 1)
+    if workers <= 1 or n <= chunk_frames:
+        return detect_frames(detector, images, origins)
+
+    starts = range(0, n, chunk_frames)
+    worker_detector = _strip_detector(detector)
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(worker_detector, source)) as pool:
+        if source is not None and origins is file_origins:
+            # 子进程自己映射文件，只传帧下标
+            futures = [pool.submit(_detect_range, s, min(s + chunk_frames, n)) for s in starts]
+        else:
+            futures = [pool.submit(_detect_chunk, s, np.asarray(images[s:s + chunk_frames]),
+                                   None if origins is None else np.asarray(origins[s:s + chunk_frames]))
+                       for s in starts]
+        parts = [future.result() for future in futures]
+
+    return np.concatenate(parts) if parts else np.empty(0, dtype=BATCH_DTYPE)
\ No newline at end of file
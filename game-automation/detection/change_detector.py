@@ -0,0 +1,111 @@
+"""
+画面变化检测 - 检测区域几乎没变时跳过完整检测，复用上一次结果
+"""
+import cv2
+import numpy as np
+
+
+class FrameChangeDetector:
+    """
+    基于降采样签名的变化检测器
+
+    把 ROI 按 cell x cell 像素取平均得到一张小签名图（细血条不会像抽样那样被漏掉），
+    与上一次完整检测时的签名逐格比较，任一格变化超过阈值即认为画面变了。
+    """
+
+    def __init__(self, cell=4, threshold=12, max_skip=10):
+        """
+        :param cell: 签名格子边长（像素，2 的幂），越小越敏感、越慢
+        :param threshold: 单格平均值的最大允许变化（0~255）
+        :param max_skip: 连续跳过多少帧后强制重新检测，防止缓慢变化累积
+        """
+        if cell < 1 or cell & (cell - 1):
+            raise ValueError("cell must be a power of 2")
+        self.cell = cell
+        self.threshold = threshold
+        self.max_skip = max_skip
+
+        self._levels = []        # 逐级减半的缓冲区，最后一级就是签名
+        self._reference = None   # 上一次完整检测时的签名
+        self._diff = None
+        self._skipped = 0
+
+        # 统计
+        self.checks = 0
+        self.hits = 0
+
+    def _compute_signature(self, roi):
+        # 裁到 cell 的整数倍，再用 INTER_AREA 逐级减半（2 倍缩小有专门的快速路径）
+        h, w = roi.shape[:2]
+        h -= h % self.cell
+        w -= w % self.cell
+        roi = roi[:h, :w]
+
+        shape = (max(1, h // self.cell), max(1, w // self.cell)) + roi.shape[2:]
+        if not self._levels or self._levels[-1].shape != shape:
+            self._levels = []
+            level_h, level_w = h, w
+            while level_h > shape[0] or level_w > shape[1]:
+                level_h, level_w = max(1, level_h // 2), max(1, level_w // 2)
+                self._levels.append(np.empty((level_h, level_w) + roi.shape[2:], dtype=np.uint8))
+            if not self._levels:
+                self._levels.append(np.empty(shape, dtype=np.uint8))
+            self._diff = np.empty(shape, dtype=np.uint8)
+            self._reference = None
+
+        src = roi
+        for level in self._levels:
+            if level.shape == src.shape:
+                np.copyto(level, src)
+            else:
+                cv2.resize(src, (level.shape[1], level.shape[0]), dst=level,
+                           interpolation=cv2.INTER_AREA)
+            src = level
+        return self._levels[-1]
+
+    def unchanged(self, roi):
+        """
+        判断 ROI 相对上一次完整检测是否没有明显变化
+
+        :param roi: 检测区域图像
+        :return: True 表示可以复用上一次的检测结果
+        """
+        self.checks += 1
+        if roi.shape[0] < self.cell or roi.shape[1] < self.cell:
+            # 比一个格子还小（如紧贴客户区边缘被裁掉的窗口），算不出签名，按有变化处理
+            self.reset()
+            return False
+        signature = self._compute_signature(roi)
+
+        if self._reference is not None and self._skipped < self.max_skip:
+            cv2.absdiff(signature, self._reference, dst=self._diff)
+            if self._diff.max() <= self.threshold:
+                self._skipped += 1
+                self.hits += 1
+                return True
+
+        # 需要完整检测：把当前签名记为新的参考
+        if self._reference is None:
+            self._reference = signature.copy()
+        else:
+            np.copyto(self._reference, signature)
+        self._skipped = 0
+        return False
+
+    def reset(self):
+        """丢弃参考签名，下一帧必定重新检测"""
+        self._reference = None
+        self._skipped = 0
+
+    @property
+    def hit_rate(self):
+        """跳过完整检测的帧占比"""
+        return self.hits / self.checks if self.checks else 0.0
+
+    def stats(self):
+        """返回统计信息"""
+        return {
+            'checks': self.checks,
+            'hits': self.hits,
+            'hit_rate': self.hit_rate,
+        }
\ No newline at end of file
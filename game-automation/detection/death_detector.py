@@ -5,6 +5,11 @@ import cv2
 import numpy as np
 from typing import Tuple
 import time
+from utils.image_utils import crop_region
+from utils.timer import precise_sleep
+from detection.red_classifier import get_red_classifier
+from detection.liveness_probe import LivenessProbe
+from detection.kill_predictor import KillPredictor
 
 class DeathDetector:  
     """怪物死亡检测器"""
@@ -15,10 +20,15 @@ class DeathDetector:
         self.hp_bar_upper = np.array([10, 255, 255])
         self.hp_bar_lower2 = np.array([170, 100, 100])
         self.hp_bar_upper2 = np.array([180, 255, 255])
+        
+        # 最近一次 wait_for_death 的统计（探测次数、结果）
+        self.last_wait_stats = {}
     
-    def is_monster_alive(self, image, monster_region):
+    def get_capture_region(self, monster_region):
         """
-        检测怪物是否还活着 - 通过血条
+        判断存活需要的截图区域（怪物上方的一条窄带）
+        :param monster_region: 怪物区域 (x, y, w, h)
+        :return: (x, y, w, h) 客户区坐标
         """
         x, y, w, h = monster_region
         
@@ -28,37 +38,70 @@ class DeathDetector:
         search_x = max(0, x)
         search_width = w
         
-        roi = image[search_y:search_y + search_height, 
-                   search_x:search_x + search_width]
+        return (search_x, search_y, search_width, search_height)
+    
+    def is_monster_alive(self, image, monster_region, origin=(0, 0)):
+        """
+        检测怪物是否还活着 - 通过血条
+        :param image: 整帧截图，或按 get_capture_region() 截取的 ROI
+        :param origin: image 左上角的客户区坐标（整帧为 (0, 0)）
+        """
+        roi, _ = crop_region(image, self.get_capture_region(monster_region), origin)
         
         if roi.size == 0:
             return False
         
-        # 转换到HSV
-        hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-        
-        # 检测红色
-        mask1 = cv2.inRange(hsv, self.hp_bar_lower, self.hp_bar_upper)
-        mask2 = cv2.inRange(hsv, self.hp_bar_lower2, self.hp_bar_upper2)
-        mask = cv2.bitwise_or(mask1, mask2)
-        
+        # 检测红色（色相折叠：cvtColor -> absdiff -> 一次 inRange，与 HSV + 两次 inRange 结果一致）
         # 如果有足够的红色像素，说明血条还在
-        red_pixels = cv2.countNonZero(mask)
+        red_pixels = get_red_classifier(self).count(roi)
         
         return red_pixels > 5  # 至少5个红色像素
     
-    def wait_for_death(self, capture_func, monster_region, max_wait=10.0, check_interval=0.5):
+    def wait_for_death(self, capture_func, monster_region, max_wait=10.0, min_interval=0.05,
+                       max_interval=0.5, stall_timeout=3.0, use_roi=True,
+                       clock=time.monotonic, sleep=precise_sleep):
         """
-        等待怪物死亡
+        等待怪物死亡 - 按掉血速度预测击杀时间，自适应调整探测间隔
+        前期按 max_interval 粗略等待，接近预计击杀时间时缩短到 min_interval；
+        血量 stall_timeout 秒没有明显下降就提前放弃
+        :param capture_func: 截图函数，use_roi 时需支持 region 关键字参数
+                             （如 ScreenCaptureAdvanced.capture_to_numpy）
+        :param use_roi: 只截取血条附近的窄带，而不是整个窗口
+        :param clock: 返回当前秒数的函数（测试时可注入假时钟）
+        :param sleep: 等待函数，与 clock 配套
+        :return: True 表示怪物已死亡；超时或打不动返回 False
         """
-        start_time = time.time()
+        roi_region = self.get_capture_region(monster_region)
+        origin = (max(0, roi_region[0]), max(0, roi_region[1])) if use_roi else (0, 0)
+        # 搜索窄带和怪物区域一样宽，比血条宽：第一次看到血条时按血条位置和宽度重建探针，
+        # 剩余比例才是 红色列数 / 血条宽度，而不是 / 怪物区域宽度
+        probe = LivenessProbe(self, roi_region, margin=0)
+        bar_found = False
+        predictor = KillPredictor(min_interval, max_interval, stall_timeout=stall_timeout)
+        start_time = clock()
         
-        while time.time() - start_time < max_wait:
-            img = capture_func()
+        self.last_wait_stats = {'polls': 0, 'result': 'timeout'}
+        while clock() - start_time < max_wait:
+            img = capture_func(region=roi_region) if use_roi else capture_func()
+            now = clock()
+            if not bar_found:
+                bar = probe.locate_bar(img, origin)
+                if bar is not None:
+                    # 只换 x 和宽度，高度仍覆盖整条窄带（血条上下晃动也不丢）
+                    probe = LivenessProbe(self, (bar[0], roi_region[1], bar[2], roi_region[3]), margin=0)
+                    bar_found = True
+            result = probe.check(img, origin, now)
+            self.last_wait_stats['polls'] += 1
             
-            if not self.is_monster_alive(img, monster_region):
+            if not result.alive:
+                self.last_wait_stats['result'] = 'dead'
                 return True
             
-            time.sleep(check_interval)
+            predictor.add(now, result.fraction)
+            if predictor.stalled(now):
+                self.last_wait_stats['result'] = 'stalled'
+                return False
+            
+            sleep(min(predictor.next_interval(), max(0.0, start_time + max_wait - clock())))
         
         return False
\ No newline at end of file
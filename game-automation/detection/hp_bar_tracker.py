@@ -0,0 +1,259 @@
+"""
+血条跟踪器 - 跨帧给血条分配固定 ID，已有目标只在预测位置附近的小窗口里检测
+"""
+from collections import deque
+import numpy as np
+from detection.hp_bars import HP_BAR_DTYPE, bar_to_dict
+
+
+class Track:
+    """一个被跟踪的血条"""
+
+    __slots__ = ('id', 'bar', 'history', 'misses', 'hits', 'max_width')
+
+    def __init__(self, track_id, bar, timestamp, history=8):
+        self.id = track_id
+        self.bar = bar.copy()             # 最近一次匹配到的血条（HP_BAR_DTYPE 记录）
+        self.history = deque(maxlen=history)  # [(timestamp, x, y), ...]
+        self.history.append((timestamp, int(bar['x']), int(bar['y'])))
+        self.misses = 0                   # 连续未匹配的帧数
+        self.hits = 1                     # 累计匹配次数
+        self.max_width = int(bar['w'])    # 见过的最大宽度（满血时的长度）
+
+    def update(self, bar, timestamp):
+        self.bar = bar.copy()
+        self.history.append((timestamp, int(bar['x']), int(bar['y'])))
+        self.misses = 0
+        self.hits += 1
+        self.max_width = max(self.max_width, int(bar['w']))
+
+    @property
+    def velocity(self):
+        """按历史首尾估计的速度 (vx, vy)，像素/秒"""
+        if len(self.history) < 2:
+            return 0.0, 0.0
+        t0, x0, y0 = self.history[0]
+        t1, x1, y1 = self.history[-1]
+        dt = t1 - t0
+        if dt <= 0:
+            return 0.0, 0.0
+        return (x1 - x0) / dt, (y1 - y0) / dt
+
+    def predict(self, timestamp):
+        """预测 timestamp 时血条左上角的位置"""
+        t, x, y = self.history[-1]
+        vx, vy = self.velocity
+        dt = timestamp - t
+        return x + vx * dt, y + vy * dt
+
+    @property
+    def click_pos(self):
+        return int(self.bar['click_x']), int(self.bar['click_y'])
+
+    @property
+    def hp(self):
+        """最近一次检测到的剩余血量比例"""
+        return float(self.bar['hp'])
+
+    @property
+    def hp_bar(self):
+        return int(self.bar['x']), int(self.bar['y']), int(self.bar['w']), int(self.bar['h'])
+
+    def to_dict(self):
+        """转换成旧接口的怪物字典（附带 track_id）"""
+        monster = bar_to_dict(self.bar)
+        monster['track_id'] = self.id
+        return monster
+
+    def __repr__(self):
+        return f"Track(id={self.id}, hp_bar={self.hp_bar}, misses={self.misses})"
+
+
+class HpBarTracker:
+    """
+    血条跟踪器
+
+    用门限最近邻把每帧的血条匹配到已有轨迹上，轨迹 ID 跨帧不变。
+    有轨迹时只在各轨迹预测位置附近的小窗口里检测，
+    每隔 rescan_interval 帧（或没有轨迹时）才扫描整个检测区域发现新怪物。
+    """
+
+    def __init__(self, gate=20, max_misses=3, history=8, rescan_interval=5, margin=None):
+        """
+        :param gate: 匹配门限（像素），预测位置与检测位置距离超过它就不算同一个血条
+        :param max_misses: 连续多少帧没匹配到就删除轨迹
+        :param history: 每条轨迹保留的运动历史长度
+        :param rescan_interval: 每隔多少帧做一次整区域扫描
+        :param margin: 搜索窗口向外扩展的像素数，默认等于 gate
+        """
+        self.gate = gate
+        self.max_misses = max_misses
+        self.history = history
+        self.rescan_interval = rescan_interval
+        self.margin = gate if margin is None else margin
+
+        self.tracks = {}        # id -> Track
+        self._next_id = 1
+        self._since_full_scan = None
+
+        # 统计
+        self.full_scans = 0
+        self.window_scans = 0
+
+    def reset(self):
+        """清空全部轨迹，下一帧整区域扫描"""
+        self.tracks.clear()
+        self._since_full_scan = None
+
+    def retain(self, track_ids):
+        """
+        只保留指定的轨迹（例如排好队的备选目标），下一帧先在它们的旧位置附近窗口扫描
+
+        运动历史只留最后一个点：中间隔了很久，旧速度外推已经不可信。
+        """
+        keep = set(int(i) for i in track_ids)
+        for track_id in list(self.tracks):
+            if track_id not in keep:
+                del self.tracks[track_id]
+        for track in self.tracks.values():
+            last = track.history[-1]
+            track.history.clear()
+            track.history.append(last)
+            track.misses = 0
+        self._since_full_scan = 0 if self.tracks else None
+
+    # ==================== 匹配 ====================
+
+    def update(self, bars, timestamp):
+        """
+        用一帧的检测结果更新轨迹
+
+        :param bars: HP_BAR_DTYPE 结构化数组
+        :param timestamp: 帧时间戳（秒）
+        :return: 与 bars 一一对应的轨迹 ID 数组
+        """
+        ids = np.zeros(len(bars), dtype=np.int64)
+        tracks = list(self.tracks.values())
+
+        if tracks and len(bars):
+            predicted = np.array([track.predict(timestamp) for track in tracks])
+            dx = predicted[:, 0, np.newaxis] - bars['x'][np.newaxis, :]
+            dy = predicted[:, 1, np.newaxis] - bars['y'][np.newaxis, :]
+            dist = np.hypot(dx, dy)
+
+            # 贪心：从最近的一对开始，门限内且双方都未被占用才配对
+            order = np.argsort(dist, axis=None)
+            order = order[dist.flat[order] <= self.gate]
+            used_tracks = set()
+            for flat in order:
+                ti, bi = divmod(int(flat), len(bars))
+                if ti in used_tracks or ids[bi]:
+                    continue
+                used_tracks.add(ti)
+                tracks[ti].update(bars[bi], timestamp)
+                ids[bi] = tracks[ti].id
+        else:
+            used_tracks = set()
+
+        for ti, track in enumerate(tracks):
+            if ti not in used_tracks:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    del self.tracks[track.id]
+
+        # 没匹配上的检测结果开新轨迹
+        for bi in np.flatnonzero(ids == 0):
+            track = Track(self._next_id, bars[bi], timestamp, self.history)
+            self.tracks[track.id] = track
+            ids[bi] = track.id
+            self._next_id += 1
+
+        return ids
+
+    # ==================== 检测 ====================
+
+    def needs_full_scan(self):
+        """这一帧是否需要扫描整个检测区域（有轨迹丢失时也立即整区域扫描一次）"""
+        if not self.tracks or self._since_full_scan is None:
+            return True
+        if self._since_full_scan >= self.rescan_interval:
+            return True
+        # 窗口扫描刚丢了轨迹：可能移出了窗口，整区域找一次
+        return self._since_full_scan > 0 and any(t.misses == 1 for t in self.tracks.values())
+
+    def search_windows(self, timestamp):
+        """各轨迹预测位置附近的搜索窗口 [(x, y, w, h), ...]"""
+        windows = []
+        m = self.margin
+        for track in self.tracks.values():
+            x, y = track.predict(timestamp)
+            h = int(track.bar['h'])
+            windows.append((int(round(x)) - m, int(round(y)) - m,
+                            track.max_width + 2 * m, h + 2 * m))
+        return windows
+
+    def process(self, detector, image, origin=(0, 0), timestamp=0.0):
+        """
+        检测并更新轨迹（自动选择整区域扫描或窗口扫描）
+
+        :param detector: MonsterDetector
+        :param image: 截图（整帧或检测区域 ROI）
+        :param origin: image 左上角的客户区坐标
+        :param timestamp: 帧时间戳（秒）
+        :return: 本帧看到的轨迹列表
+        """
+        if self.needs_full_scan():
+            bars = detector.detect_hp_bars(image, origin)
+            self._since_full_scan = 0
+            self.full_scans += 1
+        else:
+            bars = detector.detect_hp_bars_in_windows(image, self.search_windows(timestamp), origin)
+            self._since_full_scan += 1
+            self.window_scans += 1
+
+        ids = self.update(bars, timestamp)
+        return [self.tracks[i] for i in ids]
+
+    # ==================== 查询 ====================
+
+    def get(self, track_id):
+        """按 ID 取轨迹，已删除时返回 None"""
+        return self.tracks.get(track_id)
+
+    def is_visible(self, track_id):
+        """轨迹在最近一帧是否被看到"""
+        track = self.tracks.get(track_id)
+        return track is not None and track.misses == 0
+
+    def visible_tracks(self):
+        """最近一帧被看到的轨迹"""
+        return [track for track in self.tracks.values() if track.misses == 0]
+
+    def visible_bars(self):
+        """
+        最近一帧看到的轨迹，按列返回，方便整体打分
+
+        :return: (bars, ids)，HP_BAR_DTYPE 结构化数组和对应的轨迹 ID 数组
+        """
+        tracks = self.visible_tracks()
+        bars = np.array([track.bar for track in tracks], dtype=HP_BAR_DTYPE)
+        ids = np.fromiter((track.id for track in tracks), dtype=np.int64, count=len(tracks))
+        return bars, ids
+
+    def nearest(self, player_pos=(512, 384)):
+        """最近一帧看到的轨迹中，点击位置离玩家最近的一个"""
+        tracks = self.visible_tracks()
+        if not tracks:
+            return None
+        clicks = np.array([track.click_pos for track in tracks])
+        d2 = ((clicks - np.asarray(player_pos)) ** 2).sum(axis=1)
+        return tracks[int(np.argmin(d2))]
+
+    def stats(self):
+        """返回统计信息"""
+        return {
+            'tracks': len(self.tracks),
+            'next_id': self._next_id,
+            'full_scans': self.full_scans,
+            'window_scans': self.window_scans,
+        }
\ No newline at end of file
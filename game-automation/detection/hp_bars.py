@@ -0,0 +1,158 @@
+"""
+血条候选 - 连通域统计 + NumPy 批量筛选，结果用结构化数组表示
+"""
+import cv2
+import numpy as np
+
+# 一行一个血条，坐标都是客户区坐标
+HP_BAR_DTYPE = np.dtype([
+    ('x', '<i4'),
+    ('y', '<i4'),
+    ('w', '<i4'),
+    ('h', '<i4'),
+    ('click_x', '<i4'),
+    ('click_y', '<i4'),
+    ('hp', '<f4'),       # 剩余血量比例 0~1
+])
+
+
+def find_mask_boxes(mask, sparse_pixels=4000):
+    """
+    求掩码中各连通块的外接矩形
+
+    红色像素少时 findContours 最快；像素多（技能特效、噪点）时轮廓数量暴增，
+    改用 connectedComponentsWithStats 一次性得到全部外接矩形。
+
+    :param mask: (h, w) uint8 掩码
+    :param sparse_pixels: 不超过该像素数时走 findContours
+    :return: (n, 4) int32 数组，每行 (x, y, w, h)
+    """
+    if cv2.countNonZero(mask) <= sparse_pixels:
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return np.array([cv2.boundingRect(contour) for contour in contours],
+                        dtype=np.int32).reshape(-1, 4)
+
+    _, _, stats, _ = cv2.connectedComponentsWithStatsWithAlgorithm(
+        mask, 8, cv2.CV_32S, cv2.CCL_GRANA)
+    return stats[1:, :4]  # 第0个是背景
+
+
+def filter_hp_bar_boxes(boxes, min_width, max_width, min_height, max_height, min_ratio):
+    """
+    按宽、高、宽高比批量筛选血条（与逐个判断的 _is_hp_bar 规则相同）
+
+    :param boxes: (n, 4) 数组，每行 (x, y, w, h)
+    :return: (n,) bool 数组
+    """
+    w = boxes[:, 2]
+    h = boxes[:, 3]
+    keep = (w >= min_width) & (w <= max_width)
+    keep &= (h >= min_height) & (h <= max_height) & (h > 0)
+    keep &= w >= min_ratio * h
+    return keep
+
+
+def make_hp_bars(boxes, origin=(0, 0), click_offset=50):
+    """
+    由外接矩形生成血条结构化数组
+
+    :param boxes: (n, 4) 数组，ROI 内坐标
+    :param origin: ROI 左上角的客户区坐标
+    :param click_offset: 点击位置在血条顶边下方的像素数
+    :return: HP_BAR_DTYPE 结构化数组
+    """
+    bars = np.empty(len(boxes), dtype=HP_BAR_DTYPE)
+    bars['x'] = boxes[:, 0] + origin[0]
+    bars['y'] = boxes[:, 1] + origin[1]
+    bars['w'] = boxes[:, 2]
+    bars['h'] = boxes[:, 3]
+    bars['click_x'] = bars['x'] + bars['w'] // 2
+    bars['click_y'] = bars['y'] + click_offset
+    bars['hp'] = 1.0
+    return bars
+
+
+def estimate_hp_fraction(image, bars, origin=(0, 0), max_width=50, empty_max_value=40,
+                         border=1, full_width=None):
+    """
+    批量估计各血条的剩余血量比例
+
+    红色连通块只是血条剩下的部分。沿每个血条中间一行、从红色末端向右，
+    统计连续的暗色像素（血条框里已经掉光的部分）长度，
+    剩余比例 = 红色长度 / (红色长度 + 空槽长度)。所有血条一次花式索引取出，没有逐个循环。
+
+    :param image: 检测用的 BGR 图像
+    :param bars: HP_BAR_DTYPE 结构化数组（客户区坐标）
+    :param origin: image 左上角的客户区坐标
+    :param max_width: 满血血条的最大宽度，空槽长度不会超过 max_width - 红色长度
+    :param empty_max_value: 空槽像素的最大亮度（BGR 三通道最大值）
+    :param border: 血条框右边框的宽度，从空槽长度中扣除
+    :param full_width: 已知满血宽度时直接用 红色长度 / full_width，不看血条框
+    :return: (n,) float32 数组
+    """
+    widths = bars['w'].astype(np.float32)
+    if len(bars) == 0:
+        return widths
+    if full_width:
+        return np.minimum(1.0, widths / full_width)
+
+    height, width = image.shape[:2]
+    steps = np.arange(max_width)
+    cols = (bars['x'] + bars['w'] - origin[0])[:, np.newaxis] + steps
+    rows = (bars['y'] + bars['h'] // 2 - origin[1])[:, np.newaxis]
+    inside = (cols < width) & (rows >= 0) & (rows < height)
+
+    strip = image[np.clip(rows, 0, height - 1), np.clip(cols, 0, width - 1)]  # (n, max_width, 3)
+    empty = (strip.max(axis=2) <= empty_max_value) & inside
+
+    # 从红色末端开始连续的暗色像素数
+    run = np.cumprod(empty, axis=1).sum(axis=1)
+    run = np.clip(run - border, 0, np.maximum(max_width - bars['w'], 0))
+    return widths / (widths + run)
+
+
+def bar_to_dict(bar):
+    """单个血条转换成旧接口的怪物字典"""
+    click_pos = (int(bar['click_x']), int(bar['click_y']))
+    return {
+        'click_pos': click_pos,
+        'hp_bar': (int(bar['x']), int(bar['y']), int(bar['w']), int(bar['h'])),
+        'center': click_pos,
+        'hp': float(bar['hp']),
+    }
+
+
+class HpBarList:
+    """
+    血条结果 - 底层是结构化数组，按需才生成旧的字典列表
+
+    len()/bool()/迭代/下标的用法和原来返回的列表一致；
+    需要批量计算的调用方直接用 .bars。
+    """
+
+    __slots__ = ('bars', '_dicts')
+
+    def __init__(self, bars):
+        self.bars = bars
+        self._dicts = None
+
+    def to_dicts(self):
+        """怪物字典列表（第一次访问时生成）"""
+        if self._dicts is None:
+            self._dicts = [bar_to_dict(bar) for bar in self.bars]
+        return self._dicts
+
+    def __len__(self):
+        return len(self.bars)
+
+    def __bool__(self):
+        return len(self.bars) > 0
+
+    def __iter__(self):
+        return iter(self.to_dicts())
+
+    def __getitem__(self, index):
+        return self.to_dicts()[index]
+
+    def __repr__(self):
+        return f"HpBarList({len(self.bars)} bars)"
\ No newline at end of file
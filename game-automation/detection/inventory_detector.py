@@ -0,0 +1,200 @@
+"""
+背包检测 - 背包面板按格子切分，每格算一个感知哈希，只对哈希变化的格子重新分类
+"""
+import cv2
+import numpy as np
+from utils.image_utils import crop_region
+
+EMPTY = 'empty'
+ITEM = 'item'
+
+
+def _popcount(values):
+    """uint64 数组每个元素中 1 的个数"""
+    bits = np.unpackbits(np.ascontiguousarray(values, dtype=np.uint64).view(np.uint8))
+    return bits.reshape(len(values), 64).sum(axis=1)
+
+
+class InventoryDetector:
+    """
+    背包格子检测器
+
+    整个面板一次 INTER_AREA 缩小，每个格子缩成 (hash_size + 3) 见方的小块，
+    去掉一圈边框后按相邻列的亮度差算 dHash（hash_size² 位），再加上平均亮度等级。
+    哈希与上次分类时的汉明距离不超过 max_distance、亮度等级相差不超过 1 时视为没变，
+    变了的格子先查 哈希 -> 类别 缓存，缓存没有才调用分类器。
+    """
+
+    def __init__(self, panel_region, grid=(5, 6), hash_size=8, max_distance=4,
+                 classifier=None, empty_std=8.0, cache_size=4096):
+        """
+        :param panel_region: 背包格子区域 (x, y, w, h)，客户区坐标，只包含格子
+        :param grid: (列数, 行数)
+        :param hash_size: dHash 边长，最大 8（64 位）
+        :param max_distance: 汉明距离超过该值才算格子变了（容忍截图噪声）
+        :param classifier: 格子分类函数 slot_image -> 类别；None 表示按亮度起伏区分 空/有物品
+        :param empty_std: 默认分类器中灰度标准差低于该值视为空格子
+        :param cache_size: 哈希 -> 类别 缓存的最大条目数
+        """
+        if not 2 <= hash_size <= 8:
+            raise ValueError(f"hash_size must be 2~8, got {hash_size}")
+        self.panel_region = tuple(panel_region)
+        self.grid = tuple(grid)
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        self.classifier = classifier or self.classify_slot
+        self.empty_std = empty_std
+        self.cache_size = cache_size
+
+        cols, rows = self.grid
+        self.slot_count = cols * rows
+        self._cell = hash_size + 3
+        self._cache = {}
+        self.reset()
+
+        # 统计
+        self.checks = 0
+        self.classified = 0
+        self.cache_hits = 0
+
+    def reset(self):
+        """忘掉所有格子的状态（面板位置变了、重新打开背包时调用），缓存保留"""
+        self.hashes = None
+        self.levels = None
+        self.classes = [None] * self.slot_count
+
+    # ==================== 哈希 ====================
+
+    def compute_hashes(self, panel):
+        """
+        :param panel: 面板图像（BGR 或灰度）
+        :return: ((n,) uint64 哈希, (n,) int16 亮度等级 0~15)，按行优先排列
+        """
+        cols, rows = self.grid
+        cell, size = self._cell, self.hash_size
+        gray = cv2.cvtColor(panel, cv2.COLOR_BGR2GRAY) if panel.ndim == 3 else panel
+        small = cv2.resize(gray, (cols * cell, rows * cell), interpolation=cv2.INTER_AREA)
+
+        # (rows, cell, cols, cell) -> (n, cell, cell)，去掉边框那一圈
+        blocks = small.reshape(rows, cell, cols, cell).swapaxes(1, 2).reshape(-1, cell, cell)
+        inner = blocks[:, 1:1 + size, 1:2 + size].astype(np.int16)
+
+        # 亮度差留 2 级死区，平坦区域的噪声不会让位来回翻转
+        bits = (inner[:, :, :-1] - inner[:, :, 1:] > 2).reshape(len(inner), -1)
+        packed = np.packbits(bits, axis=1, bitorder='little')
+        padded = np.zeros((len(inner), 8), np.uint8)
+        padded[:, :packed.shape[1]] = packed
+        hashes = padded.view('<u8').ravel()
+        levels = (inner.mean(axis=(1, 2)) / 16).astype(np.int16)
+        return hashes, levels
+
+    # ==================== 检测 ====================
+
+    def get_capture_region(self):
+        """需要截取的区域 (x, y, w, h)"""
+        return self.panel_region
+
+    def fits_client(self, width, height):
+        """背包面板是否完整位于 width x height 的客户区内（超出部分截不到，update 会报错）"""
+        x, y, w, h = self.panel_region
+        return w > 0 and h > 0 and x >= 0 and y >= 0 and x + w <= width and y + h <= height
+
+    def slot_region(self, index):
+        """第 index 个格子（行优先）的客户区区域 (x, y, w, h)"""
+        cols, rows = self.grid
+        x, y, w, h = self.panel_region
+        row, col = divmod(index, cols)
+        x0, x1 = x + col * w // cols, x + (col + 1) * w // cols
+        y0, y1 = y + row * h // rows, y + (row + 1) * h // rows
+        return x0, y0, x1 - x0, y1 - y0
+
+    def update(self, image, origin=(0, 0)):
+        """
+        用新截图更新各格子的类别
+
+        :param image: 包含背包面板的截图
+        :param origin: image 左上角的客户区坐标
+        :return: 变化的格子下标数组（第一次调用时是全部格子）
+        """
+        panel, _ = crop_region(image, self.panel_region, origin)
+        x, y, w, h = self.panel_region
+        if panel.shape[:2] != (h, w):
+            raise ValueError(f"image does not contain inventory panel {self.panel_region}")
+
+        self.checks += 1
+        hashes, levels = self.compute_hashes(panel)
+        if self.hashes is None:
+            changed = np.arange(self.slot_count)
+            self.hashes, self.levels = hashes, levels
+        else:
+            distance = _popcount(hashes ^ self.hashes)
+            changed = np.flatnonzero((distance > self.max_distance)
+                                     | (np.abs(levels - self.levels) > 1))
+            # 只更新变了的格子，没变的保持上次分类时的哈希，缓慢漂移不会被漏掉
+            self.hashes[changed] = hashes[changed]
+            self.levels[changed] = levels[changed]
+
+        for i in changed.tolist():
+            key = (int(hashes[i]), int(levels[i]))
+            label = self._cache.get(key)
+            if label is None:
+                label = self.classifier(self._slot_image(panel, i))
+                self.classified += 1
+                self._remember(key, label)
+            else:
+                self.cache_hits += 1
+            self.classes[i] = label
+        return changed
+
+    def learn_empty(self, image, origin=(0, 0), slots=None):
+        """
+        把当前画面中的格子记为空格子（空格子有花纹、默认分类器分不出来时使用）
+
+        :param slots: 空格子的下标，None 表示全部
+        """
+        panel, _ = crop_region(image, self.panel_region, origin)
+        hashes, levels = self.compute_hashes(panel)
+        for i in (range(self.slot_count) if slots is None else slots):
+            self._remember((int(hashes[i]), int(levels[i])), EMPTY)
+        self.reset()
+
+    def _remember(self, key, label):
+        if self._cache and len(self._cache) >= self.cache_size:
+            # 字典按插入顺序，丢掉最早的一条
+            del self._cache[next(iter(self._cache))]
+        self._cache[key] = label
+
+    def _slot_image(self, panel, index):
+        x, y, w, h = self.slot_region(index)
+        return panel[y - self.panel_region[1]:y - self.panel_region[1] + h,
+                     x - self.panel_region[0]:x - self.panel_region[0] + w]
+
+    def classify_slot(self, slot):
+        """默认分类器：格子中间部分灰度起伏很小就是空格子"""
+        h, w = slot.shape[:2]
+        center = slot[h // 4:h - h // 4, w // 4:w - w // 4]
+        gray = cv2.cvtColor(center, cv2.COLOR_BGR2GRAY) if center.ndim == 3 else center
+        return EMPTY if gray.std() < self.empty_std else ITEM
+
+    # ==================== 查询 ====================
+
+    def free_slots(self):
+        """空格子的下标列表"""
+        return [i for i, label in enumerate(self.classes) if label == EMPTY]
+
+    def occupied_count(self):
+        """有物品的格子数（还没检测过的格子不算）"""
+        return sum(1 for label in self.classes if label not in (None, EMPTY))
+
+    def is_full(self):
+        """所有格子都有物品"""
+        return self.hashes is not None and not self.free_slots()
+
+    def stats(self):
+        """返回统计信息"""
+        return {
+            'checks': self.checks,
+            'classified': self.classified,
+            'cache_hits': self.cache_hits,
+            'cache_size': len(self._cache),
+        }
\ No newline at end of file
@@ -0,0 +1,299 @@
+"""
+物品检测 - 在击杀位置附近按物品名称模板查找地上的掉落，模板和金字塔只加载一次
+"""
+import os
+import threading
+import cv2
+import numpy as np
+from utils.image_utils import crop_region
+
+# 一行一个掉落物品，坐标都是客户区坐标
+ITEM_DTYPE = np.dtype([
+    ('x', '<i4'),
+    ('y', '<i4'),
+    ('w', '<i4'),
+    ('h', '<i4'),
+    ('template', '<i4'),  # 模板下标，名称见 ItemDetector.names
+    ('score', '<f4'),     # 全分辨率归一化相关系数 0~1
+])
+
+TEMPLATE_EXTENSIONS = ('.png', '.bmp', '.jpg')
+
+
+class ItemTemplate:
+    """一个物品名称模板及其预先计算的数据"""
+
+    __slots__ = ('name', 'image', 'pyramid', 'background', 'label_box')
+
+    def __init__(self, name, image, levels=1):
+        """
+        :param name: 物品名
+        :param image: BGR 模板图（物品名称标签的截图）
+        :param levels: 金字塔层数，pyramid[i] 是缩小 2^i 倍的灰度图
+        """
+        self.name = name
+        self.image = image
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        self.pyramid = [gray]
+        for _ in range(levels):
+            self.pyramid.append(cv2.pyrDown(self.pyramid[-1]))
+
+        # 标签底色取四条边的中位数；label_box 是底色区域在模板里的外接矩形
+        border = np.concatenate([image[0], image[-1], image[:, 0], image[:, -1]])
+        self.background = np.median(border, axis=0)
+        self.label_box = (0, 0, image.shape[1], image.shape[0])
+
+    @property
+    def size(self):
+        """(宽, 高)"""
+        return self.image.shape[1], self.image.shape[0]
+
+
+# 按 (路径, 修改时间, 层数) 缓存的模板，所有检测器共用
+_TEMPLATES = {}
+_TEMPLATES_LOCK = threading.Lock()
+
+
+def load_template(path, levels=1):
+    """读取模板文件（文件名去掉扩展名即物品名），文件没变时直接返回缓存"""
+    path = os.path.abspath(path)
+    key = (path, os.path.getmtime(path), levels)
+    with _TEMPLATES_LOCK:
+        template = _TEMPLATES.get(key)
+    if template is None:
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"cannot read template: {path}")
+        template = ItemTemplate(os.path.splitext(os.path.basename(path))[0], image, levels)
+        with _TEMPLATES_LOCK:
+            _TEMPLATES[key] = template
+    return template
+
+
+class ItemDetector:
+    """
+    掉落物品检测器
+
+    只在击杀位置周围的 ROI 里找。所有模板的标签底色一致时（游戏里的物品名称标签通常如此），
+    先用底色掩码 + 连通块找出标签框，再只拿宽高相近的模板比对：
+    金字塔顶层粗比排序，前 max_verify 个在全分辨率小窗口里精比。
+    底色不一致时退回逐个模板在金字塔顶层全 ROI 匹配、峰值处全分辨率精比（慢得多）。
+    """
+
+    def __init__(self, template_dir=None, levels=1, threshold=0.85, coarse_threshold=0.6,
+                 roi_size=(320, 200), background_tolerance=12, size_tolerance=3, max_verify=3):
+        """
+        :param template_dir: 模板目录，None 表示之后用 load_templates/add_template 添加
+        :param levels: 金字塔层数（粗比在缩小 2^levels 倍的图上进行）
+        :param threshold: 全分辨率相关系数超过该值才算找到
+        :param coarse_threshold: 粗比相关系数低于该值的候选不再精比
+        :param roi_size: 以击杀位置为中心的搜索区域 (宽, 高)
+        :param background_tolerance: 标签底色每个通道的允许偏差
+        :param size_tolerance: 标签框与模板宽高的允许偏差（像素）
+        :param max_verify: 每个标签框最多精比几个模板
+        """
+        self.levels = levels
+        self.threshold = threshold
+        self.coarse_threshold = coarse_threshold
+        self.roi_size = roi_size
+        self.background_tolerance = background_tolerance
+        self.size_tolerance = size_tolerance
+        self.max_verify = max_verify
+
+        self.templates = []
+        self.names = []
+        self.background = None      # 所有模板共同的标签底色（BGR），None 表示没有
+        self._sizes = np.empty((0, 2), np.int32)
+        self._label_sizes = np.empty((0, 2), np.int32)
+
+        if template_dir:
+            self.load_templates(template_dir)
+
+    # ==================== 模板 ====================
+
+    def load_templates(self, directory):
+        """
+        读取目录下的所有模板图片
+        :return: 读到的模板数
+        """
+        if not os.path.isdir(directory):
+            print(f"⚠️ 物品模板目录不存在: {directory}")
+            return 0
+        count = 0
+        for filename in sorted(os.listdir(directory)):
+            if filename.lower().endswith(TEMPLATE_EXTENSIONS):
+                self._add(load_template(os.path.join(directory, filename), self.levels))
+                count += 1
+        self._update_index()
+        return count
+
+    def add_template(self, name, image):
+        """直接添加一张 BGR 模板图"""
+        self._add(ItemTemplate(name, image, self.levels))
+        self._update_index()
+
+    def _add(self, template):
+        self.templates.append(template)
+        self.names.append(template.name)
+
+    def _update_index(self):
+        """重新计算共同底色、各模板标签框和尺寸表（添加模板后调用）"""
+        self._sizes = np.array([t.size for t in self.templates], np.int32).reshape(-1, 2)
+        self.background = None
+        if not self.templates:
+            return
+
+        backgrounds = np.array([t.background for t in self.templates])
+        common = np.median(backgrounds, axis=0)
+        if np.abs(backgrounds - common).max() > self.background_tolerance:
+            self._label_sizes = self._sizes
+            return
+
+        self.background = common
+        for template in self.templates:
+            boxes = self._background_boxes(template.image)
+            if len(boxes):
+                # 最大的底色块就是标签本身
+                template.label_box = tuple(int(v) for v in boxes[np.argmax(boxes[:, 2] * boxes[:, 3])])
+        self._label_sizes = np.array([t.label_box[2:] for t in self.templates], np.int32)
+
+    # ==================== 检测 ====================
+
+    def get_capture_region(self, kill_pos):
+        """
+        搜索掉落需要的截图区域
+        :param kill_pos: 击杀位置（怪物点击位置），客户区坐标
+        :return: (x, y, w, h) 客户区坐标
+        """
+        w, h = self.roi_size
+        return (max(0, kill_pos[0] - w // 2), max(0, kill_pos[1] - h // 2), w, h)
+
+    def detect_items(self, image, kill_pos, origin=(0, 0)):
+        """
+        在击杀位置附近查找掉落物品
+        :param image: 截图（整帧或包含搜索区域的 ROI）
+        :param kill_pos: 击杀位置，客户区坐标
+        :param origin: image 左上角的客户区坐标
+        :return: ITEM_DTYPE 结构化数组，按得分从高到低
+        """
+        roi, (roi_x, roi_y) = crop_region(image, self.get_capture_region(kill_pos), origin)
+        if roi.size == 0 or not self.templates:
+            return np.empty(0, dtype=ITEM_DTYPE)
+
+        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        if self.background is not None:
+            found = self._match_labels(roi, gray)
+        else:
+            found = self._match_exhaustive(self._pyramid(gray))
+
+        items = np.array(found, dtype=ITEM_DTYPE) if found else np.empty(0, dtype=ITEM_DTYPE)
+        items = items[np.argsort(-items['score'], kind='stable')]
+        items['x'] += roi_x
+        items['y'] += roi_y
+        return items
+
+    def item_names(self, items):
+        """检测结果对应的物品名列表"""
+        return [self.names[i] for i in items['template']]
+
+    def _background_boxes(self, image):
+        """底色掩码中各连通块的外接矩形 (n, 4)"""
+        tol = self.background_tolerance
+        lower = np.clip(self.background - tol, 0, 255)
+        upper = np.clip(self.background + tol, 0, 255)
+        mask = cv2.inRange(image, lower, upper)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        return stats[1:, :4]
+
+    def _match_labels(self, roi, gray):
+        """标签框 -> 尺寸相近的模板 -> 粗比排序 -> 精比"""
+        tol = self.size_tolerance
+        step = 1 << self.levels
+        boxes = self._background_boxes(roi)
+        low = self._label_sizes.min(axis=0) - tol
+        high = self._label_sizes.max(axis=0) + tol
+        keep = np.all((boxes[:, 2:] >= low) & (boxes[:, 2:] <= high), axis=1)
+
+        found = []
+        for x, y, w, h in boxes[keep].tolist():
+            close = np.flatnonzero(np.all(np.abs(self._label_sizes - (w, h)) <= tol, axis=1)).tolist()
+            if not close:
+                continue
+
+            # 模板左上角 = 标签框左上角 - 标签框在模板里的偏移
+            offsets = [(x - self.templates[i].label_box[0], y - self.templates[i].label_box[1])
+                       for i in close]
+            # 只缩小标签附近的窗口，窗口起点与模板左上角对齐，缩小后的像素与模板金字塔一一对应
+            x0 = max(0, min(ox for ox, _ in offsets) - step)
+            y0 = max(0, min(oy for _, oy in offsets) - step)
+            x1 = max(ox + self.templates[i].size[0] for i, (ox, _) in zip(close, offsets)) + step
+            y1 = max(oy + self.templates[i].size[1] for i, (_, oy) in zip(close, offsets)) + step
+            small = self._pyramid(gray[y0:y1, x0:x1])[-1]
+            coarse = [self._score(small, self.templates[i].pyramid[-1],
+                                  (ox - x0) >> self.levels, (oy - y0) >> self.levels, 1)[0]
+                      for i, (ox, oy) in zip(close, offsets)]
+            order = np.argsort(coarse)[::-1][:self.max_verify]
+
+            best = None
+            for j in order.tolist():
+                if coarse[j] < self.coarse_threshold:
+                    break
+                i = close[j]
+                score, (bx, by) = self._score(gray, self.templates[i].pyramid[0],
+                                              offsets[j][0], offsets[j][1], step)
+                if score >= self.threshold and (best is None or score > best[-1]):
+                    tw, th = self.templates[i].size
+                    best = (bx, by, tw, th, i, score)
+            if best is not None:
+                found.append(best)
+        return found
+
+    def _match_exhaustive(self, pyramid):
+        """没有共同底色时：每个模板在金字塔顶层全 ROI 匹配，峰值处全分辨率精比"""
+        top = pyramid[-1]
+        found = []
+        for i, template in enumerate(self.templates):
+            small = template.pyramid[-1]
+            if small.shape[0] > top.shape[0] or small.shape[1] > top.shape[1]:
+                continue
+            result = cv2.matchTemplate(top, small, cv2.TM_CCOEFF_NORMED)
+            peaks = (result >= self.coarse_threshold) & (result == cv2.dilate(result, None))
+            for y, x in zip(*np.nonzero(peaks)):
+                score, (bx, by) = self._score(pyramid[0], template.pyramid[0],
+                                              int(x) << self.levels, int(y) << self.levels,
+                                              1 << self.levels)
+                if score >= self.threshold:
+                    tw, th = template.size
+                    found.append((bx, by, tw, th, i, score))
+
+        # 同一位置被多个模板匹配到时只留得分最高的
+        found.sort(key=lambda item: -item[-1])
+        kept = []
+        for item in found:
+            if all(abs(item[0] - k[0]) >= min(item[2], k[2]) // 2 or abs(item[1] - k[1]) >= k[3] // 2
+                   for k in kept):
+                kept.append(item)
+        return kept
+
+    def _pyramid(self, gray):
+        """[原图, 缩小 2 倍, ...]，共 levels + 1 层"""
+        pyramid = [gray]
+        for _ in range(self.levels):
+            pyramid.append(cv2.pyrDown(pyramid[-1]))
+        return pyramid
+
+    @staticmethod
+    def _score(image, template, x, y, search):
+        """
+        模板放在 (x, y) 附近 ±search 像素内的最大相关系数
+        :return: (score, (x, y))，窗口放不下模板时 score 为 -1
+        """
+        th, tw = template.shape
+        x0, y0 = max(0, x - search), max(0, y - search)
+        x1 = min(image.shape[1], x + tw + search)
+        y1 = min(image.shape[0], y + th + search)
+        if x1 - x0 < tw or y1 - y0 < th:
+            return -1.0, (x, y)
+        result = cv2.matchTemplate(image[y0:y1, x0:x1], template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (dx, dy) = cv2.minMaxLoc(result)
+        return score, (x0 + dx, y0 + dy)
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+击杀预测 - 根据血量比例随时间的下降速度预测多久后击杀，决定下一次探测的间隔
+"""
+from collections import deque
+
+
+class KillPredictor:
+    """
+    击杀时间预测器
+
+    用最近一段时间的 (时间, 剩余血量) 做最小二乘拟合得到掉血速度，
+    预计剩余时间 = 剩余血量 / 掉血速度。下一次探测间隔取预计剩余时间的 lead 倍，
+    离击杀越近间隔越短：前期粗略地睡，快打死时密集探测。
+    血条长时间不减少（打不到、怪物回血）时 stalled() 为 True，调用方可以提前放弃。
+    """
+
+    def __init__(self, min_interval=0.05, max_interval=0.5, lead=0.5, window=2.0,
+                 stall_timeout=3.0, min_drop=0.05):
+        """
+        :param min_interval: 最短探测间隔（秒）
+        :param max_interval: 最长探测间隔（秒），还没有预测时也用它
+        :param lead: 下一次间隔 = 预计剩余时间 * lead
+        :param window: 拟合掉血速度使用的时间窗口（秒）
+        :param stall_timeout: 血量这么久没有明显下降就判定为打不动（秒）
+        :param min_drop: 算作“明显下降”的最小血量比例
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.lead = lead
+        self.window = window
+        self.stall_timeout = stall_timeout
+        self.min_drop = min_drop
+
+        self.samples = deque()      # [(timestamp, fraction), ...]
+        self._reference = None      # 上一次明显下降后的血量
+        self._last_drop = None      # 上一次明显下降的时间
+
+    def reset(self):
+        """清空历史，开始预测新的目标"""
+        self.samples.clear()
+        self._reference = None
+        self._last_drop = None
+
+    def add(self, timestamp, fraction):
+        """
+        记录一次探测结果
+
+        :param timestamp: 探测时间（秒，与 clock 同源）
+        :param fraction: 剩余血量比例 0~1
+        """
+        self.samples.append((timestamp, fraction))
+        while self.samples and timestamp - self.samples[0][0] > self.window:
+            self.samples.popleft()
+
+        if self._reference is None:
+            self._reference = fraction
+            self._last_drop = timestamp
+        elif self._reference - fraction >= self.min_drop:
+            self._reference = fraction
+            self._last_drop = timestamp
+        elif fraction > self._reference:
+            # 回血：以新的血量为基准，但不算有进展
+            self._reference = fraction
+
+    def drain_rate(self):
+        """掉血速度（血量比例/秒，正数表示在掉血），样本不足时返回 None"""
+        n = len(self.samples)
+        if n < 2:
+            return None
+        t0 = self.samples[0][0]
+        mean_t = sum(t - t0 for t, _ in self.samples) / n
+        mean_f = sum(f for _, f in self.samples) / n
+        var = sum((t - t0 - mean_t) ** 2 for t, _ in self.samples)
+        if var <= 0:
+            return None
+        cov = sum((t - t0 - mean_t) * (f - mean_f) for t, f in self.samples)
+        return -cov / var
+
+    def time_to_death(self):
+        """预计还要多少秒击杀，没在掉血时返回 None"""
+        rate = self.drain_rate()
+        if not rate or rate <= 0:
+            return None
+        return self.samples[-1][1] / rate
+
+    def next_interval(self):
+        """下一次探测前应等待的秒数"""
+        remaining = self.time_to_death()
+        if remaining is None:
+            return self.max_interval
+        return min(self.max_interval, max(self.min_interval, remaining * self.lead))
+
+    def stalled(self, now):
+        """血量是否已经 stall_timeout 秒没有明显下降"""
+        return self._last_drop is not None and now - self._last_drop >= self.stall_timeout
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+存活探针 - 只截取、只分类目标血条附近的小窗口，判断怪物是否还活着以及剩余血量比例
+"""
+import time
+import cv2
+import numpy as np
+from utils.image_utils import crop_region
+from detection.red_classifier import get_red_classifier
+
+
+class ProbeResult:
+    """一次探测的结果"""
+
+    __slots__ = ('alive', 'fraction', 'red_pixels', 'timestamp')
+
+    def __init__(self, alive, fraction, red_pixels, timestamp):
+        self.alive = alive            # 血条是否还在
+        self.fraction = fraction      # 剩余血量比例（红色列数 / 满血宽度），0~1
+        self.red_pixels = red_pixels  # 窗口内红色像素数
+        self.timestamp = timestamp    # 探测所用截图的时间戳
+
+    def __repr__(self):
+        return f"ProbeResult(alive={self.alive}, fraction={self.fraction:.2f})"
+
+
+class LivenessProbe:
+    """
+    目标血条存活探针
+
+    窗口只比血条大一圈（几十 x 十几像素），分类 + 统计远小于 1ms，
+    可以跟着截图帧率（20Hz 以上）轮询，而不是每隔 1.5 秒整区域重新检测。
+    """
+
+    def __init__(self, detector, hp_bar, full_width=None, margin=4, min_pixels=5):
+        """
+        :param detector: 提供血条 HSV 阈值的检测器（MonsterDetector / DeathDetector）
+        :param hp_bar: 目标血条 (x, y, w, h)，客户区坐标
+        :param full_width: 满血时的血条宽度，默认取 hp_bar 的宽度
+        :param margin: 窗口向外扩展的像素数，容忍怪物轻微移动
+        :param min_pixels: 红色像素超过该数量才算血条还在（同 DeathDetector）
+        """
+        x, y, w, h = hp_bar
+        self.classifier = get_red_classifier(detector)
+        self.full_width = max(1, full_width or w)
+        self.min_pixels = min_pixels
+        self.region = (x - margin, y - margin, self.full_width + 2 * margin, h + 2 * margin)
+
+        self._buffer = None
+        self._columns = None
+
+    def check(self, image, origin=(0, 0), timestamp=None):
+        """
+        在已有截图上探测（截图只要覆盖探针窗口即可，可以是整帧、检测区域或探针窗口本身）
+
+        :param image: BGR 截图
+        :param origin: image 左上角的客户区坐标
+        :param timestamp: 截图时间戳，None 表示当前时间
+        :return: ProbeResult
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        roi, _ = crop_region(image, self.region, origin)
+        if roi.size == 0:
+            return ProbeResult(False, 0.0, 0, timestamp)
+
+        mask = self.classifier.classify(roi)
+        red_pixels = cv2.countNonZero(mask)
+
+        # 剩余血量按有红色的列数计算，血条高度和抗锯齿边缘不影响比例
+        if self._columns is None or self._columns.shape[1] != mask.shape[1]:
+            self._columns = np.empty((1, mask.shape[1]), dtype=np.uint8)
+        cv2.reduce(mask, 0, cv2.REDUCE_MAX, dst=self._columns)
+        fraction = min(1.0, cv2.countNonZero(self._columns) / self.full_width)
+
+        return ProbeResult(red_pixels > self.min_pixels, fraction, red_pixels, timestamp)
+
+    def locate_bar(self, image, origin=(0, 0)):
+        """
+        在探针窗口里找出最宽的红色连通块，即血条本身（窗口比血条宽时用它重建探针）
+
+        :param image: BGR 截图
+        :param origin: image 左上角的客户区坐标
+        :return: 血条 (x, y, w, h)，客户区坐标；窗口里没有红色时返回 None
+        """
+        roi, (rx, ry) = crop_region(image, self.region, origin)
+        if roi.size == 0:
+            return None
+        mask = self.classifier.classify(roi)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if count <= 1:
+            return None
+        best = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_WIDTH]))
+        x, y, w, h = (int(v) for v in stats[best, :4])
+        return (rx + x, ry + y, w, h)
+
+    def poll(self, capturer):
+        """
+        只截取探针窗口并探测
+
+        :param capturer: 提供 capture_to_numpy(region=..., out=..., copy=...) 的截图器
+        :return: ProbeResult
+        """
+        if self._buffer is not None:
+            try:
+                image = capturer.capture_to_numpy(out=self._buffer, region=self.region)
+            except ValueError:
+                # 窗口贴着客户区边缘，实际截到的尺寸和缓冲区不一致
+                self._buffer = None
+        if self._buffer is None:
+            image = capturer.capture_to_numpy(region=self.region, copy=False)
+            self._buffer = np.empty_like(image)
+
+        x = max(0, self.region[0])
+        y = max(0, self.region[1])
+        return self.check(image, (x, y))
\ No newline at end of file
@@ -1,9 +1,34 @@
 """
 怪物检测器 - 优化点击位置
 """
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import cv2
 import numpy as np
 from typing import List, Tuple, Optional
+from utils.image_utils import crop_region
+from detection.change_detector import FrameChangeDetector
+from detection.red_classifier import get_red_classifier
+from detection.hp_bars import (HpBarList, bar_to_dict, find_mask_boxes,
+                                filter_hp_bar_boxes, make_hp_bars, estimate_hp_fraction)
+from detection.batch_detect import detect_batch
+
+# 连接血条断点用的闭运算核
+_CLOSE_KERNEL = np.ones((2, 2), np.uint8)
+
+
+def _merge_ranges(indices, pad, limit):
+    """
+    有序下标各向两边扩展 pad 后合并重叠部分
+    :return: [(start, stop), ...]，已裁剪到 [0, limit)
+    """
+    if not len(indices):
+        return []
+    starts = np.maximum(indices - pad, 0)
+    stops = np.minimum(indices + 1 + pad, limit)
+    breaks = np.flatnonzero(starts[1:] > stops[:-1])
+    return list(zip(starts[np.r_[0, breaks + 1]].tolist(), stops[np.r_[breaks, len(stops) - 1]].tolist()))
+
 
 class MonsterDetector:
     """怪物检测器 - 专为细血条优化"""
@@ -15,13 +40,19 @@ class MonsterDetector:
         self.hp_bar_lower2 = np.array([170, 100, 100])
         self.hp_bar_upper2 = np.array([180, 255, 255])
         
-        # 检测区域
+        # 检测区域（像素值对应 1024x768 客户区，其他分辨率用 set_client_size 按比例换算）
         self.detect_region = {
             'x': 100,
             'y': 100,
             'width': 800,
             'height': 450
         }
+        self.client_size = (1024, 768)
+        self.detect_region_relative = (100 / 1024, 100 / 768, 800 / 1024, 450 / 768)
+        
+        # 点击位置在血条顶边下方的距离（客户区高度的比例 / 像素）
+        self.click_offset_relative = 50 / 768
+        self.click_offset = 50
         
         # 血条特征 30x2
         self.hp_bar_min_width = 15
@@ -29,49 +60,323 @@ class MonsterDetector:
         self.hp_bar_min_height = 1
         self.hp_bar_max_height = 5
         self.hp_bar_min_ratio = 5.0
+        
+        # 剩余血量估计：血条框里空槽的最大亮度；已知满血宽度时填 hp_bar_full_width
+        self.hp_bar_empty_max_value = 40
+        self.hp_bar_full_width = None
+        
+        # 红色像素不超过该数量时用 findContours，否则用连通域统计
+        self.sparse_mask_pixels = 4000
+        
+        # 检测区域超过该像素数时先在 coarse_scale 倍下采样图上粗扫候选行，只在这些行全分辨率细扫
+        self.coarse_min_pixels = 500000
+        self.coarse_scale = 2
+        # 粗扫掩码缓冲区（每个线程一份；细扫时分类器的临时掩码会被覆盖，不能借用）
+        self._coarse_local = threading.local()
+        
+        # 分块多线程检测（默认关闭），见 enable_tiling
+        self.tile_workers = 1
+        self.tile_min_pixels = 1000000
+        self._tile_pool = None
+        
+        # 画面变化检测（默认关闭），画面没变时复用上一次结果
+        self.change_detector = None
+        self._last_result = None
+        self._last_origin = None
+    
+    def hp_bar_params(self):
+        """
+        当前的血条检测参数（config.yaml 的 hp_bar_detection 段落，标定工具也用这组键）
+        """
+        return {
+            'hue_low_max': int(self.hp_bar_upper[0]),
+            'hue_high_min': int(self.hp_bar_lower2[0]),
+            'saturation_min': int(self.hp_bar_lower[1]),
+            'value_min': int(self.hp_bar_lower[2]),
+            'min_width': int(self.hp_bar_min_width),
+            'max_width': int(self.hp_bar_max_width),
+            'min_height': int(self.hp_bar_min_height),
+            'max_height': int(self.hp_bar_max_height),
+            'min_ratio': float(self.hp_bar_min_ratio),
+        }
     
-    def detect_monsters_by_hp_bar(self, image):
+    def apply_hp_bar_params(self, params):
         """
-        检测怪物 - 返回怪物信息字典列表
+        设置血条检测参数，键同 hp_bar_params()，缺少的键保持不变
+        红色两段色相分别是 [0, hue_low_max] 和 [hue_high_min, 180]，饱和度/亮度下限两段共用
+        """
+        params = dict(self.hp_bar_params(), **(params or {}))
+        self.hp_bar_lower = np.array([0, params['saturation_min'], params['value_min']])
+        self.hp_bar_upper = np.array([params['hue_low_max'], 255, 255])
+        self.hp_bar_lower2 = np.array([params['hue_high_min'], params['saturation_min'],
+                                       params['value_min']])
+        self.hp_bar_upper2 = np.array([180, 255, 255])
+        self.hp_bar_min_width = int(params['min_width'])
+        self.hp_bar_max_width = int(params['max_width'])
+        self.hp_bar_min_height = int(params['min_height'])
+        self.hp_bar_max_height = int(params['max_height'])
+        self.hp_bar_min_ratio = float(params['min_ratio'])
+        
+        # 阈值变了，缓存的检测结果作废
+        if self.change_detector is not None:
+            self.change_detector.reset()
+        self._last_result = None
+    
+    def enable_change_detection(self, cell=4, threshold=12, max_skip=10):
+        """
+        开启画面变化检测：检测区域几乎没变时跳过 HSV/轮廓计算
+        参数见 FrameChangeDetector
+        """
+        self.change_detector = FrameChangeDetector(cell, threshold, max_skip)
+        self._last_result = None
+        self._last_origin = None
+        return self.change_detector
+    
+    def set_client_size(self, width, height):
+        """
+        按客户区大小换算检测区域和点击偏移
+        :param width: 客户区宽度
+        :param height: 客户区高度
+        """
+        rx, ry, rw, rh = self.detect_region_relative
+        self.detect_region = {
+            'x': int(round(rx * width)),
+            'y': int(round(ry * height)),
+            'width': int(round(rw * width)),
+            'height': int(round(rh * height))
+        }
+        self.click_offset = max(1, int(round(self.click_offset_relative * height)))
+        self.client_size = (width, height)
+        
+        # 检测区域变了，缓存的检测结果作废
+        if self.change_detector is not None:
+            self.change_detector.reset()
+        self._last_result = None
+    
+    def enable_tiling(self, workers=4, min_pixels=1000000):
+        """
+        开启分块多线程检测：检测区域切成上下相互重叠的横条，交给线程池并行处理
+        HSV 转换、inRange、形态学、轮廓都在 OpenCV 里释放 GIL，线程可以真正并行。
+        默认不开启：粗扫+细扫路径下每块的工作量很小，实测分块反而更慢（bench_tiled_detect.py），
+        只在多核机器上确认有提升后再用
+        :param workers: 线程数（也是横条数），<=1 表示关闭
+        :param min_pixels: 检测区域超过该像素数才分块，小区域分块的调度开销不划算
+        """
+        if self._tile_pool is not None:
+            self._tile_pool.shutdown()
+            self._tile_pool = None
+        self.tile_workers = max(1, int(workers))
+        self.tile_min_pixels = min_pixels
+        if self.tile_workers > 1:
+            self._tile_pool = ThreadPoolExecutor(self.tile_workers,
+                                                 thread_name_prefix='hp-bar-tile')
+    
+    def get_capture_region(self):
+        """
+        检测需要的截图区域，截图端只需截取这部分像素
+        :return: (x, y, w, h) 客户区坐标
         """
         region = self.detect_region
-        roi = image[region['y']:region['y']+region['height'], 
-                   region['x']:region['x']+region['width']]
+        return (region['x'], region['y'], region['width'], region['height'])
+    
+    def detect_monsters_by_hp_bar(self, image, origin=(0, 0)):
+        """
+        检测怪物 - 返回怪物信息列表
+        :param image: 整帧截图，或按 get_capture_region() 截取的 ROI
+        :param origin: image 左上角的客户区坐标（整帧为 (0, 0)）
+        :return: HpBarList，用法同字典列表；批量计算请用 .bars 结构化数组
+        """
+        return HpBarList(self.detect_hp_bars(image, origin))
+    
+    def detect_hp_bars(self, image, origin=(0, 0)):
+        """
+        检测血条 - 返回结构化数组（HP_BAR_DTYPE），不生成字典
+        参数同 detect_monsters_by_hp_bar
+        """
+        roi, (roi_x, roi_y) = crop_region(image, self.get_capture_region(), origin)
+        if roi.size == 0:
+            return make_hp_bars(np.empty((0, 4), np.int32))
         
-        hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
+        if self.change_detector is not None:
+            # 检测区域位置变了，之前的签名不可比
+            if self._last_origin != (roi_x, roi_y):
+                self.change_detector.reset()
+            if self.change_detector.unchanged(roi):
+                return self._last_result
         
-        mask1 = cv2.inRange(hsv, self.hp_bar_lower, self.hp_bar_upper)
-        mask2 = cv2.inRange(hsv, self.hp_bar_lower2, self.hp_bar_upper2)
-        mask = cv2.bitwise_or(mask1, mask2)
+        bars = self._detect_in_roi(roi, roi_x, roi_y)
         
-        kernel = np.ones((2, 2), np.uint8)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=1)
+        if self.change_detector is not None:
+            bars.flags.writeable = False  # 会被后续帧复用，不允许调用方修改
+            self._last_result = bars
+            self._last_origin = (roi_x, roi_y)
         
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return bars
+    
+    def detect_batch(self, frames, origins=None, workers=1, chunk_frames=64):
+        """
+        批量检测多帧（离线分析、参数标定用），不使用画面变化检测
+        :param frames: (N, H, W, 3) 数组、np.memmap、FrameFile 或录制文件路径
+        :param workers: 进程数，>1 时分块交给进程池
+        :return: BATCH_DTYPE 结构化数组，列为 frame, x, y, w, h, click_x, click_y, hp
+        """
+        return detect_batch(self, frames, origins, workers, chunk_frames)
+    
+    def detect_hp_bars_in_windows(self, image, windows, origin=(0, 0)):
+        """
+        只在若干小窗口里检测血条（配合 HpBarTracker，窗口来自轨迹的预测位置）
+        :param windows: 客户区坐标的窗口列表 [(x, y, w, h), ...]，会被裁剪到检测区域内
+        :return: HP_BAR_DTYPE 结构化数组，重叠窗口里的同一个血条只保留一次
+        """
+        region_image, region_origin = crop_region(image, self.get_capture_region(), origin)
+        region_h, region_w = region_image.shape[:2]
         
-        monsters = []
-        for contour in contours:
-            x, y, w, h = cv2.boundingRect(contour)
-            
-            if not self._is_hp_bar(w, h):
+        classifier = get_red_classifier(self)
+        parts = []
+        for window in windows:
+            roi, (roi_x, roi_y) = crop_region(region_image, window, region_origin)
+            if roi.size == 0:
+                continue
+            boxes = self._find_boxes(roi, classifier)
+            if not len(boxes):
                 continue
             
-            # 转换回原图坐标
-            abs_x = region['x'] + x
-            abs_y = region['y'] + y
-            
-            # 点击位置 = 血条中心下方35像素
-            click_x = abs_x + w // 2
-            click_y = abs_y + 50
-            
-            # 返回字典格式
-            monsters.append({
-                'click_pos': (click_x, click_y),
-                'hp_bar':  (abs_x, abs_y, w, h),
-                'center': (click_x, click_y)
-            })
+            # 碰到窗口边缘的连通块可能被截断（例如相邻怪物的血条），丢弃；
+            # 窗口边缘恰好是检测区域边缘时除外
+            x0 = roi_x - region_origin[0]
+            y0 = roi_y - region_origin[1]
+            h, w = roi.shape[:2]
+            keep = (boxes[:, 0] > 0) | (x0 == 0)
+            keep &= (boxes[:, 1] > 0) | (y0 == 0)
+            keep &= (boxes[:, 0] + boxes[:, 2] < w) | (x0 + w == region_w)
+            keep &= (boxes[:, 1] + boxes[:, 3] < h) | (y0 + h == region_h)
+            parts.append(boxes[keep] + np.array([roi_x, roi_y, 0, 0], np.int32))
         
-        return monsters
+        if not parts:
+            return make_hp_bars(np.empty((0, 4), np.int32))
+        
+        boxes = np.concatenate(parts)
+        if len(parts) > 1:
+            _, first = np.unique(boxes[:, :2], axis=0, return_index=True)
+            boxes = boxes[np.sort(first)]
+        return self._boxes_to_bars(boxes, (0, 0), region_image, region_origin)
+    
+    def _detect_in_roi(self, roi, roi_x, roi_y):
+        """在检测区域内做完整的血条颜色 + 连通块检测"""
+        return self._boxes_to_bars(self._scan_roi(roi), (roi_x, roi_y), roi, (roi_x, roi_y))
+    
+    def _scan_roi(self, roi, classifier=None):
+        """检测区域内的连通块外接矩形，开启分块时分块并行，区域大时走粗扫 + 细扫"""
+        if (self._tile_pool is not None and roi.shape[0] * roi.shape[1] > self.tile_min_pixels
+                and roi.shape[0] >= 4 * self.tile_workers * (self.hp_bar_max_height + 2)):
+            return self._find_boxes_tiled(roi, classifier)
+        return self._scan_tile(roi, classifier)
+    
+    def _scan_tile(self, roi, classifier=None):
+        """单线程处理一块区域：大区域粗扫 + 细扫，否则直接全分辨率"""
+        if roi.shape[0] * roi.shape[1] > self.coarse_min_pixels:
+            return self._find_boxes_coarse(roi, classifier)
+        return self._find_boxes(roi, classifier)
+    
+    def _find_boxes_tiled(self, roi, classifier=None):
+        """
+        分块并行：ROI 按行均分成 tile_workers 段，每段上下各多取 overlap 行
+        每个血条只归属于顶边所在的那一段；overlap 大于血条最大高度，归属段一定完整包含它。
+        碰到横条内部边缘的块是被截断的，丢弃（完整的块在归属段里不会碰到边缘）
+        """
+        classifier = classifier or get_red_classifier(self)
+        h = roi.shape[0]
+        overlap = self.hp_bar_max_height + 2
+        bounds = np.linspace(0, h, self.tile_workers + 1).astype(int).tolist()
+        
+        def scan(i):
+            top, bottom = bounds[i], bounds[i + 1]
+            y0, y1 = max(0, top - overlap), min(h, bottom + overlap)
+            boxes = self._scan_tile(roi[y0:y1], classifier)
+            y = boxes[:, 1] + y0
+            keep = (y >= top) & (y < bottom)
+            keep &= (boxes[:, 1] > 0) | (y0 == 0)
+            keep &= (boxes[:, 1] + boxes[:, 3] < y1 - y0) | (y1 == h)
+            boxes = boxes[keep]
+            boxes[:, 1] += y0
+            return boxes
+        
+        return np.concatenate(list(self._tile_pool.map(scan, range(self.tile_workers))))
+    
+    def _find_boxes_coarse(self, roi, classifier=None):
+        """
+        粗扫 + 细扫：在隔行隔列取样的小图上找横向的红色长条，把它们向四周扩展一个血条大小、
+        合并成若干窗口，只在这些窗口里做全分辨率检测
+        取样图上的掩码就是全分辨率掩码的取样，高度不小于 coarse_scale 的血条一定会被找到；
+        碰到窗口边缘的块是被截断的，丢弃（扩展量保证完整的血条不会碰到边缘）
+        """
+        classifier = classifier or get_red_classifier(self)
+        s = self.coarse_scale
+        h, w = roi.shape[:2]
+        small = cv2.resize(roi, (w // s, h // s), interpolation=cv2.INTER_NEAREST)
+        mask = getattr(self._coarse_local, 'mask', None)
+        if mask is None or mask.shape != small.shape[:2]:
+            mask = np.empty(small.shape[:2], np.uint8)
+            self._coarse_local.mask = mask
+        classifier.classify(small, out=mask)
+        
+        # 只保留横向连续的红色（长度取血条最小宽度的一半，容忍抗锯齿造成的断点），去掉零散的红色像素
+        run = max(1, self.hp_bar_min_width // (2 * s))
+        cv2.erode(mask, np.ones((1, run), np.uint8), dst=mask)
+        
+        parts = []
+        row_pad = self.hp_bar_max_height // s + 2
+        col_pad = self.hp_bar_max_width // s + 2
+        for r0, r1 in _merge_ranges(np.flatnonzero(mask.max(axis=1)), row_pad, mask.shape[0]):
+            columns = np.flatnonzero(mask[r0:r1].max(axis=0))
+            for c0, c1 in _merge_ranges(columns, col_pad, mask.shape[1]):
+                # 换回全分辨率；贴着取样图边缘的窗口延伸到 ROI 边缘（取样时丢掉的最后一行/列）
+                y0, y1 = r0 * s, (h if r1 == mask.shape[0] else r1 * s)
+                x0, x1 = c0 * s, (w if c1 == mask.shape[1] else c1 * s)
+                boxes = self._find_boxes(roi[y0:y1, x0:x1], classifier)
+                keep = (boxes[:, 0] > 0) | (x0 == 0)
+                keep &= (boxes[:, 1] > 0) | (y0 == 0)
+                keep &= (boxes[:, 0] + boxes[:, 2] < x1 - x0) | (x1 == w)
+                keep &= (boxes[:, 1] + boxes[:, 3] < y1 - y0) | (y1 == h)
+                parts.append(boxes[keep] + np.array([x0, y0, 0, 0], np.int32))
+        
+        if not parts:
+            return np.empty((0, 4), np.int32)
+        return np.concatenate(parts)
+    
+    def _find_boxes(self, roi, classifier=None):
+        """红色掩码中各连通块的外接矩形 (n, 4)，ROI 内坐标"""
+        # 红色掩码（与 HSV + 两次 inRange 结果一致）
+        classifier = classifier or get_red_classifier(self)
+        mask = classifier.classify(roi)
+        
+        # 原地闭运算，掩码缓冲区由分类器复用
+        cv2.morphologyEx(mask, cv2.MORPH_CLOSE, _CLOSE_KERNEL, dst=mask, iterations=1)
+        
+        # 2x2 核的闭运算结果整体向右下偏 1 像素，这里移回来，
+        # 血条位置与原图对齐（剩余血量要从红色末端量起）
+        boxes = find_mask_boxes(mask, self.sparse_mask_pixels)
+        boxes[:, :2] -= 1
+        np.maximum(boxes[:, :2], 0, out=boxes[:, :2])
+        return boxes
+    
+    def _boxes_to_bars(self, boxes, origin, image, image_origin):
+        """
+        筛选外接矩形并生成血条数组（含剩余血量）
+        :param origin: boxes 坐标的原点（客户区坐标）
+        :param image: 用来估计剩余血量的图像，左上角位于 image_origin
+        """
+        # 按宽、高、宽高比批量筛选，规则同 _is_hp_bar
+        keep = filter_hp_bar_boxes(boxes, self.hp_bar_min_width, self.hp_bar_max_width,
+                                   self.hp_bar_min_height, self.hp_bar_max_height,
+                                   self.hp_bar_min_ratio)
+        
+        # 转换回原图坐标，点击位置 = 血条中心下方 click_offset 像素
+        bars = make_hp_bars(boxes[keep], origin, click_offset=self.click_offset)
+        bars['hp'] = estimate_hp_fraction(image, bars, image_origin, self.hp_bar_max_width,
+                                          self.hp_bar_empty_max_value,
+                                          full_width=self.hp_bar_full_width)
+        return bars
     
     def _is_hp_bar(self, w, h):
         """判断是否是血条"""
@@ -94,6 +399,13 @@ class MonsterDetector:
         if not monsters:
             return None
         
+        if isinstance(monsters, HpBarList):
+            # 直接在结构化数组上求最近的一个，只为它生成字典
+            bars = monsters.bars
+            dx = bars['click_x'] - player_pos[0]
+            dy = bars['click_y'] - player_pos[1]
+            return bar_to_dict(bars[np.argmin(dx * dx + dy * dy)])
+        
         def distance(monster):
             cx, cy = monster['click_pos']
             dx = cx - player_pos[0]
@@ -0,0 +1,107 @@
+"""
+红色血条分类器 - 两段红色色相合并成一次 inRange，结果写入复用的缓冲区
+"""
+import threading
+import cv2
+import numpy as np
+
+# OpenCV 8 位 HSV 的色相范围是 0~180
+HUE_MAX = 180
+
+
+def _threshold_key(lower1, upper1, lower2, upper2):
+    return tuple(tuple(int(v) for v in bound) for bound in (lower1, upper1, lower2, upper2))
+
+
+class RedHueClassifier:
+    """
+    血条红色分类器
+
+    红色在色相环上横跨 0 度，原来要 cvtColor + 两次 inRange + bitwise_or。
+    当两段范围是 [0, a] 和 [b, 180] 且饱和度/亮度范围相同时，
+    把色相按 c = (a + b) / 2 折叠：h' = |h - c|，两段就合并成 h' >= c - a 一段，
+    于是只需 cvtColor -> absdiff（原地）-> 一次 inRange，结果逐像素与原来一致。
+    其余阈值组合退回原来的算法，同样使用复用缓冲区。
+    """
+
+    def __init__(self, lower1, upper1, lower2, upper2):
+        """
+        :param lower1, upper1: 第一段红色 HSV 范围（如 [0,100,100]~[10,255,255]）
+        :param lower2, upper2: 第二段红色 HSV 范围（如 [170,100,100]~[180,255,255]）
+        """
+        self.key = _threshold_key(lower1, upper1, lower2, upper2)
+        lower1, upper1, lower2, upper2 = (np.array(bound) for bound in self.key)
+        self._bounds = (lower1, upper1, lower2, upper2)
+        self._local = threading.local()  # 每个线程自己的临时缓冲区
+
+        # 判断能否折叠成一段
+        self.folded = (
+            lower1[0] == 0 and upper2[0] >= HUE_MAX and upper1[0] < lower2[0]
+            and (upper1[0] + lower2[0]) % 2 == 0
+            and np.array_equal(lower1[1:], lower2[1:])
+            and np.array_equal(upper1[1:], upper2[1:])
+        )
+        if self.folded:
+            center = (upper1[0] + lower2[0]) // 2
+            self._fold = np.array([center, 0, 0, 0], dtype=np.float64)
+            self._fold_lower = np.array([center - upper1[0], lower1[1], lower1[2]])
+            self._fold_upper = np.array([255, upper1[1], upper1[2]])
+
+    def _scratch(self, name, shape):
+        buffer = getattr(self._local, name, None)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            setattr(self._local, name, buffer)
+        return buffer
+
+    def classify(self, image, out=None):
+        """
+        计算血条掩码
+
+        :param image: (h, w, 3) BGR 图像
+        :param out: 预分配的 (h, w) uint8 输出；None 时使用线程内复用的缓冲区
+        :return: (h, w) uint8 掩码，255 为血条色（未传 out 时下一次调用会覆盖）
+        """
+        h, w = image.shape[:2]
+        if out is None:
+            out = self._scratch('mask', (h, w))
+
+        hsv = self._scratch('hsv', (h, w, 3))
+        cv2.cvtColor(image, cv2.COLOR_BGR2HSV, dst=hsv)
+
+        if self.folded:
+            cv2.absdiff(hsv, self._fold, dst=hsv)
+            cv2.inRange(hsv, self._fold_lower, self._fold_upper, dst=out)
+            return out
+
+        lower1, upper1, lower2, upper2 = self._bounds
+        second = self._scratch('second', (h, w))
+        cv2.inRange(hsv, lower1, upper1, dst=out)
+        cv2.inRange(hsv, lower2, upper2, dst=second)
+        cv2.bitwise_or(out, second, dst=out)
+        return out
+
+    def count(self, image):
+        """统计血条色像素数"""
+        return cv2.countNonZero(self.classify(image))
+
+
+# 按阈值共享的分类器，所有检测器共用
+_CLASSIFIERS = {}
+_CLASSIFIERS_LOCK = threading.Lock()
+
+
+def get_red_classifier(owner):
+    """
+    按检测器当前的 HSV 阈值取得共享的分类器（阈值被修改后自动换新的）
+
+    :param owner: 带 hp_bar_lower/hp_bar_upper/hp_bar_lower2/hp_bar_upper2 属性的检测器
+    """
+    key = _threshold_key(owner.hp_bar_lower, owner.hp_bar_upper,
+                         owner.hp_bar_lower2, owner.hp_bar_upper2)
+    with _CLASSIFIERS_LOCK:
+        classifier = _CLASSIFIERS.get(key)
+        if classifier is None:
+            classifier = RedHueClassifier(*key)
+            _CLASSIFIERS[key] = classifier
+    return classifier
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+目标选择 - 一次 NumPy 运算给所有候选怪物打分，并给出前 k 个目标的顺序
+"""
+import time
+import numpy as np
+
+
+class TargetSelector:
+    """
+    目标打分器
+
+    分数越高越优先，由几项加权组成：
+        distance  离玩家越近越好（按客户区对角线归一化）
+        hp        剩余血量越少越好（快死的先打）
+        recent    刚尝试过的目标降权，retry_cooldown 秒后恢复
+    最近超时（打不动、跑掉）的目标进入黑名单，blacklist_time 秒内不再选择。
+    """
+
+    DEFAULT_WEIGHTS = {
+        'distance': 1.0,
+        'hp': 0.3,
+        'recent': 0.5,
+    }
+
+    def __init__(self, player_pos=(512, 384), screen_size=(1024, 768), weights=None,
+                 retry_cooldown=5.0, blacklist_time=30.0, blacklist_radius=25, clock=time.monotonic):
+        """
+        :param player_pos: 玩家在客户区中的位置
+        :param screen_size: 客户区 (宽, 高)，用于把距离归一化
+        :param weights: 各项权重，缺省项用 DEFAULT_WEIGHTS
+        :param retry_cooldown: 尝试过的目标多少秒后不再降权
+        :param blacklist_time: 超时目标的拉黑时长（秒）
+        :param blacklist_radius: 离记录位置多近算同一个目标（像素），跟踪器重置后 ID 会变
+        :param clock: 返回当前秒数的函数
+        """
+        self.player_pos = tuple(player_pos)
+        self.diagonal = float(np.hypot(*screen_size)) or 1.0
+        self.weights = dict(self.DEFAULT_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+        self.retry_cooldown = retry_cooldown
+        self.blacklist_time = blacklist_time
+        self.blacklist_radius = blacklist_radius
+        self.clock = clock
+
+        # 每条记录: (时间, 轨迹 ID, x, y)，ID 为 -1 / 坐标为 NaN 表示未知
+        self._tried = []        # 时间为尝试时间
+        self._blacklist = []    # 时间为到期时间
+
+    def set_player_pos(self, player_pos, screen_size=None):
+        """更新玩家位置（和客户区大小）"""
+        self.player_pos = tuple(player_pos)
+        if screen_size is not None:
+            self.diagonal = float(np.hypot(*screen_size)) or 1.0
+
+    # ==================== 记录 ====================
+
+    @staticmethod
+    def _entry(timestamp, track_id, position):
+        x, y = position if position is not None else (np.nan, np.nan)
+        return (timestamp, -1 if track_id is None else track_id, x, y)
+
+    def mark_tried(self, track_id=None, position=None, now=None):
+        """
+        记录刚刚攻击过这个目标
+
+        :param track_id: 轨迹 ID（有跟踪器时）
+        :param position: 血条左上角 (x, y)，跟踪器重置后按位置识别同一个目标
+        """
+        now = self.clock() if now is None else now
+        self._tried.append(self._entry(now, track_id, position))
+
+    def mark_timeout(self, track_id=None, position=None, now=None):
+        """把超时（打不动、跑掉）的目标拉黑，参数同 mark_tried"""
+        now = self.clock() if now is None else now
+        self._blacklist.append(self._entry(now + self.blacklist_time, track_id, position))
+
+    def _prune(self, now):
+        self._tried = [entry for entry in self._tried if now - entry[0] < self.retry_cooldown]
+        self._blacklist = [entry for entry in self._blacklist if entry[0] > now]
+
+    def _match(self, entries, bars, ids):
+        """(n, m) bool 矩阵：第 i 个候选是否就是第 j 条记录（ID 相同或位置足够近）"""
+        table = np.array(entries, dtype=np.float64)
+        match = np.hypot(bars['x'][:, np.newaxis] - table[np.newaxis, :, 2],
+                         bars['y'][:, np.newaxis] - table[np.newaxis, :, 3]) <= self.blacklist_radius
+        if ids is not None:
+            match |= np.asarray(ids)[:, np.newaxis] == table[np.newaxis, :, 1]
+        return match, table[:, 0]
+
+    def clear(self):
+        """清空尝试记录和黑名单"""
+        self._tried.clear()
+        self._blacklist.clear()
+
+    # ==================== 打分 ====================
+
+    def score(self, bars, ids=None, now=None):
+        """
+        给所有候选打分
+
+        :param bars: HP_BAR_DTYPE 结构化数组
+        :param ids: 与 bars 对应的轨迹 ID 数组，None 表示没有跟踪
+        :return: (n,) float64 分数，黑名单中的目标为 -inf
+        """
+        now = self.clock() if now is None else now
+        self._prune(now)
+        n = len(bars)
+        if n == 0:
+            return np.empty(0)
+
+        w = self.weights
+        dx = bars['click_x'] - self.player_pos[0]
+        dy = bars['click_y'] - self.player_pos[1]
+        score = -w['distance'] * np.hypot(dx, dy) / self.diagonal
+        score += w['hp'] * (1.0 - bars['hp'])
+
+        if self._tried:
+            match, tried_at = self._match(self._tried, bars, ids)
+            # 没尝试过的目标 age 视为无穷大，惩罚为 0
+            age = np.where(match, now - tried_at, np.inf).min(axis=1)
+            score -= w['recent'] * np.clip(1.0 - age / self.retry_cooldown, 0.0, 1.0)
+
+        if self._blacklist:
+            match, _ = self._match(self._blacklist, bars, ids)
+            score[match.any(axis=1)] = -np.inf
+
+        return score
+
+    def rank(self, bars, ids=None, k=None, now=None):
+        """
+        按分数从高到低排序的候选下标（不含黑名单）
+
+        :param k: 只取前 k 个，None 表示全部
+        :return: int 数组
+        """
+        score = self.score(bars, ids, now)
+        valid = np.flatnonzero(np.isfinite(score))
+        if k is not None and k < len(valid):
+            # 先用 argpartition 取出前 k 个，再只对这 k 个排序
+            valid = valid[np.argpartition(-score[valid], k - 1)[:k]]
+        return valid[np.argsort(-score[valid], kind='stable')]
+
+    def select(self, bars, ids=None, now=None):
+        """最优候选的下标，没有可选目标时返回 None"""
+        order = self.rank(bars, ids, k=1, now=now)
+        return int(order[0]) if len(order) else None
\ No newline at end of file
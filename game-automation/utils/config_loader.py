@@ -0,0 +1,58 @@
+"""
+配置加载 - 读取 config.yaml，按顶层段落更新（保留其他段落的注释和格式）
+"""
+import os
+import yaml
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   'config.yaml')
+
+
+def load_config(path=DEFAULT_CONFIG_PATH):
+    """
+    读取配置文件
+
+    :return: dict，文件不存在时返回空 dict
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def save_section(name, values, path=DEFAULT_CONFIG_PATH, comment=None):
+    """
+    写入（替换）一个顶层段落，其他段落原样保留
+
+    yaml.safe_dump 整个文件会丢掉注释，所以只重写这一段的文本。
+
+    :param name: 顶层键名
+    :param values: 段落内容（dict）
+    :param comment: 写在段落上方的注释（不含 #）
+    """
+    lines = []
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            lines = f.read().splitlines()
+
+    block = yaml.safe_dump({name: values}, allow_unicode=True, sort_keys=False,
+                           default_flow_style=False).rstrip('\n').split('\n')
+
+    start = next((i for i, line in enumerate(lines) if line.startswith(f'{name}:')), None)
+    if start is None:
+        if lines and lines[-1].strip():
+            lines.append('')
+        if comment:
+            lines.append(f'# {comment}')
+        lines.extend(block)
+    else:
+        # 段落到下一个顶层键为止（下一个键上方紧挨着的注释属于下一个键）
+        end = start + 1
+        while end < len(lines) and (not lines[end] or lines[end][0] in ' \t'):
+            end += 1
+        while end > start + 1 and not lines[end - 1].strip():
+            end -= 1
+        lines[start:end] = block
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('\r\n'.join(lines))
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+图像工具 - BGRX 位图与 numpy 数组之间的零拷贝转换
+"""
+import cv2
+import numpy as np
+
+
+def bgrx_view(buffer, width, height):
+    """
+    把 GDI 位图字节（BGRX，每像素4字节）包装成 (h, w, 4) uint8 视图，不拷贝
+
+    :param buffer: bytes / bytearray / numpy 数组等支持缓冲区协议的对象
+    :param width: 位图宽度
+    :param height: 位图高度
+    :return: (h, w, 4) 数组（buffer 为 bytes 时只读）
+    """
+    return np.frombuffer(buffer, dtype=np.uint8, count=width * height * 4).reshape(height, width, 4)
+
+
+def bgrx_to_bgr(bgrx, out=None):
+    """
+    BGRX 转 OpenCV 使用的 BGR
+
+    :param bgrx: (h, w, 4) BGRX 数组；(h, w, 3) 的 BGR 数组原样处理
+    :param out: 预分配的 (h, w, 3) uint8 缓冲区；None 时直接返回视图
+    :return: out 为 None 时返回共享内存的 BGR 视图（非连续），否则返回 out
+    """
+    if out is None:
+        return bgrx[:, :, :3]
+
+    if out.shape != bgrx.shape[:2] + (3,):
+        raise ValueError(f"out shape {out.shape} does not match frame {bgrx.shape[:2] + (3,)}")
+
+    if bgrx.shape[2] == 4:
+        cv2.cvtColor(bgrx, cv2.COLOR_BGRA2BGR, dst=out)
+    else:
+        np.copyto(out, bgrx)
+    return out
+
+def crop_region(image, region, origin=(0, 0)):
+    """
+    按客户区坐标从图像中取出区域（超出图像的部分会被裁掉）
+
+    :param image: 图像数组，其左上角位于客户区坐标 origin 处
+    :param region: 客户区坐标 (x, y, w, h)
+    :param origin: image 左上角的客户区坐标；整帧截图时为 (0, 0)，ROI 截图时为 ROI 左上角
+    :return: (roi 视图, roi 左上角的客户区坐标)
+    """
+    ox, oy = origin
+    x, y, w, h = region
+    height, width = image.shape[:2]
+
+    x0 = min(max(0, x - ox), width)
+    y0 = min(max(0, y - oy), height)
+    x1 = max(x0, min(width, x - ox + w))
+    y1 = max(y0, min(height, y - oy + h))
+
+    return image[y0:y1, x0:x1], (x0 + ox, y0 + oy)
\ No newline at end of file
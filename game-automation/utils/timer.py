@@ -0,0 +1,188 @@
+"""
+精确计时 - 粗睡眠 + 短自旋的精确 sleep、按截止时间排程不漂移的节拍器、延迟抖动统计
+"""
+import sys
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    from ctypes import windll
+except ImportError:
+    windll = None
+
+# 粗睡眠在截止时间前多少秒醒来，剩下的自旋；None 表示第一次使用时测量
+_margin = None
+_margin_lock = threading.Lock()
+
+
+def calibrate_margin(samples=20, request=0.001):
+    """
+    测量本机 time.sleep 的超时量，得到粗睡眠的提前量
+
+    Windows 默认时钟精度 15.6 ms，sleep(1 ms) 可能睡十几毫秒；Linux 通常只多几十微秒。
+    :return: 提前量（秒），夹在 0.2 ms ~ 20 ms 之间
+    """
+    worst = 0.0
+    for _ in range(samples):
+        start = time.perf_counter()
+        time.sleep(request)
+        worst = max(worst, time.perf_counter() - start - request)
+    return float(min(max(worst * 1.5 + request, 0.0002), 0.02))
+
+
+def sleep_margin():
+    """当前使用的粗睡眠提前量（秒）"""
+    global _margin
+    if _margin is None:
+        with _margin_lock:
+            if _margin is None:
+                _margin = calibrate_margin()
+    return _margin
+
+
+def set_sleep_margin(margin):
+    """手动指定粗睡眠提前量（秒），None 表示重新测量"""
+    global _margin
+    _margin = margin
+
+
+def sleep_until(deadline, event=None, clock=time.perf_counter):
+    """
+    精确等到 deadline
+
+    先用 time.sleep（或 event.wait）睡到截止时间前 sleep_margin() 秒，剩下的用 sleep(0) 让出 CPU 自旋。
+
+    :param deadline: clock() 时间
+    :param event: threading.Event，被设置时提前返回
+    :param clock: 与 deadline 配套的时钟
+    :return: 是否被 event 中断
+    """
+    margin = None
+    while True:
+        remaining = deadline - clock()
+        if event is not None and event.is_set():
+            return True
+        if remaining <= 0:
+            return False
+        if margin is None:
+            # 已经过了截止时间的调用不触发测量
+            margin = sleep_margin()
+        if remaining > margin:
+            if event is None:
+                time.sleep(remaining - margin)
+            elif event.wait(remaining - margin):
+                return True
+        else:
+            time.sleep(0)
+
+
+def precise_sleep(seconds, event=None):
+    """
+    精确睡眠 seconds 秒，用法同 time.sleep
+    :return: 是否被 event 中断
+    """
+    return sleep_until(time.perf_counter() + seconds, event)
+
+
+@contextmanager
+def high_resolution_timer(period_ms=1):
+    """
+    在 with 块内把 Windows 系统时钟精度提高到 period_ms 毫秒（timeBeginPeriod），
+    粗睡眠更准、自旋更短；其他平台不做任何事
+    """
+    enabled = windll is not None and sys.platform == 'win32' and \
+        windll.winmm.timeBeginPeriod(period_ms) == 0
+    if enabled:
+        set_sleep_margin(None)
+    try:
+        yield enabled
+    finally:
+        if enabled:
+            windll.winmm.timeEndPeriod(period_ms)
+            set_sleep_margin(None)
+
+
+class JitterStats:
+    """
+    延迟抖动统计 - 记录 实际时间 - 计划时间（秒），只保留最近 size 个样本
+    """
+
+    def __init__(self, size=1024):
+        self._samples = np.zeros(size)
+        self._next = 0
+        self.count = 0
+
+    def add(self, error):
+        self._samples[self._next] = error
+        self._next = (self._next + 1) % len(self._samples)
+        self.count += 1
+
+    def samples(self):
+        """最近的样本（按时间顺序）"""
+        n = min(self.count, len(self._samples))
+        if n < len(self._samples):
+            return self._samples[:n].copy()
+        return np.roll(self._samples, -self._next)
+
+    def clear(self):
+        self._next = 0
+        self.count = 0
+
+    def summary(self):
+        """{'count', 'mean_ms', 'p50_ms', 'p99_ms', 'max_ms'}，基于最近的样本"""
+        samples = self.samples() * 1000
+        if not len(samples):
+            return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+        return {
+            'count': self.count,
+            'mean_ms': float(samples.mean()),
+            'p50_ms': float(np.percentile(samples, 50)),
+            'p99_ms': float(np.percentile(samples, 99)),
+            'max_ms': float(samples.max()),
+        }
+
+
+class Ticker:
+    """
+    周期节拍器
+
+    第 n 拍的截止时间是 起点 + n * period，每拍的处理耗时不会累积成漂移；
+    落后超过一个周期时（处理太慢、系统卡顿）从当前时刻重新起算，不连续补拍。
+    """
+
+    def __init__(self, period, clock=time.perf_counter, stats=None):
+        """
+        :param period: 周期（秒），运行中可以直接修改，下一拍生效
+        :param clock: 时钟
+        :param stats: JitterStats，记录每拍醒来时间与截止时间的偏差；None 表示新建
+        """
+        self.period = period
+        self.clock = clock
+        self.stats = stats if stats is not None else JitterStats()
+        self.missed = 0
+        self.reset()
+
+    def reset(self):
+        """从当前时刻重新起算"""
+        self._deadline = self.clock() + self.period
+
+    @property
+    def deadline(self):
+        return self._deadline
+
+    def wait(self, event=None):
+        """
+        等到下一拍
+        :return: 是否被 event 中断
+        """
+        if self.clock() - self._deadline > self.period:
+            # 落后一个周期以上，不追拍
+            self.missed += 1
+            self._deadline = self.clock()
+        if sleep_until(self._deadline, event, self.clock):
+            return True
+        self.stats.add(self.clock() - self._deadline)
+        self._deadline += self.period
+        return False
\ No newline at end of file